@@ -0,0 +1,350 @@
+"""
+A local mock of the GitLab REST API endpoints used by this repository, for benchmarks and manual testing.
+
+Implemented under /api/v4:
+    GET  /users?username=...
+    GET  /projects, /groups (?search=...&search_namespaces=true, paginated)
+    GET  /projects/:id_or_path, /groups/:id_or_path
+    GET  /projects/:id/members/:user_id, /groups/:id/members/:user_id
+    POST /projects/:id/members, /groups/:id/members
+    PUT  /projects/:id/members/:user_id, /groups/:id/members/:user_id
+    GET  /issues, /merge_requests (created_after/created_before/updated_after filters, inclusive like GitLab,
+         offset pagination with X-Total, X-Total-Pages, X-Next-Page and Link headers,
+         the totals left out above max_total results like GitLab does above 10,000,
+         pagination=keyset refused with 405 like GitLab does for these endpoints)
+
+/projects also offers keyset pagination ordered by id (pagination=keyset&id_after=...), like GitLab.
+
+Every 200 GET answer has an ETag; a request sending it back in If-None-Match gets a 304 without a body.
+Latency, the number of items and the share of injected 429 / 5xx responses are configurable.
+
+    python benchmarks/mock_gitlab.py --port 8080 --items 5000 --latency 0.05 --error-rate 0.01
+
+then point the apps at it with GITLAB_BASE_URL=http://127.0.0.1:8080 (any token is accepted).
+"""
+import argparse
+import functools
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlparse
+
+API_PREFIX = '/api/v4'
+
+
+@functools.lru_cache(maxsize=65536)
+def _timestamp(value: str, default: datetime = None) -> datetime:
+    """
+    Parses an ISO 8601 timestamp of a query or an item ('2024-01-01T00:00:00.000Z') to a naive UTC datetime.
+    """
+    if not value:
+        return default
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class MockGitLabConfig:
+    """
+    Settings and in-memory data of a mock GitLab server.
+
+    Args:
+        items (int, optional): Issues and merge requests generated per item type. Defaults to 1000.
+        year (int, optional): The year the generated items are created in. Defaults to 2024.
+        latency (float, optional): Seconds added to every response. Defaults to 0.
+        jitter (float, optional): Random extra seconds (0..jitter) added to every response. Defaults to 0.
+        rate_limit_rate (float, optional): Share of requests answered with 429. Defaults to 0.
+        error_rate (float, optional): Share of requests answered with a 502/503. Defaults to 0.
+        projects (int, optional): Number of projects (and groups). Defaults to 50.
+        seed (int, optional): Seed of the random error injection. Defaults to 0.
+        max_total (int, optional): Result count above which X-Total, X-Total-Pages and the
+            rel="last" link are left out. Defaults to 10000, like GitLab.
+    """
+
+    def __init__(self, items: int = 1000, year: int = 2024, latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit_rate: float = 0.0, error_rate: float = 0.0, projects: int = 50, seed: int = 0,
+                 max_total: int = 10000):
+        self.latency = latency
+        self.max_total = max_total
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.injected = 0
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self.members = {}
+        self.projects = [{'id': i, 'name': f"project-{i}", 'path': f"project-{i}",
+                          'path_with_namespace': f"group-{i}/project-{i}",
+                          'name_with_namespace': f"group-{i} / project-{i}"} for i in range(1, projects + 1)]
+        self.groups = [{'id': i, 'name': f"group-{i}", 'path': f"group-{i}", 'full_path': f"group-{i}",
+                        'full_name': f"group-{i}"} for i in range(1, projects + 1)]
+        self.items = {path: [self._item(path, i, year) for i in range(1, items + 1)]
+                      for path in ('issues', 'merge_requests')}
+
+    @staticmethod
+    def _item(path: str, i: int, year: int) -> dict:
+        # Roughly the size and shape of a real GitLab issue / merge request
+        created_at = f"{year}-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}T{i % 24:02d}:00:00.000Z"
+        return {
+            'id': i, 'iid': i, 'project_id': (i % 50) + 1, 'title': f"{path} {i}",
+            'description': "Lorem ipsum dolor sit amet. " * 20, 'state': ('opened', 'closed', 'merged')[i % 3],
+            'created_at': created_at, 'updated_at': created_at,
+            'author': {'id': (i % 20) + 1, 'username': f"user{(i % 20) + 1}", 'name': f"User {(i % 20) + 1}"},
+            'labels': ['bug', 'backend'], 'time_stats': {'time_estimate': 0, 'total_time_spent': 0},
+            'web_url': f"https://gitlab.example.com/group/project/-/{path}/{i}",
+        }
+
+    def next_fault(self):
+        """
+        Counts a request and returns the status code to inject for it, or None.
+        """
+        with self.lock:
+            self.requests += 1
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                self.injected += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.injected += 1
+                return self.random.choice((502, 503))
+        return None
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {'requests': self.requests, 'injected_errors': self.injected, 'bytes_sent': self.bytes_sent,
+                    'not_modified': self.not_modified}
+
+    def count_response(self, size: int, not_modified: bool = False):
+        with self.lock:
+            self.bytes_sent += size
+            self.not_modified += not_modified
+
+
+class MockGitLabHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like gitlab.com
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> MockGitLabConfig:
+        return self.server.config
+
+    def _send(self, status: int, body, headers: dict = None):
+        data = json.dumps(body).encode()
+        headers = dict(headers or {})
+        if self.command == 'GET' and status == 200:
+            # Like GitLab (Rack::ETag): a strong ETag of the body, and 304 without a body when it matches
+            headers['ETag'] = f'"{hashlib.md5(data).hexdigest()}"'
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                status, data = 304, b''
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.config.count_response(len(data), status == 304)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if not raw:
+            return {}
+        if 'json' in (self.headers.get('Content-Type') or ''):
+            return json.loads(raw)
+        return {key: values[0] for key, values in parse_qs(raw.decode()).items()}
+
+    def _handle(self, method: str):
+        # Always consume the body, so an early (injected) error keeps the keep-alive stream in sync
+        self.body = self._read_body()
+        if self.config.latency or self.config.jitter:
+            time.sleep(self.config.latency + self.config.random.random() * self.config.jitter)
+
+        fault = self.config.next_fault()
+        if fault == 429:
+            return self._send(429, {'message': '429 Too Many Requests'},
+                              {'Retry-After': '0', 'RateLimit-Remaining': '0',
+                               'RateLimit-Reset': str(int(time.time()))})
+        if fault:
+            return self._send(fault, {'message': f"{fault} Mock Error"})
+
+        if self.headers.get('PRIVATE-TOKEN') is None:
+            return self._send(401, {'message': '401 Unauthorized'})
+
+        url = urlparse(self.path)
+        if not url.path.startswith(API_PREFIX):
+            return self._send(404, {'message': '404 Not Found'})
+        path = url.path[len(API_PREFIX):]
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if method == 'GET' and path == '/users':
+            return self._users(query)
+        if method == 'GET' and path in ('/projects', '/groups'):
+            return self._entities(path, query)
+        if method == 'GET' and path in ('/issues', '/merge_requests'):
+            return self._items(path.strip('/'), query)
+
+        match = re.fullmatch(r'/(projects|groups)/([^/]+)', path)
+        if match and method == 'GET':
+            return self._entity(match.group(1), unquote(match.group(2)))
+
+        match = re.fullmatch(r'/(projects|groups)/(\d+)/members(?:/(\d+))?', path)
+        if match:
+            return self._membership(method, match.group(1), int(match.group(2)), match.group(3))
+
+        return self._send(404, {'message': '404 Not Found'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def _users(self, query: dict):
+        username = query.get('username', '')
+        match = re.fullmatch(r'user(\d+)', username)
+        if not match:
+            return self._send(200, [])
+        return self._send(200, [{'id': int(match.group(1)), 'username': username, 'name': username}])
+
+    def _entities(self, path: str, query: dict):
+        entities = self.config.projects if path == '/projects' else self.config.groups
+        search = query.get('search')
+        if search:
+            fields = ['name']
+            if query.get('search_namespaces'):
+                fields += ['path_with_namespace', 'name_with_namespace']
+            entities = [entity for entity in entities if any(search in entity.get(field, '') for field in fields)]
+        if path == '/projects' and query.get('pagination') == 'keyset':
+            return self._keyset_page('projects', entities, query)
+        return self._offset_page(path.strip('/'), entities, query)
+
+    def _entity(self, kind: str, identifier: str):
+        entities = self.config.projects if kind == 'projects' else self.config.groups
+        key = 'path_with_namespace' if kind == 'projects' else 'full_path'
+        for entity in entities:
+            if str(entity['id']) == identifier or entity[key] == identifier:
+                return self._send(200, entity)
+        return self._send(404, {'message': f"404 {kind[:-1].capitalize()} Not Found"})
+
+    def _membership(self, method: str, kind: str, entity_id: int, user_id):
+        members = self.config.members
+        if method == 'GET' and user_id:
+            key = (kind, entity_id, int(user_id))
+            if key in members:
+                return self._send(200, {'id': int(user_id), 'access_level': members[key]})
+            return self._send(404, {'message': '404 Not found'})
+        if method == 'PUT' and user_id:
+            key = (kind, entity_id, int(user_id))
+            if key not in members:
+                return self._send(404, {'message': '404 Not found'})
+            members[key] = int(self.body.get('access_level', 0))
+            return self._send(200, {'id': int(user_id), 'access_level': members[key]})
+        if method == 'POST' and not user_id:
+            key = (kind, entity_id, int(self.body.get('user_id', 0)))
+            if key in members:
+                return self._send(409, {'message': 'Member already exists'})
+            members[key] = int(self.body.get('access_level', 0))
+            return self._send(201, {'id': key[2], 'access_level': members[key]})
+        return self._send(405, {'message': '405 Method Not Allowed'})
+
+    def _items(self, path: str, query: dict):
+        created_after = _timestamp(query.get('created_after'), datetime.min)
+        created_before = _timestamp(query.get('created_before'), datetime.max)
+        updated_after = _timestamp(query.get('updated_after'), datetime.min)
+        # Both bounds are inclusive, like in GitLab
+        items = [item for item in self.config.items[path]
+                 if created_after <= _timestamp(item['created_at']) <= created_before
+                 and _timestamp(item['updated_at']) >= updated_after]
+
+        if query.get('pagination') == 'keyset':
+            return self._send(405, {'error': 'Keyset pagination is not yet available for this type of request'})
+
+        return self._offset_page(path, items, query)
+
+    def _base(self) -> str:
+        return f"http://{self.headers.get('Host')}{API_PREFIX}"
+
+    def _keyset_page(self, path: str, items: list, query: dict):
+        per_page = min(int(query.get('per_page', 20)), 100)
+        id_after = int(query.get('id_after', 0))
+        remaining = sorted((item for item in items if item['id'] > id_after), key=lambda item: item['id'])
+        page_items = remaining[:per_page]
+        headers = {}
+        if len(remaining) > per_page:
+            next_query = dict(query, id_after=page_items[-1]['id'])
+            headers['Link'] = f'<{self._base()}/{path}?{urlencode(next_query)}>; rel="next"'
+        return self._send(200, page_items, headers)
+
+    def _offset_page(self, path: str, items: list, query: dict):
+        per_page = min(int(query.get('per_page', 20)), 100)
+        page = max(1, int(query.get('page', 1)))
+        total_pages = max(1, -(-len(items) // per_page))
+        headers = {'X-Page': str(page), 'X-Per-Page': str(per_page),
+                   'X-Next-Page': str(page + 1) if page < total_pages else ''}
+        counted = len(items) <= self.config.max_total
+        if counted:
+            headers.update({'X-Total': str(len(items)), 'X-Total-Pages': str(total_pages)})
+        links = []
+        if page < total_pages:
+            links.append(f'<{self._base()}/{path}?{urlencode(dict(query, page=page + 1), quote_via=quote)}>; rel="next"')
+        links.append(f'<{self._base()}/{path}?{urlencode(dict(query, page=1), quote_via=quote)}>; rel="first"')
+        if counted:
+            links.append(
+                f'<{self._base()}/{path}?{urlencode(dict(query, page=total_pages), quote_via=quote)}>; rel="last"')
+        headers['Link'] = ', '.join(links)
+        return self._send(200, items[(page - 1) * per_page:page * per_page], headers)
+
+
+def start_mock_server(host: str = '127.0.0.1', port: int = 0, config: MockGitLabConfig = None):
+    """
+    Starts a mock GitLab server in a background thread.
+
+    Args:
+        host (str, optional): The address to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): The port to listen on, 0 for any free port. Defaults to 0.
+        config (MockGitLabConfig, optional): Data and fault settings. Defaults to MockGitLabConfig().
+
+    Returns:
+        tuple: A tuple containing (server, base_url). Call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), MockGitLabHandler)
+    server.daemon_threads = True
+    server.config = config or MockGitLabConfig()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a mock GitLab API server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--items', type=int, default=1000, help="issues and merge requests per type")
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra seconds per response")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of 502/503 responses")
+    parser.add_argument('--max-total', type=int, default=10000, help="results above which X-Total is left out")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.host, args.port, MockGitLabConfig(
+        items=args.items, year=args.year, latency=args.latency, jitter=args.jitter,
+        rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, max_total=args.max_total))
+    print(f"Mock GitLab API listening on {base_url} (GITLAB_BASE_URL={base_url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,365 @@
+"""
+Benchmarks of the GitLab helpers and the Flask app against a local mock GitLab server.
+
+Every scenario reports the latency of one operation (p50/p95/p99), operations per second,
+the HTTP requests per second the mock server received, the bytes it sent (and how many
+of its answers were 304 Not Modified) and the peak RSS of the process.
+
+    python benchmarks/run.py                                   # every scenario
+    python benchmarks/run.py pagination-concurrent flask-get-items --latency 0.05
+    python benchmarks/run.py --save baseline.json              # keep the numbers
+    python benchmarks/run.py --baseline baseline.json          # exit 1 if a p95 regressed
+
+See 'python benchmarks/run.py --help' for the mock server settings (items, latency, injected errors).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import psutil
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from mock_gitlab import MockGitLabConfig, start_mock_server  # noqa: E402
+
+BENCH_TOKEN = 'benchmark-token'
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+    Returns the nearest-rank percentile of a list of numbers (0 for an empty list).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(percent / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class PeakRSS:
+    """
+    Samples the resident memory of this process in a background thread and keeps the highest value.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+
+def run_operation(name: str, operation, repeat: int, concurrency: int, mock_config: MockGitLabConfig) -> dict:
+    """
+    Runs operation() repeat times from concurrency threads and measures it.
+
+    Returns:
+        dict: The scenario name and its measurements.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    remaining = iter(range(repeat))
+
+    def worker():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            try:
+                operation()
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    before = mock_config.stats()
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - started
+    after = mock_config.stats()
+    http_requests = after['requests'] - before['requests']
+
+    return {
+        'scenario': name,
+        'operations': len(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'ops_per_s': len(latencies) / wall_time if wall_time else 0.0,
+        'http_requests': http_requests,
+        'http_requests_per_s': http_requests / wall_time if wall_time else 0.0,
+        'http_mb': (after['bytes_sent'] - before['bytes_sent']) / (1024 * 1024),
+        'not_modified': after['not_modified'] - before['not_modified'],
+        'peak_rss_mb': rss.peak / (1024 * 1024),
+    }
+
+
+# Scenarios: each one returns (operation, default concurrency) for a mock server at base_url
+
+def _client(base_url):
+    # Same response cache (GITLAB_HTTP_CACHE, GITLAB_HTTP_CACHE_SCOPE=all to cache the list pages too) as the apps
+    from gitlab_client import GitLabClient
+    from gitlab_client.httpcache import get_default_response_cache
+
+    return GitLabClient(BENCH_TOKEN, base_url, response_cache=get_default_response_cache())
+
+
+def scenario_pagination_sequential(args, base_url):
+    from gitlab_client import iter_items_by_year
+
+    client = _client(base_url)
+    return lambda: sum(1 for _ in iter_items_by_year(args.item_type, args.year, client)), 1
+
+
+def scenario_pagination_concurrent(args, base_url):
+    from gitlab_client import fetch_pages_concurrently, items_path, year_params
+
+    client = _client(base_url)
+    return lambda: fetch_pages_concurrently(client, items_path(args.item_type), year_params(args.year),
+                                            max_workers=args.workers), 1
+
+
+def scenario_pagination_time_sliced(args, base_url):
+    from gitlab_client import fetch_items_time_sliced, items_path
+
+    client = _client(base_url)
+    return lambda: fetch_items_time_sliced(client, items_path(args.item_type), args.year, args.time_slice,
+                                           max_workers=args.workers), 1
+
+
+def scenario_count_only(args, base_url):
+    from gitlab_client import count_items_by_year
+
+    client = _client(base_url)
+    return lambda: count_items_by_year(args.item_type, args.year, client, max_workers=args.workers), 1
+
+
+def scenario_batch_report(args, base_url):
+    from gitlab_client import batch_report
+
+    client = _client(base_url)
+    # Both item types over the benchmark year and the two before it, on one worker pool
+    return lambda: batch_report(['issues', 'mr'], range(args.year - 2, args.year + 1), client, args.time_slice,
+                                max_workers=args.workers), 1
+
+
+def scenario_export_ndjson(args, base_url):
+    from gitlab_client import export_items_by_year
+
+    client = _client(base_url)
+
+    def operation():
+        with open(os.devnull, 'wb') as out:
+            export_items_by_year(args.item_type, args.year, out, client)
+    return operation, 1
+
+
+def scenario_grant(args, base_url):
+    from gitlab_client import set_member_role
+
+    client = _client(base_url)
+    counter = iter(range(10 ** 9))
+
+    def operation():
+        n = next(counter)
+        success, message = set_member_role(client, f"user{n % 20 + 1}", f"project-{n % 50 + 1}", 'Developer')
+        if not success:
+            raise RuntimeError(message)
+    return operation, args.concurrency
+
+
+def scenario_bulk_grants(args, base_url):
+    from gitlab_client import bulk_set_member_roles
+    from gitlab_client.entities import entity_index
+    from gitlab_client.members import entity_id_cache, user_id_cache
+
+    client = _client(base_url)
+    assignments = [{'username': f"user{n % 20 + 1}", 'entity_name': f"project-{n % 50 + 1}",
+                    'role': ('Reporter', 'Developer', 'Maintainer')[n % 3], 'entity_type': 'project'}
+                   for n in range(args.bulk_rows)]
+
+    def operation():
+        # Measure cold lookups every run
+        user_id_cache.clear()
+        entity_id_cache.clear()
+        entity_index.clear()
+        results = bulk_set_member_roles(client, assignments, max_workers=args.workers)
+        failed = [result for result in results if not result['success'] and 'Skipped' not in result['message']]
+        if failed:
+            raise RuntimeError(failed[0]['message'])
+    return operation, 1
+
+
+def _flask_app(base_url):
+    os.environ['GITLAB_PRIVATE_TOKEN'] = BENCH_TOKEN
+    os.environ['GITLAB_BASE_URL'] = base_url
+    sys.path.insert(0, os.path.join(REPO_ROOT, 'gitlab_http'))
+    from app import app
+    return app
+
+
+def scenario_flask_get_items(args, base_url):
+    app = _flask_app(base_url)
+    local = threading.local()
+
+    def operation():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        response = local.client.post('/get_items', data={'item_type': args.item_type, 'year': str(args.year)},
+                                     follow_redirects=True)
+        if response.status_code != 200 or b'class="error"' in response.data:
+            raise RuntimeError(f"/get_items returned {response.status_code}")
+    return operation, args.concurrency
+
+
+def scenario_flask_grant_access(args, base_url):
+    app = _flask_app(base_url)
+    local = threading.local()
+    counter = iter(range(10 ** 9))
+
+    def operation():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        n = next(counter)
+        response = local.client.post('/grant_access', data={
+            'username': f"user{n % 20 + 1}", 'entity_name': f"project-{n % 50 + 1}",
+            'role': 'Developer', 'entity_type': 'project'}, follow_redirects=True)
+        if response.status_code != 200 or b'class="error"' in response.data:
+            raise RuntimeError(f"/grant_access returned {response.status_code}")
+    return operation, args.concurrency
+
+
+SCENARIOS = {
+    'pagination-sequential': scenario_pagination_sequential,
+    'pagination-concurrent': scenario_pagination_concurrent,
+    'pagination-time-sliced': scenario_pagination_time_sliced,
+    'count-only': scenario_count_only,
+    'batch-report': scenario_batch_report,
+    'export-ndjson': scenario_export_ndjson,
+    'grant': scenario_grant,
+    'bulk-grants': scenario_bulk_grants,
+    'flask-get-items': scenario_flask_get_items,
+    'flask-grant-access': scenario_flask_grant_access,
+}
+
+
+def print_report(results: list):
+    header = (f"{'scenario':<24}{'ops':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'ops/s':>9}{'http req/s':>12}{'http MB':>9}{'304s':>7}{'peak RSS MB':>13}")
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(f"{result['scenario']:<24}{result['operations']:>6}{result['errors']:>8}"
+              f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+              f"{result['ops_per_s']:>9.2f}{result['http_requests_per_s']:>12.1f}{result['http_mb']:>9.1f}"
+              f"{result['not_modified']:>7}{result['peak_rss_mb']:>13.1f}")
+    for result in results:
+        if result['first_error']:
+            print(f"{result['scenario']}: first error: {result['first_error']}")
+
+
+def compare_to_baseline(results: list, baseline_path: str, max_regression: float) -> list:
+    """
+    Returns a message for every scenario whose p95 is more than max_regression slower than the baseline.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {result['scenario']: result for result in json.load(baseline_file)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['scenario'])
+        if previous and previous['p95_ms'] and result['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+            regressions.append(f"{result['scenario']}: p95 {result['p95_ms']:.1f} ms, "
+                               f"baseline {previous['p95_ms']:.1f} ms")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the GitLab helpers against a local mock GitLab server.")
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help=f"scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument('--repeat', type=int, default=20, help="operations per scenario")
+    parser.add_argument('--concurrency', type=int, default=4, help="threads for the per-request scenarios")
+    parser.add_argument('--workers', type=int, default=8, help="max_workers of concurrent pagination/bulk grants")
+    parser.add_argument('--time-slice', choices=['month', 'week', 'adaptive'], default='month',
+                        help="windows of the time-sliced pagination")
+    parser.add_argument('--bulk-rows', type=int, default=100, help="rows per bulk grant")
+    parser.add_argument('--item-type', choices=['issues', 'mr'], default='mr')
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--items', type=int, default=2000, help="items per type on the mock server")
+    parser.add_argument('--latency', type=float, default=0.02, help="mock response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.01, help="random extra mock latency in seconds")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="share of injected 429 responses")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of injected 502/503 responses")
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare the p95 latencies to this JSON file")
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help="allowed p95 slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    mock_config = MockGitLabConfig(items=args.items, year=args.year, latency=args.latency, jitter=args.jitter,
+                                   rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate)
+    server, base_url = start_mock_server(config=mock_config)
+
+    results = []
+    try:
+        for name in args.scenarios or SCENARIOS:
+            operation, concurrency = SCENARIOS[name](args, base_url)
+            results.append(run_operation(name, operation, args.repeat, concurrency, mock_config))
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    print(f"mock server: {mock_config.stats()['requests']} requests, "
+          f"{mock_config.stats()['injected_errors']} injected 429/5xx")
+
+    if args.save:
+        with open(args.save, 'w') as save_file:
+            json.dump({'settings': vars(args), 'results': results}, save_file, indent=2)
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Shared GitLab API helpers used by the CLI (main.py) and both Flask apps.
+"""
+from .aio import (AsyncGitLabClient, AsyncRequestError, aiter_items_by_year, aiter_pages, close_default_async_clients,
+                  get_default_async_client, run_in_default_loop, set_member_role_async)
+from .bulk import bulk_set_member_roles, load_manifest, write_report
+from .cache import TTLCache
+from .client import DEFAULT_BASE_URL, GitLabClient, get_default_client
+from .counts import count_items, count_items_by_year, count_items_time_sliced
+from .dataset import DATASET_FORMATS, ItemDataset, export_dataset_by_year, get_default_dataset
+from .deadline import DEFAULT_OPERATION_TIMEOUT, Deadline, DeadlineExceeded, operation_deadline
+from .entities import ENTITY_PATHS, EntityIndex, entity_index, lookup_entity_id, preload_entity_index
+from .export import (EXPORT_FORMATS, ExportStats, export_items_by_year, ndjson_lines, page_lines, parse_json_array,
+                     split_json_array)
+from .httpcache import MemoryResponseCache, SQLiteResponseCache, get_default_response_cache
+from .items import (ITEM_PATHS, items_path, iter_item_pages_by_year, iter_items_by_year, iter_raw_pages_by_year,
+                    year_params)
+from .jobs import JOB_HANDLERS, SQLiteJobQueue, ThreadJobQueue, get_default_job_queue
+from .members import (ROLE_MAPPING, invalidate_member_lookups, lookup_cache_stats, resolve_entity_id, resolve_user_id,
+                      set_member_role)
+from .metrics import REGISTRY, dump_metrics, endpoint_template, observe_app_request, render_metrics
+from .pagination import (DEFAULT_MAX_WORKERS, DEFAULT_PER_PAGE, fetch_pages_concurrently, iter_page_responses,
+                         iter_pages)
+from .projection import RESULT_FIELDS, project_items, record_type
+from .ratelimit import RateLimiter, shared_rate_limiter
+from .report import SUMMARY_FIELDS, batch_report, summary_totals, write_summary
+from .results import DEFAULT_RESULTS_PER_PAGE, ResultSetCache, get_default_result_cache, paginate
+from .singleflight import SingleFlight, fetch_items_by_year
+from .store import GROUP_BY_COLUMNS, ItemStore, get_default_store, sync_items_by_year
+from .timeslice import DEFAULT_TIME_SLICE, TIME_SLICES, fetch_items_time_sliced, fetch_windows, time_windows
+from .web import (MAX_YEAR, MIN_YEAR, collect_job_result, count_items_for_year, get_items_by_year, is_valid_year,
+                  query_items_by_year, register_result_routes, start_items_job)
+
+__all__ = [
+    "AsyncGitLabClient",
+    "AsyncRequestError",
+    "DATASET_FORMATS",
+    "DEFAULT_BASE_URL",
+    "DEFAULT_MAX_WORKERS",
+    "DEFAULT_OPERATION_TIMEOUT",
+    "DEFAULT_PER_PAGE",
+    "DEFAULT_RESULTS_PER_PAGE",
+    "DEFAULT_TIME_SLICE",
+    "Deadline",
+    "DeadlineExceeded",
+    "ENTITY_PATHS",
+    "EXPORT_FORMATS",
+    "EntityIndex",
+    "ExportStats",
+    "GROUP_BY_COLUMNS",
+    "GitLabClient",
+    "ITEM_PATHS",
+    "ItemDataset",
+    "ItemStore",
+    "JOB_HANDLERS",
+    "MAX_YEAR",
+    "MIN_YEAR",
+    "MemoryResponseCache",
+    "REGISTRY",
+    "RESULT_FIELDS",
+    "ROLE_MAPPING",
+    "RateLimiter",
+    "ResultSetCache",
+    "SQLiteJobQueue",
+    "SQLiteResponseCache",
+    "SUMMARY_FIELDS",
+    "SingleFlight",
+    "TIME_SLICES",
+    "TTLCache",
+    "ThreadJobQueue",
+    "aiter_items_by_year",
+    "aiter_pages",
+    "batch_report",
+    "bulk_set_member_roles",
+    "close_default_async_clients",
+    "collect_job_result",
+    "count_items",
+    "count_items_by_year",
+    "count_items_for_year",
+    "count_items_time_sliced",
+    "dump_metrics",
+    "endpoint_template",
+    "entity_index",
+    "export_dataset_by_year",
+    "export_items_by_year",
+    "fetch_items_by_year",
+    "fetch_items_time_sliced",
+    "fetch_pages_concurrently",
+    "fetch_windows",
+    "get_default_async_client",
+    "get_default_client",
+    "get_default_dataset",
+    "get_default_job_queue",
+    "get_default_response_cache",
+    "get_default_result_cache",
+    "get_default_store",
+    "get_items_by_year",
+    "invalidate_member_lookups",
+    "is_valid_year",
+    "items_path",
+    "iter_item_pages_by_year",
+    "iter_items_by_year",
+    "iter_page_responses",
+    "iter_pages",
+    "iter_raw_pages_by_year",
+    "load_manifest",
+    "lookup_cache_stats",
+    "lookup_entity_id",
+    "ndjson_lines",
+    "observe_app_request",
+    "operation_deadline",
+    "page_lines",
+    "paginate",
+    "parse_json_array",
+    "preload_entity_index",
+    "project_items",
+    "query_items_by_year",
+    "record_type",
+    "register_result_routes",
+    "render_metrics",
+    "resolve_entity_id",
+    "resolve_user_id",
+    "run_in_default_loop",
+    "set_member_role",
+    "set_member_role_async",
+    "shared_rate_limiter",
+    "split_json_array",
+    "start_items_job",
+    "summary_totals",
+    "sync_items_by_year",
+    "time_windows",
+    "write_report",
+    "write_summary",
+    "year_params",
+]
@@ -0,0 +1,453 @@
+import asyncio
+import atexit
+import os
+import threading
+import time
+import weakref
+
+try:
+    import httpx
+except ImportError:  # httpx is only needed for the async API
+    httpx = None
+
+from .client import (DEFAULT_BASE_URL, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, _cache_scope, _cached_response,
+                     _default_client_options, _revalidated_headers)
+from .deadline import Deadline, DeadlineExceeded
+from .entities import direct_lookup_path, entity_index, matches, search_params
+from .items import items_path, year_params
+from .members import ENTITY_PATHS, ROLE_MAPPING, entity_id_cache, invalidate_member_lookups, user_id_cache
+from .metrics import observe_request, record_grant, record_page, record_retry
+from .pagination import DEFAULT_PER_PAGE, KEYSET_PARAMS, _keyset_rejected, _try_keyset
+from .projection import project_items
+from .ratelimit import (DEFAULT_MAX_RETRIES, IDEMPOTENT_METHODS, RateLimiter, backoff_delay, retry_delay,
+                        shared_rate_limiter, should_retry)
+
+# Base class of the request errors raised by the async client
+AsyncRequestError = httpx.HTTPError if httpx is not None else OSError
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+
+
+class AsyncGitLabClient:
+    """
+    The asyncio counterpart of GitLabClient, built on one httpx.AsyncClient connection pool.
+
+    Many requests can be in flight at the same time from a single thread, e.g. with
+    asyncio.gather(). The client belongs to the event loop it is used in. Deadlines and
+    the response cache work as in GitLabClient.request.
+
+    Args:
+        token (str): The GitLab private token sent in the 'PRIVATE-TOKEN' header.
+        base_url (str, optional): The GitLab instance URL. Defaults to "https://gitlab.com".
+        max_connections (int, optional): Maximum open connections. Defaults to 100.
+        max_keepalive_connections (int, optional): Idle connections kept alive. Defaults to 20.
+        max_retries (int, optional): Retries for 429, 5xx and connection errors. Defaults to 3.
+        rate_limiter (RateLimiter, optional): The request scheduler. Defaults to the limiter
+            shared with the sync client of the same instance and token.
+        connect_timeout (float, optional): Seconds to establish a connection. Defaults to
+            GITLAB_CONNECT_TIMEOUT or 5.
+        read_timeout (float, optional): Seconds to wait for response data. Defaults to
+            GITLAB_READ_TIMEOUT or 30.
+        response_cache (optional): A MemoryResponseCache or SQLiteResponseCache, shared with the
+            sync clients (see GitLabClient). Defaults to None (no cache).
+
+    Raises:
+        RuntimeError: If httpx is not installed.
+    """
+
+    def __init__(self, token: str, base_url: str = DEFAULT_BASE_URL,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 rate_limiter: RateLimiter = None,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 response_cache=None):
+        if httpx is None:
+            raise RuntimeError("The async GitLab client requires httpx. Install it with 'pip install httpx'.")
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.api_url = f"{self.base_url}/api/v4"
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter or shared_rate_limiter(self.base_url, token)
+        self.timeout = (connect_timeout, read_timeout)
+        self.response_cache = response_cache
+        self.session = httpx.AsyncClient(
+            headers={'PRIVATE-TOKEN': token} if token else None,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    def url(self, path: str) -> str:
+        """
+        Builds a full API URL from a path relative to /api/v4 (absolute URLs are returned as is).
+        """
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    async def request(self, method: str, path: str, deadline: Deadline = None, **kwargs):
+        """
+        Sends a request through the shared connection pool and returns the httpx.Response.
+
+        Uses the same rate limiting, retry, deadline and response cache rules as
+        GitLabClient.request, waiting with asyncio.sleep so other requests keep running.
+
+        Raises:
+            DeadlineExceeded: If the deadline runs out before a response is received.
+        """
+        url = self.url(path)
+        key, cached = _cached_response(self, method, url, kwargs)
+        attempt = 0
+        while True:
+            await self._sleep(self.rate_limiter.reserve(), deadline)
+            if deadline is not None:
+                connect_timeout, read_timeout = deadline.timeout(self.timeout)
+                kwargs['timeout'] = httpx.Timeout(read_timeout, connect=connect_timeout)
+            started = time.perf_counter()
+            try:
+                response = await self.session.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                observe_request(method, url, 'error', time.perf_counter() - started)
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(deadline.seconds) from e
+                if attempt >= self.max_retries or method.upper() not in IDEMPOTENT_METHODS:
+                    raise
+                record_retry(method, url, 'error')
+                await self._sleep(backoff_delay(attempt), deadline)
+                attempt += 1
+                continue
+            observe_request(method, url, response.status_code, time.perf_counter() - started, len(response.content))
+
+            self.rate_limiter.update_from_headers(response.headers)
+            if attempt >= self.max_retries or not should_retry(method, response.status_code):
+                if key is not None:
+                    return self._use_response_cache(key, cached, response)
+                return response
+
+            record_retry(method, url, response.status_code)
+            await self._sleep(retry_delay(response.headers, response.status_code, attempt, self.rate_limiter),
+                              deadline)
+            attempt += 1
+
+    def _use_response_cache(self, key: str, cached, response):
+        """
+        Replays the cached body on a 304, or stores a 200 response that has validators.
+        """
+        headers = _revalidated_headers(self, key, cached, response.status_code, response.headers, response.content)
+        if headers is None:
+            return response
+        return httpx.Response(200, headers=headers, content=cached.content, request=response.request)
+
+    @staticmethod
+    async def _sleep(seconds: float, deadline: Deadline = None):
+        if deadline is not None and seconds >= deadline.remaining():
+            raise DeadlineExceeded(deadline.seconds)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    async def get(self, path: str, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def put(self, path: str, **kwargs):
+        return await self.request('PUT', path, **kwargs)
+
+    async def post(self, path: str, **kwargs):
+        return await self.request('POST', path, **kwargs)
+
+    async def aclose(self):
+        """
+        Closes all pooled connections.
+        """
+        await self.session.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+
+# One client per (event loop, base_url, token): an httpx.AsyncClient cannot be shared between loops
+_default_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_default_async_client(token: str = None, base_url: str = None) -> AsyncGitLabClient:
+    """
+    Returns the AsyncGitLabClient of the running event loop, creating it on first use.
+
+    The token and base URL default to the GITLAB_PRIVATE_TOKEN and GITLAB_BASE_URL
+    environment variables, and the retries, rate limit and response cache are those of
+    get_default_client. Must be called from inside a coroutine. The clients of a loop keep
+    their connections open until close_default_async_clients() is awaited on it; the loop
+    of run_in_default_loop does so when the process exits.
+    """
+    if token is None:
+        token = os.getenv("GITLAB_PRIVATE_TOKEN")
+    if base_url is None:
+        base_url = os.getenv("GITLAB_BASE_URL", DEFAULT_BASE_URL)
+
+    loop_clients = _default_async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get((base_url, token))
+    if client is None:
+        client = AsyncGitLabClient(token, base_url, **_default_client_options(base_url, token))
+        loop_clients[(base_url, token)] = client
+    return client
+
+
+async def close_default_async_clients():
+    """
+    Closes the default clients of the running event loop (see get_default_async_client).
+    """
+    loop_clients = _default_async_clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.aclose()
+
+
+_default_loop = None
+_default_loop_lock = threading.Lock()
+
+
+def _run_default_loop(loop):
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_forever()
+        loop.run_until_complete(close_default_async_clients())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+
+def _stop_default_loop(loop, thread):
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+
+
+def run_in_default_loop(coroutine):
+    """
+    Runs a coroutine on the process-wide event loop and returns its result.
+
+    The loop runs in a background thread for the life of the process, so the default
+    async clients created by the coroutines (see get_default_async_client) keep their
+    connection pools from one call to the next; running each call in a new event loop
+    would open and close a pool every time. The coroutine sees the context variables of
+    the calling thread (e.g. the Flask request). The clients are closed, and the loop
+    stopped, when the process exits.
+    """
+    global _default_loop
+    with _default_loop_lock:
+        if _default_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_run_default_loop, args=(loop,), name='gitlab-async', daemon=True)
+            thread.start()
+            atexit.register(_stop_default_loop, loop, thread)
+            _default_loop = loop
+    # call_soon_threadsafe copies the caller's context, and the task runs in that copy
+    return asyncio.run_coroutine_threadsafe(coroutine, _default_loop).result()
+
+
+async def aiter_pages(client: AsyncGitLabClient, path: str, params: dict = None,
+                      per_page: int = DEFAULT_PER_PAGE, keyset: bool = True, deadline: Deadline = None):
+    """
+    Async version of iter_pages(): yields the pages of a GitLab list endpoint one at a time.
+
+    Keyset pagination is tried first on the endpoints that support it; the others use offset paging.
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out.
+        httpx.HTTPError: If a page request fails.
+    """
+    params = {**(params or {}), 'per_page': per_page}
+
+    response = None
+    if _try_keyset(client.api_url, path, keyset):
+        response = await client.get(path, params={**params, **KEYSET_PARAMS}, deadline=deadline)
+        if _keyset_rejected(client.api_url, path, response.status_code, response.text):
+            response = None
+        else:
+            response.raise_for_status()
+
+    page = 1
+    offset_mode = response is None
+    if offset_mode:
+        response = await client.get(path, params={**params, 'page': page}, deadline=deadline)
+        response.raise_for_status()
+
+    while True:
+        current_items = response.json()
+        if not current_items:
+            break
+        record_page(str(response.url))
+        yield current_items
+
+        next_url = response.links.get('next', {}).get('url')
+        if next_url:
+            response = await client.get(next_url, deadline=deadline)
+        elif not offset_mode:
+            break
+        else:
+            next_page_header = response.headers.get('X-Next-Page')
+            if next_page_header:
+                page = int(next_page_header)
+            elif 'X-Page' not in response.headers and len(current_items) == per_page:
+                page += 1
+            else:
+                break
+            response = await client.get(path, params={**params, 'page': page}, deadline=deadline)
+        response.raise_for_status()
+
+
+async def aiter_items_by_year(item_type: str, year: int, client: AsyncGitLabClient = None,
+                              per_page: int = DEFAULT_PER_PAGE, keyset: bool = True, fields: tuple = None,
+                              deadline: Deadline = None):
+    """
+    Async version of iter_items_by_year(): yields the issues or merge requests created in a year.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        client (AsyncGitLabClient, optional): The client to use. Defaults to the loop's shared client.
+        per_page (int, optional): Page size. Defaults to 100.
+        keyset (bool, optional): Try keyset pagination first where supported. Defaults to True.
+        fields (tuple, optional): If given, items are yielded as ItemRecords holding only
+            these fields. Defaults to None (full dicts).
+        deadline (Deadline, optional): The time budget of all the pages. Defaults to None.
+
+    Yields:
+        dict: One issue or merge request (an ItemRecord when fields is given).
+
+    Raises:
+        ValueError: If the item type is invalid.
+        DeadlineExceeded: If the deadline runs out.
+        httpx.HTTPError: If a page request fails.
+    """
+    path = items_path(item_type)
+    if client is None:
+        client = get_default_async_client()
+    async for page_items in aiter_pages(client, path, year_params(year), per_page=per_page, keyset=keyset,
+                                       deadline=deadline):
+        if fields:
+            page_items = project_items(page_items, fields)
+        for item in page_items:
+            yield item
+
+
+async def resolve_user_id_async(client: AsyncGitLabClient, username: str, deadline: Deadline = None):
+    """
+    Async version of resolve_user_id(), sharing the same lookup cache.
+    """
+    key = (_cache_scope(client), username)
+    user_id = user_id_cache.get(key)
+    if user_id is not None:
+        return user_id
+
+    user_response = await client.get("users", params={'username': username}, deadline=deadline)
+    user_response.raise_for_status()
+    users = user_response.json()
+    if not users:
+        return None
+
+    user_id = users[0]['id']
+    user_id_cache.set(key, user_id)
+    return user_id
+
+
+async def resolve_entity_id_async(client: AsyncGitLabClient, entity_name: str, entity_type: str = "project",
+                                  deadline: Deadline = None):
+    """
+    Async version of resolve_entity_id(), sharing the same lookup cache and entity index.
+    """
+    scope = _cache_scope(client)
+    key = (scope, entity_type, entity_name)
+    entity_id = entity_id_cache.get(key)
+    if entity_id is None:
+        entity_id = entity_index.get(scope, entity_type, entity_name)
+    if entity_id is not None:
+        entity_id_cache.set(key, entity_id)
+        return entity_id
+
+    path = direct_lookup_path(entity_name, entity_type)
+    if path:
+        response = await client.get(path, deadline=deadline)
+        if response.status_code == 200:
+            entity = response.json()
+            entity_index.add(scope, entity_type, entity)
+            entity_id_cache.set(key, entity['id'])
+            return entity['id']
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    async for page in aiter_pages(client, ENTITY_PATHS[entity_type], search_params(entity_name, entity_type),
+                                  keyset=False, deadline=deadline):
+        for entity in page:
+            entity_index.add(scope, entity_type, entity)
+        entity = next((e for e in page if matches(e, entity_name, entity_type)), None)
+        if entity:
+            entity_id_cache.set(key, entity['id'])
+            return entity['id']
+    return None
+
+
+async def set_member_role_async(client: AsyncGitLabClient, username: str, entity_name: str, role: str,
+                                entity_type: str = "project", deadline: Deadline = None):
+    """
+    Async version of set_member_role(). The user and entity lookups run concurrently.
+
+    Returns:
+        tuple: A tuple containing (success_boolean, message_string).
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out; the role may or may not have been changed.
+        httpx.HTTPError: If an API request fails.
+    """
+    try:
+        success, message = await _set_member_role_async(client, username, entity_name, role, entity_type,
+                                                        deadline)
+    except (httpx.HTTPError, DeadlineExceeded):
+        record_grant(entity_type, 'error')
+        raise
+    record_grant(entity_type, 'success' if success else 'failure')
+    return success, message
+
+
+async def _set_member_role_async(client: AsyncGitLabClient, username: str, entity_name: str, role: str,
+                                 entity_type: str, deadline: Deadline):
+    if role not in ROLE_MAPPING:
+        return False, f"Error: Invalid role '{role}'. Valid roles are: {', '.join(ROLE_MAPPING.keys())}"
+
+    if entity_type not in ENTITY_PATHS:
+        return False, "Error: Invalid entity_type. Must be 'project' or 'group'."
+
+    role_id = ROLE_MAPPING[role]
+
+    for attempt in range(2):
+        user_id, entity_id = await asyncio.gather(
+            resolve_user_id_async(client, username, deadline),
+            resolve_entity_id_async(client, entity_name, entity_type, deadline),
+        )
+        if user_id is None:
+            return False, f"Error: User '{username}' not found."
+        if entity_id is None:
+            return False, f"Error: {entity_type.capitalize()} '{entity_name}' not found."
+
+        add_member_url = f"{ENTITY_PATHS[entity_type]}/{entity_id}/members"
+        member_url = f"{add_member_url}/{user_id}"
+
+        get_member_response = await client.get(member_url, deadline=deadline)
+
+        if get_member_response.status_code == 200:
+            put_response = await client.put(member_url, json={'access_level': role_id}, deadline=deadline)
+            put_response.raise_for_status()
+            return True, f"Successfully updated role of user '{username}' in {entity_type} '{entity_name}' to '{role}'."
+        elif get_member_response.status_code == 404:
+            post_response = await client.post(add_member_url, json={'user_id': user_id, 'access_level': role_id},
+                                              deadline=deadline)
+            if post_response.status_code == 404 and attempt == 0:
+                invalidate_member_lookups(client, username, entity_name, entity_type)
+                continue
+            post_response.raise_for_status()
+            return True, f"Successfully added user '{username}' to {entity_type} '{entity_name}' with role '{role}'."
+        else:
+            return False, f"Error managing member: {get_member_response.status_code} - {get_member_response.text}"
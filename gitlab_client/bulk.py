@@ -0,0 +1,149 @@
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .client import GitLabClient
+from .entities import preload_entity_index
+from .members import ROLE_MAPPING, resolve_entity_id, resolve_user_id, set_member_role
+from .metrics import record_grant
+from .pagination import DEFAULT_MAX_WORKERS
+
+# Columns of a bulk manifest (entity_type is optional and defaults to "project")
+MANIFEST_FIELDS = ['username', 'entity_name', 'role', 'entity_type']
+REPORT_FIELDS = ['row', 'username', 'entity_name', 'role', 'entity_type', 'success', 'message']
+
+
+def load_manifest(path: str):
+    """
+    Reads a list of role assignments from a CSV or JSON manifest.
+
+    A CSV manifest needs a header line with the columns username, entity_name, role
+    and optionally entity_type. A JSON manifest is a list of objects with the same keys.
+
+    Args:
+        path (str): Path to a .csv or .json file.
+
+    Returns:
+        list: One dict per assignment.
+
+    Raises:
+        ValueError: If the file type is not supported or a required column is missing.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+    elif path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        raise ValueError("Manifest must be a .csv or .json file.")
+
+    assignments = []
+    for number, row in enumerate(rows, start=1):
+        missing = [field for field in MANIFEST_FIELDS[:3] if not (row.get(field) or '').strip()]
+        if missing:
+            raise ValueError(f"Manifest row {number} is missing: {', '.join(missing)}")
+        assignments.append({
+            'username': row['username'].strip(),
+            'entity_name': row['entity_name'].strip(),
+            'role': row['role'].strip(),
+            'entity_type': (row.get('entity_type') or 'project').strip(),
+        })
+    return assignments
+
+
+def bulk_set_member_roles(client: GitLabClient, assignments: list, max_workers: int = DEFAULT_MAX_WORKERS,
+                          preload: bool = False):
+    """
+    Grants many (user, project/group, role) assignments in one run.
+
+    Every distinct username and project/group is looked up only once for the whole
+    batch, the lookups run in parallel, and the member GET/PUT/POST calls of the
+    rows then run in parallel too, with at most max_workers requests in flight.
+    If the same user/entity pair appears more than once, only its last row is applied.
+
+    Args:
+        client (GitLabClient): The client used for the requests.
+        assignments (list): Dicts with username, entity_name, role and entity_type.
+        max_workers (int, optional): Maximum parallel requests. Defaults to 8.
+        preload (bool, optional): First index every project and group the token is a member of
+            with one listing, so most entity lookups need no request. Defaults to False.
+
+    Returns:
+        list: One result dict per assignment, in input order, with the keys of REPORT_FIELDS.
+    """
+    results = [dict(assignment, row=number, success=False, message='')
+               for number, assignment in enumerate(assignments, start=1)]
+
+    # A later row for the same member overrides the earlier ones
+    last_row = {}
+    for result in results:
+        last_row[(result['username'], result['entity_type'], result['entity_name'])] = result['row']
+    for result in results:
+        superseding_row = last_row[(result['username'], result['entity_type'], result['entity_name'])]
+        if superseding_row != result['row']:
+            result['message'] = f"Skipped: superseded by row {superseding_row}."
+
+    pending = [result for result in results if not result['message']]
+    usernames = sorted({result['username'] for result in pending})
+    entities = sorted({(result['entity_name'], result['entity_type']) for result in pending
+                       if result['entity_type'] in ('project', 'group')})
+
+    if preload and entities:
+        entity_types = tuple(sorted({entity_type for _, entity_type in entities}, reverse=True))
+        try:
+            preload_entity_index(client, entity_types)
+        except requests.exceptions.RequestException:
+            pass  # The lookups below still find every entity, one request each
+
+    def lookup(function, *args):
+        try:
+            return function(client, *args)
+        except requests.exceptions.RequestException as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        # One lookup per distinct user and entity, which also warms the lookup cache
+        user_ids = dict(zip(usernames, executor.map(lambda name: lookup(resolve_user_id, name), usernames)))
+        entity_ids = dict(zip(entities, executor.map(lambda entity: lookup(resolve_entity_id, *entity), entities)))
+
+        def apply(result):
+            entity = (result['entity_name'], result['entity_type'])
+            user_id = user_ids[result['username']]
+            entity_id = entity_ids.get(entity)
+            for resolved in (user_id, entity_id):
+                if isinstance(resolved, requests.exceptions.RequestException):
+                    result['message'] = f"An API request error occurred: {resolved}"
+                    return result
+            if result['role'] in ROLE_MAPPING:
+                # Missing users and entities are not cached, so don't look them up again per row
+                if user_id is None:
+                    result['message'] = f"Error: User '{result['username']}' not found."
+                elif entity in entity_ids and entity_id is None:
+                    entity_label = result['entity_type'].capitalize()
+                    result['message'] = f"Error: {entity_label} '{result['entity_name']}' not found."
+                if result['message']:
+                    record_grant(result['entity_type'], 'failure')
+                    return result
+            try:
+                result['success'], result['message'] = set_member_role(
+                    client, result['username'], result['entity_name'], result['role'], result['entity_type'])
+            except requests.exceptions.RequestException as e:
+                result['message'] = f"An API request error occurred: {e}"
+            return result
+
+        list(executor.map(apply, pending))
+
+    return results
+
+
+def write_report(results: list, path: str):
+    """
+    Writes the per-row results of bulk_set_member_roles to a CSV file.
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded cache with least-recently-used eviction and a time-to-live.
+
+    Expired entries are dropped when they are read. When the cache is full, the entry
+    that was used least recently is evicted to make room for a new one.
+
+    Args:
+        maxsize (int, optional): Maximum number of entries. Defaults to 1024.
+        ttl (float, optional): Seconds an entry stays valid. Defaults to 300.
+        timer (callable, optional): Clock used for expiry. Defaults to time.monotonic.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for key, or default if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self.timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """
+        Returns the cached value for key like get(), without counting it or marking it as used.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > self.timer():
+                return entry[0]
+            return default
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting the least recently used entry if the cache is full.
+        """
+        with self._lock:
+            self._data[key] = (value, self.timer() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Removes key from the cache (no error if it is not cached).
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters as a dictionary.
+        """
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[1] > self.timer()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .deadline import Deadline, DeadlineExceeded
+from .httpcache import CachedResponse, cache_key, cacheable_headers, get_default_response_cache, is_lookup_url
+from .metrics import observe_request, record_conditional, record_retry
+from .ratelimit import (DEFAULT_MAX_RETRIES, IDEMPOTENT_METHODS, RateLimiter, backoff_delay, retry_delay,
+                        shared_rate_limiter, should_retry)
+
+DEFAULT_BASE_URL = "https://gitlab.com"
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+# Seconds to open a connection and to wait for the server between two bytes of the response
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("GITLAB_CONNECT_TIMEOUT", 5))
+DEFAULT_READ_TIMEOUT = float(os.getenv("GITLAB_READ_TIMEOUT", 30))
+
+
+class GitLabClient:
+    """
+    A small wrapper around one keep-alive requests.Session for the GitLab REST API.
+
+    The session keeps TCP/TLS connections open between calls, so the sequential
+    requests of manage_member_role and the pages of get_items_by_year reuse the
+    same connection instead of doing a new handshake each time.
+
+    Args:
+        token (str): The GitLab private token sent in the 'PRIVATE-TOKEN' header.
+        base_url (str, optional): The GitLab instance URL. Defaults to "https://gitlab.com".
+        pool_connections (int, optional): Number of host pools to cache. Defaults to 10.
+        pool_maxsize (int, optional): Maximum connections kept open per host. Defaults to 10.
+        max_retries (int, optional): Retries for 429, 5xx and connection errors. Defaults to 3.
+        rate_limiter (RateLimiter, optional): The request scheduler. Defaults to the limiter
+            shared by all clients of the same instance and token.
+        connect_timeout (float, optional): Seconds to establish a connection. Defaults to
+            GITLAB_CONNECT_TIMEOUT or 5.
+        read_timeout (float, optional): Seconds to wait for response data. Defaults to
+            GITLAB_READ_TIMEOUT or 30.
+        response_cache (optional): A MemoryResponseCache or SQLiteResponseCache. GET responses
+            with an ETag or Last-Modified are kept in it and revalidated with conditional
+            requests; with the 'lookups' scope of the cache, only the lookups (see
+            is_lookup_url). Defaults to None (no cache).
+    """
+
+    def __init__(self, token: str, base_url: str = DEFAULT_BASE_URL,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 rate_limiter: RateLimiter = None,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 response_cache=None):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.api_url = f"{self.base_url}/api/v4"
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter or shared_rate_limiter(self.base_url, token)
+        self.timeout = (connect_timeout, read_timeout)
+        self.response_cache = response_cache
+
+        self.session = requests.Session()
+        if token:
+            self.session.headers.update({'PRIVATE-TOKEN': token})
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, path: str) -> str:
+        """
+        Builds a full API URL from a path relative to /api/v4 (absolute URLs are returned as is).
+        """
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.api_url}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str, deadline: Deadline = None, **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session and the rate limiter.
+
+        The request waits for the rate limiter before it is sent. 429 responses (and 5xx
+        responses or connection errors for idempotent methods) are retried up to
+        max_retries times, after Retry-After or a jittered exponential backoff. Every attempt
+        is recorded in the metrics (endpoint, status, latency, body size and retries).
+
+        With a response cache, a GET for a cached URL carries If-None-Match/If-Modified-Since,
+        and a 304 answer is turned into the cached 200 response (body and pagination headers).
+
+        Every attempt uses the client's connect/read timeouts unless a timeout is passed.
+        With a deadline, the timeouts are capped to the time left and no attempt is started
+        (nor waited for) once the deadline has passed.
+
+        Args:
+            method (str): The HTTP method ('GET', 'PUT', 'POST', ...).
+            path (str): The API path relative to /api/v4, or a full URL.
+            deadline (Deadline, optional): The budget of the operation this request belongs to.
+            **kwargs: Passed through to requests.Session.request (params, json, ...).
+
+        Returns:
+            requests.Response: The response object (the last one if all retries failed).
+
+        Raises:
+            DeadlineExceeded: If the deadline runs out before a response is received.
+        """
+        url = self.url(path)
+        timeout = kwargs.pop('timeout', self.timeout)
+        key, cached = _cached_response(self, method, url, kwargs)
+        attempt = 0
+        while True:
+            wait = self.rate_limiter.reserve()
+            if deadline is not None:
+                deadline.sleep(wait)
+                kwargs['timeout'] = deadline.timeout(timeout)
+            else:
+                if wait > 0:
+                    time.sleep(wait)
+                kwargs['timeout'] = timeout
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                observe_request(method, url, 'error', time.perf_counter() - started)
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(deadline.seconds) from e
+                if attempt >= self.max_retries or method.upper() not in IDEMPOTENT_METHODS:
+                    raise
+                record_retry(method, url, 'error')
+                self._sleep(backoff_delay(attempt), deadline)
+                attempt += 1
+                continue
+            observe_request(method, url, response.status_code, time.perf_counter() - started, len(response.content))
+
+            self.rate_limiter.update_from_headers(response.headers)
+            if attempt >= self.max_retries or not should_retry(method, response.status_code):
+                if key is not None:
+                    return self._use_response_cache(key, cached, response)
+                return response
+
+            record_retry(method, url, response.status_code)
+            self._sleep(retry_delay(response.headers, response.status_code, attempt, self.rate_limiter), deadline)
+            attempt += 1
+
+    def _use_response_cache(self, key: str, cached: CachedResponse, response: requests.Response):
+        """
+        Replays the cached body on a 304, or stores a 200 response that has validators.
+        """
+        headers = _revalidated_headers(self, key, cached, response.status_code, response.headers, response.content)
+        if headers is not None:
+            response.status_code = 200
+            response.reason = 'OK'
+            response._content = cached.content
+            response.headers = CaseInsensitiveDict(headers)
+        return response
+
+    @staticmethod
+    def _sleep(seconds: float, deadline: Deadline = None):
+        if deadline is not None:
+            deadline.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request('PUT', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+    def close(self):
+        """
+        Closes the session and all pooled connections.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _cached_response(client, method: str, url: str, kwargs: dict):
+    """
+    Looks a GET up in the client's response cache and adds its validators to the request headers.
+
+    Returns:
+        tuple: (cache_key_or_None, CachedResponse_or_None). The key is None when the request
+        is not cached (no cache, not a GET or outside the cache scope).
+    """
+    if client.response_cache is None or method.upper() != 'GET':
+        return None, None
+    full_url = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+    if client.response_cache.scope != 'all' and not is_lookup_url(full_url):
+        return None, None
+    key = cache_key(client.token, full_url)
+    cached = client.response_cache.get(key)
+    if cached is not None:
+        conditions = {'If-None-Match': cached.etag, 'If-Modified-Since': cached.last_modified}
+        kwargs['headers'] = {**{name: value for name, value in conditions.items() if value},
+                             **(kwargs.get('headers') or {})}
+    return key, cached
+
+
+def _revalidated_headers(client, key: str, cached: CachedResponse, status_code: int, headers, content: bytes):
+    """
+    Handles the answer to a cached GET, for the sync and the async client.
+
+    Returns:
+        dict: On a 304, the headers of the cached 200 response to replay with its body
+        (the fresh ones, rate limit and so on, win over the cached ones). None otherwise,
+        after storing a 200 response that has validators.
+    """
+    if status_code == 304 and cached is not None:
+        record_conditional('not_modified', len(cached.content))
+        return {**cached.headers, **cacheable_headers(headers)}
+
+    etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+    if status_code == 200 and (etag or last_modified):
+        record_conditional('stored' if cached is None else 'modified', 0)
+        client.response_cache.set(key, CachedResponse(etag, last_modified, cacheable_headers(headers), content))
+    return None
+
+
+def _default_client_options(base_url: str, token: str) -> dict:
+    """
+    Returns the retry, rate limit and response cache options of the shared sync and async clients.
+    """
+    max_retries = int(os.getenv("GITLAB_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+    rate = os.getenv("GITLAB_RATE_LIMIT")
+    rate_limiter = shared_rate_limiter(base_url.rstrip('/'), token, float(rate) if rate else None)
+    return {'max_retries': max_retries, 'rate_limiter': rate_limiter, 'response_cache': get_default_response_cache()}
+
+
+def _cache_scope(client) -> tuple:
+    """
+    Returns the key that separates cached lookups of different GitLab instances and tokens.
+    """
+    return (client.api_url, client.token)
+
+
+_default_clients = {}
+_default_clients_lock = threading.Lock()
+
+
+def get_default_client(token: str = None, base_url: str = None) -> GitLabClient:
+    """
+    Returns a process-wide GitLabClient, creating it on first use.
+
+    The token and base URL default to the GITLAB_PRIVATE_TOKEN and GITLAB_BASE_URL
+    environment variables. The pool size can be tuned with GITLAB_POOL_MAXSIZE, the
+    number of retries with GITLAB_MAX_RETRIES and a fixed request rate (requests per
+    second) with GITLAB_RATE_LIMIT. GET lookups (and list pages with
+    GITLAB_HTTP_CACHE_SCOPE=all) go through the process-wide response cache
+    (GITLAB_HTTP_CACHE, see get_default_response_cache).
+    One client is kept per (base_url, token) pair so the Flask routes and the CLI
+    share a single connection pool.
+
+    Args:
+        token (str, optional): The GitLab private token.
+        base_url (str, optional): The GitLab instance URL.
+
+    Returns:
+        GitLabClient: The shared client.
+    """
+    if token is None:
+        token = os.getenv("GITLAB_PRIVATE_TOKEN")
+    if base_url is None:
+        base_url = os.getenv("GITLAB_BASE_URL", DEFAULT_BASE_URL)
+
+    key = (base_url, token)
+    with _default_clients_lock:
+        client = _default_clients.get(key)
+        if client is None:
+            pool_maxsize = int(os.getenv("GITLAB_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE))
+            client = GitLabClient(token, base_url, pool_maxsize=pool_maxsize,
+                                  **_default_client_options(base_url, token))
+            _default_clients[key] = client
+    return client
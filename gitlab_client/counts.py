@@ -0,0 +1,141 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .client import GitLabClient, get_default_client
+from .deadline import Deadline
+from .items import items_path
+from .metrics import record_page
+from .pagination import DEFAULT_MAX_WORKERS, DEFAULT_PER_PAGE
+from .timeslice import MIN_WINDOW, _bisect, fetch_windows, merge_pages, time_windows, window_params
+
+# GitLab leaves X-Total and X-Total-Pages out of the list responses above this many results
+COUNT_LIMIT = 10000
+
+
+def count_items(client: GitLabClient, path: str, params: dict = None, deadline: Deadline = None):
+    """
+    Counts the results of a list query with one request of a single item, from its X-Total header.
+
+    Returns:
+        int: The number of results, or None when GitLab left the header out (it does so
+        above COUNT_LIMIT results).
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If the request fails.
+    """
+    response = client.get(path, params={**(params or {}), 'per_page': 1}, deadline=deadline)
+    response.raise_for_status()
+    record_page(response.url)
+    total = response.headers.get('X-Total')
+    if total:
+        return int(total)
+    # No header and no item: nothing matches
+    return None if response.json() else 0
+
+
+def _exceeds_count_limit(client: GitLabClient, path: str, params: dict, deadline: Deadline = None) -> bool:
+    """
+    Tells whether a list query has more than COUNT_LIMIT results, with one request of its next item.
+    """
+    response = client.get(path, params={**params, 'per_page': 1, 'page': COUNT_LIMIT + 1}, deadline=deadline)
+    response.raise_for_status()
+    record_page(response.url)
+    return bool(response.json())
+
+
+def count_items_time_sliced(client: GitLabClient, path: str, windows: list, max_workers: int = DEFAULT_MAX_WORKERS,
+                            deadline: Deadline = None) -> int:
+    """
+    Counts the items of a list endpoint created in a set of time windows, in parallel.
+
+    Every window is counted with count_items. When GitLab leaves the count of a window
+    out, one more request tells whether it really has more than COUNT_LIMIT items: if
+    so it is split in two halves that are counted the same way (down to MIN_WINDOW),
+    otherwise it is paginated (see fetch_windows) and its distinct ids counted. The
+    windows are half-open (see window_params), so no item is counted twice.
+
+    Args:
+        client (GitLabClient): The client used to send the requests.
+        path (str): The API path, e.g. 'issues' or 'merge_requests'.
+        windows (list): The [start, end) windows to count (see time_windows).
+        max_workers (int, optional): Maximum number of requests in flight. Defaults to 8.
+        deadline (Deadline, optional): The time budget of the whole count. Defaults to None.
+
+    Returns:
+        int: The number of items created in the windows.
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If a request fails.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    pending = {}
+
+    def submit(function, window):
+        pending[executor.submit(function, client, path, window_params(*window), deadline)] = (function, window)
+
+    total = 0
+    uncounted = []
+    try:
+        for window in windows:
+            submit(count_items, window)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                function, window = pending.pop(future)
+                result = future.result()
+                if function is count_items and result is not None:
+                    total += result
+                elif function is count_items and window[1] - window[0] >= 2 * MIN_WINDOW:
+                    submit(_exceeds_count_limit, window)
+                elif function is _exceeds_count_limit and result:
+                    for half in _bisect(window):
+                        submit(count_items, half)
+                else:
+                    uncounted.append(window)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if uncounted:
+        pages = {}
+        fetch_windows(client, {path: (path, uncounted)}, pages, per_page=DEFAULT_PER_PAGE, max_workers=max_workers,
+                      fields=('id',), deadline=deadline)
+        total += len(merge_pages(pages[path]))
+    return total
+
+
+def count_items_by_year(item_type: str, year: int, client: GitLabClient = None, time_slice: str = 'month',
+                        max_workers: int = DEFAULT_MAX_WORKERS, deadline: Deadline = None) -> int:
+    """
+    Counts the issues or merge requests created in a year without downloading them.
+
+    One request of a single item is sent for the whole year and its X-Total header is
+    read. When GitLab leaves the header out (very large years), the year is counted
+    window by window in parallel instead (see count_items_time_sliced).
+
+    Args:
+        item_type (str): The type of items to count ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        time_slice (str, optional): The windows of the fallback: 'month', 'week' or
+            'adaptive' (same as 'month', since crowded windows are always split). Defaults to 'month'.
+        max_workers (int, optional): Maximum number of requests in flight. Defaults to 8.
+        deadline (Deadline, optional): The time budget of the whole count. Defaults to None.
+
+    Returns:
+        int: The number of items created in the year.
+
+    Raises:
+        ValueError: If the item type or the time slice is invalid.
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If a request fails.
+    """
+    path = items_path(item_type)
+    windows = time_windows(year, time_slice)
+    if client is None:
+        client = get_default_client()
+    # The whole year as one half-open window, so an item created on the next New Year is not counted
+    total = count_items(client, path, window_params(windows[0][0], windows[-1][1]), deadline=deadline)
+    if total is not None:
+        return total
+    return count_items_time_sliced(client, path, windows, max_workers=max_workers, deadline=deadline)
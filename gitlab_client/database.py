@@ -0,0 +1,38 @@
+import sqlite3
+from contextlib import closing
+
+# Seconds a connection waits for another one's write lock before failing
+BUSY_TIMEOUT = 30
+
+
+class _Transaction:
+    """
+    Context manager that commits (or rolls back) and then closes a sqlite3 connection.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with closing(self.connection):
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+
+
+def connect(path: str) -> _Transaction:
+    """
+    Opens a connection to a SQLite database in WAL mode, for one transaction.
+
+    Used as 'with connect(path) as connection:', which commits (or rolls back on an error)
+    and closes the connection at the end of the block. One short-lived connection per
+    operation keeps the store, the response cache and the job table safe to use from any
+    thread, and WAL mode lets readers run while another connection writes.
+    """
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return _Transaction(connection)
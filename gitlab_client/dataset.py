@@ -0,0 +1,373 @@
+import gzip
+import io
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is only needed for the Parquet format
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is only needed for the .ndjson.zst format
+    zstandard = None
+
+from .client import GitLabClient, get_default_client
+from .deadline import Deadline
+from .export import ndjson_lines, parse_json_array
+from .items import items_path, year_params
+from .pagination import DEFAULT_PER_PAGE, iter_page_responses
+from .projection import _field_getter, _field_name
+from .store import normalize_timestamp, sync_watermark
+
+DEFAULT_DATASET_PATH = "gitlab_dataset"
+
+# File formats of the dataset parts, by file extension
+DATASET_FORMATS = ('parquet', 'ndjson.zst', 'ndjson.gz')
+
+# Item fields stored as typed Parquet columns, next to the full GitLab JSON of the item ('data')
+DATASET_FIELDS = ('id', 'iid', 'project_id', 'title', 'state', 'created_at', 'updated_at', 'author.username',
+                  'labels', 'web_url')
+
+# Rows buffered per month before they are written as one part file
+DEFAULT_PART_ROWS = 10000
+
+_TIMESTAMP_FIELDS = ('created_at', 'updated_at')
+
+
+def default_dataset_format() -> str:
+    """
+    Returns GITLAB_DATASET_FORMAT, or the best format available: Parquet with pyarrow,
+    then zstd-compressed NDJSON with zstandard, then gzip-compressed NDJSON.
+    """
+    configured = os.getenv("GITLAB_DATASET_FORMAT")
+    if configured:
+        return configured
+    if pyarrow is not None:
+        return 'parquet'
+    return 'ndjson.zst' if zstandard is not None else 'ndjson.gz'
+
+
+def _parquet_schema():
+    columns = [
+        ('id', pyarrow.int64()), ('iid', pyarrow.int64()), ('project_id', pyarrow.int64()),
+        ('title', pyarrow.string()), ('state', pyarrow.string()),
+        ('created_at', pyarrow.timestamp('us', tz='UTC')), ('updated_at', pyarrow.timestamp('us', tz='UTC')),
+        ('author_username', pyarrow.string()), ('labels', pyarrow.list_(pyarrow.string())),
+        ('web_url', pyarrow.string()), ('data', pyarrow.string()),
+    ]
+    return pyarrow.schema(columns)
+
+
+def _parse_timestamp(value: str):
+    return datetime.fromisoformat(normalize_timestamp(value).replace('Z', '+00:00')) if value else None
+
+
+class ItemDataset:
+    """
+    A local, append-only dataset of issues/merge requests for analysis, partitioned by
+    type, year and month of creation:
+
+        <root>/<item_type>/year=2024/month=05/part-<time>-<id>.parquet
+
+    Every write adds new part files, so incremental runs only append the items that
+    changed. Readers keep the most recently written copy of each id. compact() rewrites
+    a year into one part per month without the superseded copies.
+
+    Parquet parts hold DATASET_FIELDS as typed columns plus the full item JSON ('data');
+    the NDJSON parts hold one full item JSON per line.
+
+    Args:
+        root (str, optional): The dataset directory. Defaults to "gitlab_dataset".
+        file_format (str, optional): The format of new parts, one of DATASET_FORMATS.
+            Defaults to default_dataset_format().
+
+    Raises:
+        ValueError: If the format is unknown or its library is not installed.
+    """
+
+    def __init__(self, root: str = DEFAULT_DATASET_PATH, file_format: str = None):
+        file_format = file_format or default_dataset_format()
+        if file_format not in DATASET_FORMATS:
+            raise ValueError(f"Invalid dataset format. Must be one of: {', '.join(DATASET_FORMATS)}.")
+        if file_format == 'parquet' and pyarrow is None:
+            raise ValueError("The parquet format needs pyarrow (pip install pyarrow).")
+        if file_format == 'ndjson.zst' and zstandard is None:
+            raise ValueError("The ndjson.zst format needs zstandard (pip install zstandard).")
+        self.root = root
+        self.file_format = file_format
+
+    def _year_dir(self, item_type: str, year: int) -> str:
+        items_path(item_type)  # Raises ValueError for an unknown item type
+        return os.path.join(self.root, item_type, f"year={year}")
+
+    def _month_dir(self, item_type: str, year: int, month: int) -> str:
+        return os.path.join(self._year_dir(item_type, year), f"month={month:02d}")
+
+    def parts(self, item_type: str, year: int, month: int = None) -> list:
+        """
+        Returns the part files of a year (or of one month), oldest write first.
+        """
+        months = [month] if month else range(1, 13)
+        extensions = tuple('.' + file_format for file_format in DATASET_FORMATS)
+        paths = []
+        for month in months:
+            month_dir = self._month_dir(item_type, year, month)
+            if os.path.isdir(month_dir):
+                paths += [os.path.join(month_dir, name) for name in os.listdir(month_dir)
+                          if name.startswith('part-') and name.endswith(extensions)]
+        # Part names start with their write time, so the name order is the write order
+        return sorted(paths, key=os.path.basename)
+
+    def _write_part(self, item_type: str, year: int, month: int, rows: list) -> str:
+        """
+        Writes (raw_json, item) rows as a new part file of one month and returns its path.
+        """
+        month_dir = self._month_dir(item_type, year, month)
+        os.makedirs(month_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(month_dir, f"part-{stamp}-{uuid.uuid4().hex[:8]}.{self.file_format}")
+        # Written under a temporary name, so readers never see a half-written part
+        temporary_path = path + '.tmp'
+        if self.file_format == 'parquet':
+            getters = [_field_getter(field) for field in DATASET_FIELDS]
+            columns = {_field_name(field): [] for field in DATASET_FIELDS}
+            columns['data'] = []
+            for raw, item in rows:
+                for field, get in zip(DATASET_FIELDS, getters):
+                    value = get(item)
+                    columns[_field_name(field)].append(_parse_timestamp(value) if field in _TIMESTAMP_FIELDS
+                                                       else value)
+                columns['data'].append(raw)
+            table = pyarrow.table(columns, schema=_parquet_schema())
+            pyarrow.parquet.write_table(table, temporary_path, compression='zstd')
+        else:
+            data = ndjson_lines([raw for raw, _ in rows]).encode('utf-8')
+            with open(temporary_path, 'wb') as f:
+                if self.file_format == 'ndjson.zst':
+                    f.write(zstandard.ZstdCompressor(level=6).compress(data))
+                else:
+                    f.write(gzip.compress(data, compresslevel=6))
+        os.replace(temporary_path, path)
+        return path
+
+    @staticmethod
+    def _read_part(path: str) -> list:
+        """
+        Returns the full item JSON texts stored in one part file.
+        """
+        if path.endswith('.parquet'):
+            if pyarrow is None:
+                raise ValueError(f"Reading {path} needs pyarrow (pip install pyarrow).")
+            return pyarrow.parquet.read_table(path, columns=['data']).column('data').to_pylist()
+        with open(path, 'rb') as f:
+            data = f.read()
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raise ValueError(f"Reading {path} needs zstandard (pip install zstandard).")
+            data = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+        else:
+            data = gzip.decompress(data)
+        # Not splitlines(): JSON strings may hold unescaped line separators such as U+2028
+        return [line for line in data.decode('utf-8').split('\n') if line]
+
+    def write_items(self, item_type: str, rows) -> list:
+        """
+        Appends items to the dataset, one new part per month they were created in
+        (more when a month has over DEFAULT_PART_ROWS items).
+
+        Args:
+            item_type (str): 'mr' or 'issues'.
+            rows (iterable): (raw_json, item) pairs: the item's JSON text as received and its dict.
+            If it raises, the rows it gave so far are written before the error propagates.
+
+        Returns:
+            list: The paths of the part files written.
+        """
+        buffers = {}
+        written = []
+        try:
+            for raw, item in rows:
+                created_at = normalize_timestamp(item['created_at'])
+                key = (int(created_at[:4]), int(created_at[5:7]))
+                buffer = buffers.setdefault(key, [])
+                buffer.append((raw, item))
+                if len(buffer) >= DEFAULT_PART_ROWS:
+                    written.append(self._write_part(item_type, *key, buffer))
+                    buffers[key] = []
+        finally:
+            # Rows read before rows raised (e.g. a deadline) are still written
+            for (year, month), buffer in sorted(buffers.items()):
+                if buffer:
+                    written.append(self._write_part(item_type, year, month, buffer))
+        return written
+
+    def read_items(self, item_type: str, year: int, month: int = None) -> list:
+        """
+        Returns the items of a year (or of one month), the latest written copy of each id,
+        ordered by creation time.
+        """
+        latest = {}
+        for path in self.parts(item_type, year, month):
+            for raw in self._read_part(path):
+                item = json.loads(raw)
+                latest[item['id']] = item
+        return sorted(latest.values(), key=lambda item: (normalize_timestamp(item['created_at']), item['id']))
+
+    def read_table(self, item_type: str, year: int, month: int = None, columns: list = None):
+        """
+        Returns the Parquet parts of a year (or of one month) as one pyarrow Table, keeping
+        the latest written row of each id.
+
+        Args:
+            item_type (str): 'mr' or 'issues'.
+            year (int): The year the items were created in.
+            month (int, optional): Only this month (1-12).
+            columns (list, optional): The columns to read, e.g. ['id', 'state', 'created_at'].
+                Defaults to every column.
+
+        Raises:
+            ValueError: If pyarrow is not installed.
+        """
+        if pyarrow is None:
+            raise ValueError("read_table needs pyarrow (pip install pyarrow).")
+        schema = _parquet_schema()
+        if columns:
+            schema = pyarrow.schema([schema.field(name) for name in dict.fromkeys(['id'] + list(columns))])
+        paths = [path for path in self.parts(item_type, year, month) if path.endswith('.parquet')]
+        if not paths:
+            return schema.empty_table()
+        table = pyarrow.concat_tables(pyarrow.parquet.read_table(path, columns=schema.names) for path in paths)
+        # The last occurrence of an id is its most recent copy
+        last_row = {item_id: row for row, item_id in enumerate(table.column('id').to_pylist())}
+        if len(last_row) < table.num_rows:
+            table = table.take(sorted(last_row.values()))
+        return table.select(columns) if columns else table
+
+    def compact(self, item_type: str, year: int) -> int:
+        """
+        Rewrites every month of a year as a single part without the superseded copies.
+
+        Returns:
+            int: The number of items kept.
+        """
+        kept = 0
+        for month in range(1, 13):
+            old_parts = self.parts(item_type, year, month)
+            if len(old_parts) < 2:
+                continue
+            items = self.read_items(item_type, year, month)
+            self._write_part(item_type, year, month, [(json.dumps(item), item) for item in items])
+            for path in old_parts:
+                os.remove(path)
+            kept += len(items)
+        return kept
+
+    def _watermark_path(self, item_type: str, year: int) -> str:
+        return os.path.join(self._year_dir(item_type, year), '_watermark')
+
+    def get_watermark(self, item_type: str, year: int):
+        """
+        Returns the newest 'updated_at' exported for (item_type, year), or None if never exported.
+        """
+        try:
+            with open(self._watermark_path(item_type, year), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_watermark(self, item_type: str, year: int, updated_at: str):
+        os.makedirs(self._year_dir(item_type, year), exist_ok=True)
+        path = self._watermark_path(item_type, year)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(updated_at)
+        os.replace(path + '.tmp', path)
+
+
+_default_dataset = None
+_default_dataset_lock = threading.Lock()
+
+
+def get_default_dataset() -> ItemDataset:
+    """
+    Returns the process-wide ItemDataset, at GITLAB_DATASET_PATH (defaults to gitlab_dataset),
+    writing new parts in GITLAB_DATASET_FORMAT (defaults to the best format installed).
+    """
+    global _default_dataset
+    with _default_dataset_lock:
+        if _default_dataset is None:
+            _default_dataset = ItemDataset(os.getenv("GITLAB_DATASET_PATH", DEFAULT_DATASET_PATH))
+        return _default_dataset
+
+
+def export_dataset_by_year(item_type: str, year: int, client: GitLabClient = None, dataset: ItemDataset = None,
+                           incremental: bool = True, per_page: int = DEFAULT_PER_PAGE,
+                           deadline: Deadline = None) -> int:
+    """
+    Exports the issues or merge requests created in a year into the local dataset.
+
+    An incremental export only asks GitLab for the items updated after the year's
+    watermark ('updated_after') and appends them; readers then use the new copies.
+    A full export appends the whole year and, once it has finished, removes the parts
+    that were there before. The watermark only moves when every page was written, and
+    never past the start of the export (see sync_watermark).
+
+    Args:
+        item_type (str): The type of items to export ('mr' for merge requests, 'issues' for issues).
+        year (int): The year the items were created in.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        dataset (ItemDataset, optional): The dataset to write to. Defaults to the shared dataset.
+        incremental (bool, optional): Only fetch what changed since the last export. Defaults to True.
+        per_page (int, optional): Page size. Defaults to 100.
+        deadline (Deadline, optional): The time budget of the export. The pages fetched before it
+            runs out are still written. Defaults to None.
+
+    Returns:
+        int: The number of items written by this export.
+
+    Raises:
+        ValueError: If the item type is invalid.
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    path = items_path(item_type)
+    client = client or get_default_client()
+    dataset = dataset or get_default_dataset()
+
+    started = datetime.now(timezone.utc)
+    watermark = dataset.get_watermark(item_type, year) if incremental else None
+    params = year_params(year)
+    if watermark:
+        params['updated_after'] = watermark
+    previous_parts = [] if incremental else dataset.parts(item_type, year)
+
+    count = 0
+    newest = watermark
+
+    def rows():
+        nonlocal count, newest
+        for response in iter_page_responses(client, path, params, per_page=per_page, deadline=deadline):
+            # The JSON text of each item is stored as received; the page is parsed once, for the
+            # indexed fields and the watermark
+            for raw, item in parse_json_array(response.content):
+                count += 1
+                if item.get('updated_at'):
+                    updated_at = normalize_timestamp(item['updated_at'])
+                    if newest is None or updated_at > newest:
+                        newest = updated_at
+                yield raw, item
+
+    dataset.write_items(item_type, rows())
+
+    for part in previous_parts:
+        os.remove(part)
+    if newest and newest != watermark:
+        newest = sync_watermark(newest, started)
+        if watermark is None or newest > watermark:
+            dataset.set_watermark(item_type, year, newest)
+    return count
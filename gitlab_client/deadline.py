@@ -0,0 +1,97 @@
+import os
+import time
+
+import requests
+
+# Seconds one operation (all pages of a year, all steps of a grant) may take, 0 for no limit
+DEFAULT_OPERATION_TIMEOUT = float(os.getenv("GITLAB_OPERATION_TIMEOUT", 0))
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised when an operation runs out of its deadline budget.
+
+    It is a requests Timeout, so callers that only handle request errors still stop
+    cleanly. Operations that collect items attach what they had so far in partial.
+
+    Args:
+        seconds (float): The budget that ran out.
+        partial (list, optional): The results gathered before the deadline. Defaults to None.
+    """
+
+    def __init__(self, seconds: float, partial: list = None):
+        super().__init__(f"Deadline of {seconds:g}s exceeded")
+        self.seconds = seconds
+        self.partial = partial
+
+
+class Deadline:
+    """
+    A time budget shared by every request of one operation.
+
+    The client checks it before each attempt, shortens the read timeout to what is
+    left of it and does not sleep (rate limit, retry backoff) past it.
+
+    Args:
+        seconds (float): The budget, counted from now.
+        timer (callable, optional): Monotonic clock. Defaults to time.monotonic.
+    """
+
+    def __init__(self, seconds: float, timer=time.monotonic):
+        self.seconds = seconds
+        self.timer = timer
+        self.expires_at = timer() + seconds
+
+    def remaining(self) -> float:
+        """
+        Returns the seconds left (0 once expired).
+        """
+        return max(0.0, self.expires_at - self.timer())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self):
+        """
+        Raises DeadlineExceeded if the budget is spent.
+        """
+        if self.expired():
+            raise DeadlineExceeded(self.seconds)
+
+    def timeout(self, timeout):
+        """
+        Returns a requests timeout ((connect, read) tuple or number) capped to the time left.
+
+        Raises:
+            DeadlineExceeded: If the budget is spent.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(self.seconds)
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def sleep(self, seconds: float):
+        """
+        Sleeps, unless the sleep would outlast the budget.
+
+        Raises:
+            DeadlineExceeded: If the budget ends before the sleep would.
+        """
+        if seconds >= self.remaining():
+            raise DeadlineExceeded(self.seconds)
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+def operation_deadline(seconds: float = None):
+    """
+    Returns a Deadline for a new operation, or None when no budget is configured.
+
+    Args:
+        seconds (float, optional): The budget. Defaults to GITLAB_OPERATION_TIMEOUT.
+    """
+    if seconds is None:
+        seconds = DEFAULT_OPERATION_TIMEOUT
+    return Deadline(seconds) if seconds and seconds > 0 else None
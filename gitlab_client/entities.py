@@ -0,0 +1,219 @@
+import os
+import re
+import threading
+from urllib.parse import quote
+
+from .cache import TTLCache
+from .client import GitLabClient, _cache_scope
+from .deadline import Deadline
+from .pagination import iter_pages
+
+# API paths of the entity types that members can be added to
+ENTITY_PATHS = {
+    'project': 'projects',
+    'group': 'groups',
+}
+
+# Fields of a project / group that identify it, from the most to the least specific.
+# Full paths are unique on an instance, names and short paths only within a namespace.
+UNIQUE_KEYS = {
+    'project': ('path_with_namespace', 'name_with_namespace'),
+    'group': ('full_path', 'full_name'),
+}
+SHORT_KEYS = ('name', 'path')
+
+# Query parameters of the bulk listing that preloads the index: only what the token is a member of
+PRELOAD_PARAMS = {
+    'project': {'membership': 'true', 'simple': 'true'},
+    'group': {'min_access_level': 10},
+}
+
+# Bounds of the entity index: a project or group takes up to four names (full path, full name, name, path)
+ENTITY_INDEX_SIZE = int(os.getenv("GITLAB_ENTITY_INDEX_SIZE", 16384))
+ENTITY_INDEX_TTL = float(os.getenv("GITLAB_ENTITY_INDEX_TTL", 300))
+
+# A GitLab full path: segments of letters, digits, '_', '-' and '.', separated by '/'
+_PATH = re.compile(r'[\w.-]+(/[\w.-]+)*')
+
+_AMBIGUOUS = object()
+
+
+class EntityIndex:
+    """
+    A local name -> id index of GitLab projects and groups, per GitLab instance and token.
+
+    Every project or group seen by a lookup is added under its full path and full name,
+    which are unique, and under its short name and path. A short name shared by several
+    entities is marked ambiguous and never answered from the index. The names are kept in
+    a TTLCache, so the index is bounded and forgets projects and groups that were renamed
+    or deleted.
+
+    Args:
+        maxsize (int, optional): Maximum number of indexed names. Defaults to ENTITY_INDEX_SIZE.
+        ttl (float, optional): Seconds a name stays indexed. Defaults to ENTITY_INDEX_TTL.
+    """
+
+    def __init__(self, maxsize: int = None, ttl: float = None):
+        self._ids = TTLCache(maxsize=maxsize or ENTITY_INDEX_SIZE, ttl=ENTITY_INDEX_TTL if ttl is None else ttl)
+        # Serializes the read-modify-write of the short names in add()
+        self._lock = threading.Lock()
+
+    def add(self, scope, entity_type: str, entity: dict):
+        """
+        Indexes one project or group (a dict as returned by the GitLab API).
+        """
+        entity_id = entity['id']
+        with self._lock:
+            for field in UNIQUE_KEYS[entity_type]:
+                if entity.get(field):
+                    self._ids.set((scope, entity_type, entity[field]), entity_id)
+            for field in SHORT_KEYS:
+                if entity.get(field):
+                    key = (scope, entity_type, entity[field])
+                    known = self._ids.peek(key, entity_id)
+                    self._ids.set(key, entity_id if known == entity_id else _AMBIGUOUS)
+
+    def get(self, scope, entity_type: str, entity_name: str):
+        """
+        Returns the id indexed under entity_name, or None if it is unknown, expired or ambiguous.
+        """
+        entity_id = self._ids.get((scope, entity_type, entity_name))
+        return None if entity_id is _AMBIGUOUS else entity_id
+
+    def discard(self, scope, entity_type: str, entity_name: str):
+        """
+        Forgets entity_name, e.g. after GitLab answered 404 for its id.
+        """
+        self._ids.invalidate((scope, entity_type, entity_name))
+
+    def clear(self):
+        self._ids.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the underlying TTLCache.
+        """
+        return self._ids.stats()
+
+    def __len__(self):
+        return len(self._ids)
+
+
+# Shared by every lookup of the process
+entity_index = EntityIndex()
+
+
+def preload_entity_index(client: GitLabClient, entity_types: tuple = ('project', 'group'),
+                         deadline: Deadline = None) -> int:
+    """
+    Fills the entity index from one listing of the projects and groups the token is a member of.
+
+    After the preload, names and full paths of those entities resolve without any request.
+
+    Args:
+        client (GitLabClient): The client used for the listing.
+        entity_types (tuple, optional): The entity types to list. Defaults to projects and groups.
+        deadline (Deadline, optional): The time budget of the whole listing. Defaults to None.
+
+    Returns:
+        int: The number of projects and groups indexed.
+
+    Raises:
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    scope = _cache_scope(client)
+    count = 0
+    for entity_type in entity_types:
+        for page in iter_pages(client, ENTITY_PATHS[entity_type], PRELOAD_PARAMS[entity_type], deadline=deadline):
+            for entity in page:
+                entity_index.add(scope, entity_type, entity)
+            count += len(page)
+    return count
+
+
+def direct_lookup_path(entity_name: str, entity_type: str):
+    """
+    Returns the API path that fetches the entity directly (by id or URL-encoded full path),
+    or None when the name can only be found by searching.
+
+    A project path always contains its namespace ('group/project'), while a top-level
+    group's full path has no slash. Names that cannot be a path, such as full names with
+    spaces ('Group / Project'), are never tried directly, as GitLab would only answer 404.
+    """
+    if entity_name.isdigit():
+        return f"{ENTITY_PATHS[entity_type]}/{entity_name}"
+    if _PATH.fullmatch(entity_name) and ('/' in entity_name or entity_type == 'group'):
+        return f"{ENTITY_PATHS[entity_type]}/{quote(entity_name, safe='')}"
+    return None
+
+
+def search_params(entity_name: str, entity_type: str) -> dict:
+    """
+    Returns the query parameters of the search fallback.
+
+    A project name with a slash ('Group / Project') is searched with search_namespaces,
+    so it can match on the namespace as well.
+    """
+    params = {'search': entity_name}
+    if entity_type == 'project':
+        params['simple'] = 'true'
+        if '/' in entity_name:
+            params['search_namespaces'] = 'true'
+    return params
+
+
+def matches(entity: dict, entity_name: str, entity_type: str) -> bool:
+    """
+    Tells whether a project or group is exactly the one called entity_name.
+    """
+    if str(entity['id']) == entity_name:
+        return True
+    return any(entity.get(field) == entity_name for field in UNIQUE_KEYS[entity_type] + SHORT_KEYS)
+
+
+def lookup_entity_id(client: GitLabClient, entity_name: str, entity_type: str = "project",
+                     deadline: Deadline = None):
+    """
+    Finds the id of a GitLab project or group, without the lookup cache.
+
+    The local index is used first. Then a numeric id or a full path ('group/project') is
+    fetched directly, which is one exact request. Other names are searched, following
+    every page of the results until an exact match by name, path or full path is found.
+    Every project or group seen on the way is added to the index.
+
+    Args:
+        client (GitLabClient): The client used for the lookup.
+        entity_name (str): The id, full path, name or full name of the project or group.
+        entity_type (str, optional): 'project' or 'group'. Defaults to "project".
+        deadline (Deadline, optional): The time budget of the calling operation. Defaults to None.
+
+    Returns:
+        int: The project/group id, or None if no exact match was found.
+
+    Raises:
+        requests.exceptions.RequestException: If a lookup request fails.
+    """
+    scope = _cache_scope(client)
+    entity_id = entity_index.get(scope, entity_type, entity_name)
+    if entity_id is not None:
+        return entity_id
+
+    path = direct_lookup_path(entity_name, entity_type)
+    if path:
+        response = client.get(path, deadline=deadline)
+        if response.status_code == 200:
+            entity = response.json()
+            entity_index.add(scope, entity_type, entity)
+            return entity['id']
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    # Offset paging: the search results are usually a page or two
+    for page in iter_pages(client, ENTITY_PATHS[entity_type], search_params(entity_name, entity_type),
+                           keyset=False, deadline=deadline):
+        for entity in page:
+            entity_index.add(scope, entity_type, entity)
+        entity = next((e for e in page if matches(e, entity_name, entity_type)), None)
+        if entity:
+            return entity['id']
+    return None
@@ -0,0 +1,230 @@
+import json
+import re
+from collections import namedtuple
+
+from .client import GitLabClient
+from .deadline import Deadline
+from .items import iter_raw_pages_by_year
+from .pagination import DEFAULT_PER_PAGE
+
+# 'ndjson': one item per line, 'json': one JSON array holding every item
+EXPORT_FORMATS = ('ndjson', 'json')
+
+# What an export wrote; items is None for 'json', whose pages are copied without being split into items
+ExportStats = namedtuple('ExportStats', ['pages', 'items', 'bytes'])
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# A JSON string, escapes included (possessive, so the regex engine never backtracks through it)
+_STRING = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+
+# The next bracket outside of strings: everything before it (strings, commas, numbers) is skipped by the regex engine
+_NEXT_BRACKET = re.compile(rb'[^"\[\]{}]*+(?:' + _STRING + rb'[^"\[\]{}]*+)*+([\[\]{}])', re.DOTALL)
+
+# Every string, bracket and comma, for the arrays whose items are not all objects or arrays.
+# A quote that does not start a whole string is matched on its own, as an error
+_TOKEN = re.compile(_STRING + rb'|[\[\]{},"]', re.DOTALL)
+
+
+def _split_tokens(body: bytes) -> list:
+    """
+    Splits a stripped JSON array into its raw items, looking at every string, bracket and comma.
+    """
+    items = []
+    depth = 0
+    start = 1
+    for match in _TOKEN.finditer(body):
+        token = match.group()
+        if token == b'"':
+            raise ValueError(f"Unterminated string at position {match.start()} of a JSON array")
+        if token in (b'[', b'{'):
+            depth += 1
+        elif token in (b']', b'}'):
+            depth -= 1
+            if depth == 0:
+                if match.end() != len(body):
+                    raise ValueError(f"Unexpected data after the JSON array at position {match.end()}")
+                item = body[start:match.start()].strip()
+                if item:
+                    items.append(item)
+                elif items:
+                    raise ValueError(f"Trailing comma at position {match.start()} of a JSON array")
+                return items
+        elif token == b',' and depth == 1:
+            item = body[start:match.start()].strip()
+            if not item:
+                raise ValueError(f"Empty item at position {match.start()} of a JSON array")
+            items.append(item)
+            start = match.end()
+    raise ValueError("Unterminated JSON array")
+
+
+def split_json_array(body: bytes) -> list:
+    """
+    Splits the raw body of a list page ('[{...},{...}]') into the raw JSON bytes of each item.
+
+    The items are found by tracking the bracket depth outside of strings, so they are
+    neither decoded nor parsed: each one is a slice of the body, as it was received.
+    For an array of objects (every GitLab list page) only the brackets are visited.
+
+    Raises:
+        ValueError: If the body is not a JSON array.
+    """
+    body = body.strip()
+    if body[:1] != b'[':
+        raise ValueError("Expected a JSON array")
+    items = []
+    depth = 1
+    position = 1
+    item_start = None
+    separator = b''
+    while True:
+        match = _NEXT_BRACKET.match(body, position)
+        if match is None:
+            return _split_tokens(body)
+        bracket = match.start(1)
+        position = match.end()
+        if body[bracket] in b'[{':
+            if depth == 1:
+                # Only a comma (none before the first item) may come between two items
+                if body[item_start or 1:bracket].strip() != separator:
+                    return _split_tokens(body)
+                item_start = bracket
+                separator = b','
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1:
+                items.append(body[item_start:position])
+                item_start = position
+            elif depth == 0:
+                if body[item_start or 1:bracket].strip() or body[bracket:] != b']':
+                    return _split_tokens(body)
+                return items
+
+
+def parse_json_array(body: bytes) -> list:
+    """
+    Parses the raw body of a list page into (raw JSON text, item) pairs, in a single pass.
+
+    For callers that store every item as it was received but also read some of its
+    fields: each item is decoded once by the C scanner of the json module, and its
+    text is cut from the positions that scanner reports.
+
+    Raises:
+        ValueError: If the body is not a JSON array.
+    """
+    text = body.decode('utf-8')
+    index = _WHITESPACE.match(text).end()
+    if text[index:index + 1] != '[':
+        raise ValueError("Expected a JSON array")
+    index = _WHITESPACE.match(text, index + 1).end()
+    pairs = []
+    if text[index:index + 1] == ']':
+        return pairs
+    while True:
+        item, end = _decoder.raw_decode(text, index)
+        pairs.append((text[index:end], item))
+        index = _WHITESPACE.match(text, end).end()
+        separator = text[index:index + 1]
+        if separator == ']':
+            return pairs
+        if separator != ',':
+            raise ValueError(f"Unexpected {separator!r} at position {index} of a JSON array")
+        index = _WHITESPACE.match(text, index + 1).end()
+
+
+def ndjson_lines(items: list):
+    """
+    Joins the raw JSON texts of a non-empty list of items (all bytes or all str) as NDJSON, one item per line.
+
+    A line break can only be whitespace between tokens, never inside a JSON string, so the
+    line breaks of pretty-printed items are replaced by spaces.
+    """
+    newline, carriage_return, space = (b'\n', b'\r', b' ') if isinstance(items[0], bytes) else ('\n', '\r', ' ')
+    lines = newline.join(items)
+    if lines.count(newline) != len(items) - 1 or carriage_return in lines:
+        lines = newline.join(item.replace(carriage_return, space).replace(newline, space) for item in items)
+    return lines + newline
+
+
+def page_lines(body: bytes):
+    """
+    Returns the raw body of a list page as NDJSON (bytes, one item per line) and the item count.
+    """
+    items = split_json_array(body)
+    if not items:
+        return b'', 0
+    return ndjson_lines(items), len(items)
+
+
+def page_elements(body: bytes) -> bytes:
+    """
+    Returns the raw body of a list page without its enclosing brackets: the comma-separated items.
+    """
+    return body.strip()[1:-1].strip()
+
+
+def export_items_by_year(item_type: str, year: int, out, client: GitLabClient = None,
+                         output_format: str = 'ndjson', per_page: int = DEFAULT_PER_PAGE, keyset: bool = True,
+                         deadline: Deadline = None) -> ExportStats:
+    """
+    Writes the issues or merge requests created in a year to a binary file, page by page,
+    without turning the items into Python objects.
+
+    Pagination only reads the response headers. In 'json' format the body of every page is
+    copied as is into one JSON array; in 'ndjson' format each page is split into its items
+    (which are written as they were received, one per line). Only one page is held at a time.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        out: A binary file object, e.g. open(path, 'wb') or sys.stdout.buffer.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        output_format (str, optional): 'ndjson' or 'json'. Defaults to 'ndjson'.
+        per_page (int, optional): Page size. Defaults to 100.
+        keyset (bool, optional): Try keyset pagination first where supported. Defaults to True.
+        deadline (Deadline, optional): The time budget of the whole export. Defaults to None.
+
+    Returns:
+        ExportStats: The pages, items (None in 'json' format) and bytes written.
+
+    Raises:
+        ValueError: If the item type or the output format is invalid.
+        DeadlineExceeded: If the deadline runs out; the pages written so far are complete,
+            and a 'json' export is still closed into a valid array.
+        requests.exceptions.RequestException: If a page request fails (same as above).
+    """
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid output format. Must be one of: {', '.join(EXPORT_FORMATS)}.")
+    pages = iter_raw_pages_by_year(item_type, year, client, per_page=per_page, keyset=keyset, deadline=deadline)
+
+    page_count = 0
+    item_count = 0
+    written = 0
+    if output_format == 'ndjson':
+        for body in pages:
+            lines, count = page_lines(body)
+            out.write(lines)
+            page_count += 1
+            item_count += count
+            written += len(lines)
+        return ExportStats(page_count, item_count, written)
+
+    out.write(b'[')
+    written += 1
+    try:
+        for body in pages:
+            elements = page_elements(body)
+            if not elements:
+                continue
+            chunk = elements if page_count == 0 else b',' + elements
+            out.write(chunk)
+            page_count += 1
+            written += len(chunk)
+    finally:
+        # Close the array even when the export stops early, so the file stays valid JSON
+        out.write(b']\n')
+        written += 2
+    return ExportStats(page_count, None, written)
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+from .database import connect
+
+# Response cache settings: GITLAB_HTTP_CACHE is 'memory' (default), 'sqlite' or 'off'
+DEFAULT_HTTP_CACHE_MAX_MB = 64
+DEFAULT_HTTP_CACHE_PATH = "gitlab_http_cache.db"
+
+# What is cached (GITLAB_HTTP_CACHE_SCOPE): 'lookups' (default) only keeps the user, project, group and
+# membership lookups; 'all' also keeps the pages of list endpoints (issues, merge requests, ...)
+CACHE_SCOPES = ('lookups', 'all')
+DEFAULT_HTTP_CACHE_SCOPE = 'lookups'
+_LOOKUP_COLLECTIONS = ('users', 'projects', 'groups')
+_LIST_PARAMS = ('page', 'per_page', 'pagination')
+
+# Response headers that describe the transfer, not the body, so they are not replayed from the cache
+_TRANSFER_HEADERS = {'content-length', 'content-encoding', 'transfer-encoding', 'connection', 'keep-alive', 'date'}
+
+# One cached GET response: its validators, the headers worth replaying (pagination, content type) and the body
+CachedResponse = namedtuple('CachedResponse', ['etag', 'last_modified', 'headers', 'content'])
+
+
+def cache_key(token: str, url: str) -> str:
+    """
+    Returns the cache key of a GET: the full URL (query included) scoped to a hash of the token,
+    since two tokens may see different bodies for the same URL.
+    """
+    scope = hashlib.sha256((token or '').encode()).hexdigest()[:16]
+    return f"{scope} {url}"
+
+
+def is_lookup_url(url: str) -> bool:
+    """
+    Tells whether a GET URL looks up a user, project, group or membership, rather than
+    reading a page of a list: paginated requests and the other endpoints are not lookups.
+    """
+    parts = urlsplit(url)
+    path = parts.path.split('/api/v4/', 1)[-1].strip('/')
+    if path.split('/', 1)[0] not in _LOOKUP_COLLECTIONS:
+        return False
+    return not any(name in _LIST_PARAMS for name in parse_qs(parts.query))
+
+
+def cacheable_headers(headers) -> dict:
+    return {name: value for name, value in headers.items() if name.lower() not in _TRANSFER_HEADERS}
+
+
+class MemoryResponseCache:
+    """
+    An in-memory LRU cache of GET responses, bounded by the total size of the bodies.
+
+    Args:
+        max_bytes (int, optional): Maximum total size of the cached bodies. Defaults to 64 MB.
+        scope (str, optional): 'lookups' or 'all' (see CACHE_SCOPES). Defaults to 'lookups'.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_HTTP_CACHE_MAX_MB * 1024 * 1024,
+                 scope: str = DEFAULT_HTTP_CACHE_SCOPE):
+        self.max_bytes = max_bytes
+        self.scope = scope
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """
+        Returns the CachedResponse stored under key, or None.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        """
+        Stores a response, evicting the least recently used ones until the bodies fit in max_bytes.
+        """
+        if len(entry.content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.content)
+            self._data[key] = entry
+            self.size += len(entry.content)
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted.content)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._data), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+_RESPONSE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+
+class SQLiteResponseCache:
+    """
+    An on-disk LRU cache of GET responses in a SQLite file, shared by the processes using it
+    and kept between runs, bounded by the total size of the bodies.
+
+    Args:
+        path (str, optional): The SQLite database file. Defaults to "gitlab_http_cache.db".
+        max_bytes (int, optional): Maximum total size of the cached bodies. Defaults to 64 MB.
+        scope (str, optional): 'lookups' or 'all' (see CACHE_SCOPES). Defaults to 'lookups'.
+    """
+
+    def __init__(self, path: str = DEFAULT_HTTP_CACHE_PATH,
+                 max_bytes: int = DEFAULT_HTTP_CACHE_MAX_MB * 1024 * 1024, scope: str = DEFAULT_HTTP_CACHE_SCOPE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.scope = scope
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Guards the counters; the database has its own locking
+        self._lock = threading.Lock()
+        with connect(self.path) as connection:
+            connection.executescript(_RESPONSE_SCHEMA)
+
+    def get(self, key: str):
+        """
+        Returns the CachedResponse stored under key, or None.
+        """
+        with connect(self.path) as connection:
+            row = connection.execute("SELECT etag, last_modified, headers, content FROM responses WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is not None:
+                connection.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedResponse(row[0], row[1], json.loads(row[2]), bytes(row[3]))
+
+    def set(self, key: str, entry: CachedResponse):
+        """
+        Stores a response, evicting the least recently used ones until the bodies fit in max_bytes.
+        """
+        if len(entry.content) > self.max_bytes:
+            return
+        with connect(self.path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, headers, content, size, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.etag, entry.last_modified, json.dumps(entry.headers), entry.content, len(entry.content),
+                 time.time()))
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = 0
+                oldest_first = connection.execute("SELECT key, size FROM responses ORDER BY used_at").fetchall()
+                for old_key, size in oldest_first:
+                    if total <= self.max_bytes:
+                        break
+                    connection.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= size
+                    evicted += 1
+                with self._lock:
+                    self.evictions += evicted
+
+    def clear(self):
+        with connect(self.path) as connection:
+            connection.execute("DELETE FROM responses")
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with connect(self.path) as connection:
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+_default_response_cache = None
+_default_response_cache_lock = threading.Lock()
+
+
+def get_default_response_cache():
+    """
+    Returns the process-wide response cache of the shared clients, or None when it is disabled.
+
+    GITLAB_HTTP_CACHE selects the backend: 'memory' (default), 'sqlite' (file at
+    GITLAB_HTTP_CACHE_PATH, defaults to gitlab_http_cache.db) or 'off'.
+    GITLAB_HTTP_CACHE_MAX_MB bounds the cached bodies (defaults to 64).
+    GITLAB_HTTP_CACHE_SCOPE is 'lookups' (default: users, projects, groups and members,
+    never the pages of a list) or 'all', so the big year listings and exports are only
+    kept in the cache when asked for.
+
+    Raises:
+        ValueError: If GITLAB_HTTP_CACHE_SCOPE is not one of CACHE_SCOPES.
+    """
+    global _default_response_cache
+    backend = os.getenv("GITLAB_HTTP_CACHE", "memory").lower()
+    if backend in ('off', 'none', '0', ''):
+        return None
+    with _default_response_cache_lock:
+        if _default_response_cache is None:
+            max_bytes = int(float(os.getenv("GITLAB_HTTP_CACHE_MAX_MB", DEFAULT_HTTP_CACHE_MAX_MB)) * 1024 * 1024)
+            scope = os.getenv("GITLAB_HTTP_CACHE_SCOPE", DEFAULT_HTTP_CACHE_SCOPE).lower()
+            if scope not in CACHE_SCOPES:
+                raise ValueError(f"Invalid GITLAB_HTTP_CACHE_SCOPE. Must be one of: {', '.join(CACHE_SCOPES)}.")
+            if backend == 'sqlite':
+                _default_response_cache = SQLiteResponseCache(
+                    os.getenv("GITLAB_HTTP_CACHE_PATH", DEFAULT_HTTP_CACHE_PATH), max_bytes, scope)
+            else:
+                _default_response_cache = MemoryResponseCache(max_bytes, scope)
+        return _default_response_cache
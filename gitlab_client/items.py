@@ -0,0 +1,128 @@
+from datetime import datetime, timezone
+
+from .client import GitLabClient, get_default_client
+from .deadline import Deadline
+from .pagination import DEFAULT_PER_PAGE, iter_page_responses, iter_pages
+from .projection import project_items
+from .timeslice import window_params
+
+# API paths of the item types accepted by get_items_by_year
+ITEM_PATHS = {
+    'issues': 'issues',
+    'mr': 'merge_requests',
+}
+
+
+def items_path(item_type: str) -> str:
+    """
+    Returns the API path for an item type ('mr' or 'issues').
+
+    Raises:
+        ValueError: If the item type is not 'mr' or 'issues'.
+    """
+    if item_type not in ITEM_PATHS:
+        raise ValueError("Invalid item_type. Must be 'mr' or 'issues'.")
+    return ITEM_PATHS[item_type]
+
+
+def year_params(year: int) -> dict:
+    """
+    Returns the created_after/created_before filters covering one calendar year.
+
+    The year is the half-open window [Jan 1, next Jan 1) of window_params(), so an item
+    created exactly at midnight on New Year's Day only belongs to the new year.
+    """
+    return window_params(datetime(year, 1, 1, tzinfo=timezone.utc), datetime(year + 1, 1, 1, tzinfo=timezone.utc))
+
+
+def iter_item_pages_by_year(item_type: str, year: int, client: GitLabClient = None,
+                            per_page: int = DEFAULT_PER_PAGE, keyset: bool = True, fields: tuple = None,
+                            deadline: Deadline = None):
+    """
+    Yields GitLab issues or merge requests created in a given year, one page (list) at a time.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        per_page (int, optional): Page size. Defaults to 100.
+        keyset (bool, optional): Try keyset pagination first where supported. Defaults to True.
+        fields (tuple, optional): If given, each page is projected to ItemRecords holding
+            only these fields before it is yielded. Defaults to None (full dicts).
+        deadline (Deadline, optional): The time budget of the whole iteration. Defaults to None.
+
+    Yields:
+        list: The items of one page.
+
+    Raises:
+        ValueError: If the item type is invalid.
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    path = items_path(item_type)
+    if client is None:
+        client = get_default_client()
+    for page_items in iter_pages(client, path, year_params(year), per_page=per_page, keyset=keyset,
+                                 deadline=deadline):
+        yield project_items(page_items, fields) if fields else page_items
+
+
+def iter_raw_pages_by_year(item_type: str, year: int, client: GitLabClient = None,
+                           per_page: int = DEFAULT_PER_PAGE, keyset: bool = True, deadline: Deadline = None):
+    """
+    Yields the raw body (bytes, a JSON array) of every page of the issues or merge requests
+    created in a given year, without parsing the items.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        per_page (int, optional): Page size. Defaults to 100.
+        keyset (bool, optional): Try keyset pagination first where supported. Defaults to True.
+        deadline (Deadline, optional): The time budget of the whole iteration. Defaults to None.
+
+    Yields:
+        bytes: The JSON body of one page.
+
+    Raises:
+        ValueError: If the item type is invalid.
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    path = items_path(item_type)
+    if client is None:
+        client = get_default_client()
+    for response in iter_page_responses(client, path, year_params(year), per_page=per_page, keyset=keyset,
+                                        deadline=deadline):
+        yield response.content
+
+
+def iter_items_by_year(item_type: str, year: int, client: GitLabClient = None,
+                       per_page: int = DEFAULT_PER_PAGE, keyset: bool = True, fields: tuple = None,
+                       deadline: Deadline = None):
+    """
+    Yields GitLab issues or merge requests created in a given year, one item at a time.
+
+    Pages are requested lazily, so only the page being consumed is held in memory.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        per_page (int, optional): Page size. Defaults to 100.
+        keyset (bool, optional): Try keyset pagination first where supported. Defaults to True.
+        fields (tuple, optional): If given, items are yielded as ItemRecords holding only
+            these fields. Defaults to None (full dicts).
+        deadline (Deadline, optional): The time budget of the whole iteration. Defaults to None.
+
+    Yields:
+        dict: One issue or merge request (an ItemRecord when fields is given).
+
+    Raises:
+        ValueError: If the item type is invalid.
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    for page_items in iter_item_pages_by_year(item_type, year, client, per_page=per_page, keyset=keyset,
+                                              fields=fields, deadline=deadline):
+        yield from page_items
@@ -0,0 +1,335 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import get_default_client
+from .database import connect
+from .items import items_path, year_params
+from .pagination import DEFAULT_MAX_WORKERS, DEFAULT_PER_PAGE, fetch_pages_concurrently
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_DB_PATH = "gitlab_jobs.db"
+KEEP_FINISHED_JOBS = 100  # Finished jobs (and their results) kept by the thread backend
+# Total size of the JSON-encoded results the thread backend keeps in memory
+KEEP_RESULT_BYTES = int(os.getenv("GITLAB_JOB_RESULT_BYTES", 64 * 1024 * 1024))
+# Seconds a running job of the SQLite backend may go without a progress update before its worker is
+# considered dead and the job is queued again, and the number of times a job is started before it fails
+JOB_LEASE = float(os.getenv("GITLAB_JOB_LEASE", 600))
+MAX_JOB_ATTEMPTS = int(os.getenv("GITLAB_JOB_MAX_ATTEMPTS", 3))
+
+_JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    total_pages INTEGER,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+# Columns of the job status dictionaries (everything but the result)
+_JOB_FIELDS = ('id', 'kind', 'params', 'status', 'pages_done', 'total_pages', 'error',
+               'created_at', 'started_at', 'finished_at')
+
+
+def export_job(progress, item_type: str, year: int, fields: list = None, max_workers: int = DEFAULT_MAX_WORKERS):
+    """
+    Job handler: fetches every issue or merge request created in a year.
+
+    Args:
+        progress (callable): Called as progress(pages_done, total_pages) after every page.
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        fields (list, optional): Only keep these fields of every item. Defaults to None (full dicts).
+        max_workers (int, optional): Maximum number of pages fetched at the same time. Defaults to 8.
+
+    Returns:
+        list: The items, in page order.
+    """
+    # The token is never part of the job parameters (they may be written to the broker table)
+    client = get_default_client()
+    return fetch_pages_concurrently(client, items_path(item_type), year_params(year), per_page=DEFAULT_PER_PAGE,
+                                    max_workers=max_workers, fields=tuple(fields) if fields else None,
+                                    progress=progress)
+
+
+# Job kinds accepted by submit(), mapped to their handler
+JOB_HANDLERS = {
+    'items_by_year': export_job,
+}
+
+
+def _handler(kind: str):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'. Must be one of: {', '.join(JOB_HANDLERS)}")
+    return JOB_HANDLERS[kind]
+
+
+def _encode_result(result: list) -> str:
+    """
+    Encodes the items of a job result as JSON, item records as plain dictionaries.
+    """
+    return json.dumps([item._asdict() if hasattr(item, '_asdict') else item for item in result])
+
+
+def _run_job(kind: str, params: dict, update):
+    """
+    Runs a job handler, reporting its state through update(**changes).
+    """
+    update(status='running', started_at=time.time())
+    try:
+        result = _handler(kind)(lambda done, total: update(pages_done=done, total_pages=total), **params)
+    except Exception as e:
+        update(status='failed', error=str(e), finished_at=time.time())
+    else:
+        update(status='done', result=result, finished_at=time.time())
+
+
+class ThreadJobQueue:
+    """
+    Runs jobs on an in-process thread pool and keeps their state and results in memory.
+
+    Results are kept JSON-encoded, like in the SQLite backend, so their size is known: the
+    oldest finished jobs are dropped once there are more than keep_finished of them or their
+    results take more than keep_bytes. A job whose result alone is larger fails instead.
+
+    Args:
+        max_workers (int, optional): Maximum number of jobs running at the same time. Defaults to 2.
+        keep_finished (int, optional): Number of finished jobs kept before the oldest are
+            dropped. Defaults to 100.
+        keep_bytes (int, optional): Total size of the kept results. Defaults to KEEP_RESULT_BYTES.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS, keep_finished: int = KEEP_FINISHED_JOBS,
+                 keep_bytes: int = KEEP_RESULT_BYTES):
+        self.keep_finished = keep_finished
+        self.keep_bytes = keep_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='gitlab-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, **params) -> str:
+        """
+        Queues a job and returns its id.
+
+        Raises:
+            ValueError: If the job kind is unknown.
+        """
+        _handler(kind)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {'id': job_id, 'kind': kind, 'params': params, 'status': 'queued',
+                                  'pages_done': 0, 'total_pages': None, 'error': None, 'result': None,
+                                  'created_at': time.time(), 'started_at': None, 'finished_at': None}
+            self._prune()
+        self._executor.submit(_run_job, kind, params, lambda **changes: self._update(job_id, changes))
+        return job_id
+
+    def _update(self, job_id: str, changes: dict):
+        if 'result' in changes:
+            result = _encode_result(changes['result']).encode()
+            if len(result) > self.keep_bytes:
+                changes = dict(changes, status='failed', result=None,
+                               error=f"The result ({len(result)} bytes) is larger than the {self.keep_bytes} bytes "
+                                     f"kept in memory; set GITLAB_JOB_RESULT_BYTES or use the sqlite backend")
+            else:
+                changes = dict(changes, result=result)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(changes)
+                if job['status'] in ('done', 'failed'):
+                    self._prune()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('done', 'failed')]
+        kept_bytes = sum(len(self._jobs[job_id]['result'] or b'') for job_id in finished)
+        for count, job_id in enumerate(finished):
+            if len(finished) - count <= self.keep_finished and kept_bytes <= self.keep_bytes:
+                break
+            kept_bytes -= len(self._jobs[job_id]['result'] or b'')
+            del self._jobs[job_id]
+
+    def status(self, job_id: str):
+        """
+        Returns the state of a job (without its result), or None if the job is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return {field: job[field] for field in _JOB_FIELDS} if job is not None else None
+
+    def result(self, job_id: str):
+        """
+        Returns the result of a finished job, or None if it is unknown or not done.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            result = job['result'] if job is not None and job['status'] == 'done' else None
+        return json.loads(result) if result is not None else None
+
+
+class SQLiteJobQueue:
+    """
+    A local broker: jobs are queued in a SQLite table and run by worker processes.
+
+    The web app only inserts and reads rows, so a long export never runs in a web worker.
+    Start one or more workers with 'python job_worker.py'. Results are stored
+    as JSON in the table, so item records are saved as plain dictionaries.
+
+    A worker renews the lease of its job on every progress update. A running job whose
+    lease ran out (its worker was killed or lost) is queued again by the next claim, or
+    marked as failed once it has been started max_attempts times.
+
+    Args:
+        path (str, optional): The SQLite database file. Defaults to "gitlab_jobs.db".
+        lease (float, optional): Seconds a running job may go without an update. Defaults to 600.
+        max_attempts (int, optional): Number of times a job is started before it fails. Defaults to 3.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOB_DB_PATH, lease: float = JOB_LEASE,
+                 max_attempts: int = MAX_JOB_ATTEMPTS):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max(1, max_attempts)
+        with connect(self.path) as connection:
+            connection.executescript(_JOB_SCHEMA)
+
+    def submit(self, kind: str, **params) -> str:
+        """
+        Queues a job and returns its id.
+
+        Raises:
+            ValueError: If the job kind is unknown.
+        """
+        _handler(kind)
+        job_id = uuid.uuid4().hex
+        with connect(self.path) as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params), time.time()))
+        return job_id
+
+    def _update(self, job_id: str, attempt: int, changes: dict):
+        if 'result' in changes:
+            changes = dict(changes, result=_encode_result(changes['result']))
+        changes = dict(changes, heartbeat_at=time.time())
+        assignments = ', '.join(f"{column} = ?" for column in changes)
+        with connect(self.path) as connection:
+            # A worker whose job was claimed again by another one (its lease ran out) no longer writes to it
+            connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND attempts = ?",
+                               (*changes.values(), job_id, attempt))
+
+    def status(self, job_id: str):
+        """
+        Returns the state of a job (without its result), or None if the job is unknown.
+        """
+        with connect(self.path) as connection:
+            row = connection.execute(f"SELECT {', '.join(_JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_JOB_FIELDS, row))
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def result(self, job_id: str):
+        """
+        Returns the result of a finished job, or None if it is unknown or not done.
+        """
+        with connect(self.path) as connection:
+            row = connection.execute("SELECT result FROM jobs WHERE id = ? AND status = 'done'", (job_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _requeue_stale(self, connection):
+        """
+        Queues again (or fails, after max_attempts) the running jobs whose lease ran out.
+        """
+        now = time.time()
+        stale = "status = 'running' AND COALESCE(heartbeat_at, started_at) < ?"
+        connection.execute(
+            f"UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE {stale} AND attempts >= ?",
+            (f"The job was started {self.max_attempts} times and its worker stopped every time", now,
+             now - self.lease, self.max_attempts))
+        connection.execute(
+            f"UPDATE jobs SET status = 'queued', pages_done = 0, total_pages = NULL, started_at = NULL, "
+            f"heartbeat_at = NULL WHERE {stale}", (now - self.lease,))
+
+    def claim(self):
+        """
+        Marks the oldest queued job as running and returns (job_id, kind, params, attempt), or None.
+
+        The running jobs whose lease ran out are queued again first (see the class docstring).
+        """
+        with connect(self.path) as connection:
+            # BEGIN IMMEDIATE takes the write lock first, so two workers never claim the same job
+            connection.execute("BEGIN IMMEDIATE")
+            self._requeue_stale(connection)
+            row = connection.execute(
+                "SELECT id, kind, params, attempts FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            connection.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ?, attempts = ? WHERE id = ?",
+                (now, now, row[3] + 1, row[0]))
+        return row[0], row[1], json.loads(row[2]), row[3] + 1
+
+    def run_worker(self, poll_interval: float = 1.0, once: bool = False):
+        """
+        Runs queued jobs one after another, polling the table when it is empty.
+
+        Args:
+            poll_interval (float, optional): Seconds to wait when no job is queued. Defaults to 1.
+            once (bool, optional): Return as soon as the queue is empty. Defaults to False.
+        """
+        while True:
+            claimed = self.claim()
+            if claimed is None:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            job_id, kind, params, attempt = claimed
+            _run_job(kind, params, lambda **changes: self._update(job_id, attempt, changes))
+
+
+_default_job_queue = None
+_default_job_queue_lock = threading.Lock()
+
+
+def get_default_job_queue():
+    """
+    Returns the process-wide job queue, selected by GITLAB_JOB_BACKEND.
+
+    'thread' (default) runs the jobs on an in-process thread pool of GITLAB_JOB_WORKERS
+    threads. 'sqlite' queues them in the GITLAB_JOB_DB table, to be run by a separate
+    worker process started with 'python job_worker.py'.
+
+    Raises:
+        ValueError: If GITLAB_JOB_BACKEND is not 'thread' or 'sqlite'.
+    """
+    global _default_job_queue
+    with _default_job_queue_lock:
+        if _default_job_queue is None:
+            backend = os.getenv("GITLAB_JOB_BACKEND", "thread")
+            if backend == 'thread':
+                _default_job_queue = ThreadJobQueue(int(os.getenv("GITLAB_JOB_WORKERS", DEFAULT_JOB_WORKERS)))
+            elif backend == 'sqlite':
+                _default_job_queue = SQLiteJobQueue(os.getenv("GITLAB_JOB_DB", DEFAULT_JOB_DB_PATH))
+            else:
+                raise ValueError("Invalid GITLAB_JOB_BACKEND. Must be 'thread' or 'sqlite'.")
+        return _default_job_queue
+
@@ -0,0 +1,184 @@
+import os
+
+import requests
+
+from .cache import TTLCache
+from .client import GitLabClient, _cache_scope
+from .deadline import Deadline
+from .entities import ENTITY_PATHS, entity_index, lookup_entity_id
+from .metrics import record_grant
+
+# Maps the human-readable role names to the GitLab access levels
+ROLE_MAPPING = {
+    'Guest': 10,
+    'Reporter': 20,
+    'Developer': 30,
+    'Maintainer': 40,
+    'Owner': 50
+}
+
+LOOKUP_CACHE_SIZE = int(os.getenv("GITLAB_LOOKUP_CACHE_SIZE", 1024))
+LOOKUP_CACHE_TTL = float(os.getenv("GITLAB_LOOKUP_CACHE_TTL", 300))
+
+# username -> user id and (entity type, name) -> project/group id, keyed per GitLab instance and token
+user_id_cache = TTLCache(maxsize=LOOKUP_CACHE_SIZE, ttl=LOOKUP_CACHE_TTL)
+entity_id_cache = TTLCache(maxsize=LOOKUP_CACHE_SIZE, ttl=LOOKUP_CACHE_TTL)
+
+
+def resolve_user_id(client: GitLabClient, username: str, deadline: Deadline = None):
+    """
+    Returns the id of a GitLab user, using the lookup cache when possible.
+
+    Args:
+        client (GitLabClient): The client used for the lookup.
+        username (str): The username to resolve.
+        deadline (Deadline, optional): The time budget of the calling operation. Defaults to None.
+
+    Returns:
+        int: The user id, or None if no such user exists.
+
+    Raises:
+        requests.exceptions.RequestException: If the lookup request fails.
+    """
+    key = (_cache_scope(client), username)
+    user_id = user_id_cache.get(key)
+    if user_id is not None:
+        return user_id
+
+    user_response = client.get("users", params={'username': username}, deadline=deadline)
+    user_response.raise_for_status()
+    users = user_response.json()
+    if not users:
+        return None
+
+    user_id = users[0]['id']
+    user_id_cache.set(key, user_id)
+    return user_id
+
+
+def resolve_entity_id(client: GitLabClient, entity_name: str, entity_type: str = "project",
+                      deadline: Deadline = None):
+    """
+    Returns the id of a GitLab project or group, using the lookup cache when possible.
+
+    Cache misses go to lookup_entity_id(): the local entity index, then a direct request
+    by id or full path, then a paged search for an exact match.
+
+    Args:
+        client (GitLabClient): The client used for the lookup.
+        entity_name (str): The id, full path ('group/project') or name of the project or group.
+        entity_type (str, optional): 'project' or 'group'. Defaults to "project".
+        deadline (Deadline, optional): The time budget of the calling operation. Defaults to None.
+
+    Returns:
+        int: The project/group id, or None if no exact match was found.
+
+    Raises:
+        requests.exceptions.RequestException: If the lookup request fails.
+    """
+    key = (_cache_scope(client), entity_type, entity_name)
+    entity_id = entity_id_cache.get(key)
+    if entity_id is not None:
+        return entity_id
+
+    entity_id = lookup_entity_id(client, entity_name, entity_type, deadline)
+    if entity_id is None:
+        return None
+
+    entity_id_cache.set(key, entity_id)
+    return entity_id
+
+
+def invalidate_member_lookups(client: GitLabClient, username: str, entity_name: str, entity_type: str = "project"):
+    """
+    Drops the cached user and entity ids, e.g. after GitLab answered 404 for them.
+    """
+    scope = _cache_scope(client)
+    user_id_cache.invalidate((scope, username))
+    entity_id_cache.invalidate((scope, entity_type, entity_name))
+    entity_index.discard(scope, entity_type, entity_name)
+
+
+def lookup_cache_stats() -> dict:
+    """
+    Returns the hit/miss counters of the user and entity lookup caches and of the entity index.
+    """
+    return {'users': user_id_cache.stats(), 'entities': entity_id_cache.stats(), 'entity_index': entity_index.stats()}
+
+
+def set_member_role(client: GitLabClient, username: str, entity_name: str, role: str, entity_type: str = "project",
+                    deadline: Deadline = None):
+    """
+    Adds a user to a GitLab project or group, or updates their role if they are already a member.
+
+    The user and entity ids come from the lookup cache when possible. If GitLab answers
+    404 when adding the member, the cached ids are treated as stale: they are dropped
+    and the operation is retried once with fresh lookups.
+
+    Args:
+        client (GitLabClient): The client used for the requests.
+        username (str): The username of the user whose role is to be managed.
+        entity_name (str): The name (or id) of the project or group.
+        role (str): The role to assign to the user (e.g., 'Guest', 'Developer').
+        entity_type (str, optional): The type of the entity. Defaults to "project".
+        deadline (Deadline, optional): The time budget of all the steps together. Defaults to None.
+
+    Returns:
+        tuple: A tuple containing (success_boolean, message_string).
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out before the role is set.
+        requests.exceptions.RequestException: If an API request fails.
+    """
+    try:
+        success, message = _set_member_role(client, username, entity_name, role, entity_type, deadline)
+    except requests.exceptions.RequestException:
+        record_grant(entity_type, 'error')
+        raise
+    record_grant(entity_type, 'success' if success else 'failure')
+    return success, message
+
+
+def _set_member_role(client: GitLabClient, username: str, entity_name: str, role: str, entity_type: str,
+                     deadline: Deadline):
+    if role not in ROLE_MAPPING:
+        return False, f"Error: Invalid role '{role}'. Valid roles are: {', '.join(ROLE_MAPPING.keys())}"
+
+    if entity_type not in ENTITY_PATHS:
+        return False, "Error: Invalid entity_type. Must be 'project' or 'group'."
+
+    role_id = ROLE_MAPPING[role]
+
+    for attempt in range(2):
+        user_id = resolve_user_id(client, username, deadline)
+        if user_id is None:
+            return False, f"Error: User '{username}' not found."
+
+        entity_id = resolve_entity_id(client, entity_name, entity_type, deadline)
+        if entity_id is None:
+            return False, f"Error: {entity_type.capitalize()} '{entity_name}' not found."
+
+        add_member_url = f"{ENTITY_PATHS[entity_type]}/{entity_id}/members"
+        member_url = f"{add_member_url}/{user_id}"
+
+        # Check if the user is already a member
+        get_member_response = client.get(member_url, deadline=deadline)
+
+        if get_member_response.status_code == 200:
+            # User is a member, update their role
+            put_response = client.put(member_url, json={'access_level': role_id}, deadline=deadline)
+            put_response.raise_for_status()
+            return True, f"Successfully updated role of user '{username}' in {entity_type} '{entity_name}' to '{role}'."
+        elif get_member_response.status_code == 404:
+            # User is not a member, add them
+            post_response = client.post(add_member_url, json={'user_id': user_id, 'access_level': role_id},
+                                         deadline=deadline)
+            if post_response.status_code == 404 and attempt == 0:
+                # The project/group or user behind a cached id is gone: look them up again
+                invalidate_member_lookups(client, username, entity_name, entity_type)
+                continue
+            post_response.raise_for_status()
+            return True, f"Successfully added user '{username}' to {entity_type} '{entity_name}' with role '{role}'."
+        else:
+            # Handle other unexpected status codes
+            return False, f"Error managing member: {get_member_response.status_code} - {get_member_response.text}"
@@ -0,0 +1,269 @@
+import re
+import sys
+import threading
+from urllib.parse import urlsplit
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing value per combination of label values.
+
+    Args:
+        name (str): The metric name, e.g. 'gitlab_requests_total'.
+        documentation (str): The HELP text.
+        labelnames (tuple, optional): The label names. Defaults to no labels.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        Adds amount to the counter of the given label values.
+        """
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        Returns the current value for the given label values (0 if never incremented).
+        """
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Counts observations (e.g. latencies) into cumulative buckets, per combination of label values.
+
+    Args:
+        name (str): The metric name, e.g. 'gitlab_request_duration_seconds'.
+        documentation (str): The HELP text.
+        labelnames (tuple, optional): The label names. Defaults to no labels.
+        buckets (tuple, optional): Sorted bucket upper bounds. Defaults to DEFAULT_BUCKETS.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """
+        Records one observation for the given label values.
+        """
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    """
+    A set of metrics rendered together in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text format (version 0.0.4).
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """
+        Resets every metric (e.g. between benchmark runs).
+        """
+        for metric in self._metrics:
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    'gitlab_requests_total', "GitLab API responses (every attempt), by endpoint and status.",
+    ('method', 'endpoint', 'status')))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'gitlab_request_duration_seconds', "Time to receive a GitLab API response (every attempt).",
+    ('method', 'endpoint')))
+RESPONSE_BYTES = REGISTRY.register(Counter(
+    'gitlab_response_bytes_total', "Bytes of GitLab API response bodies received.",
+    ('method', 'endpoint')))
+RETRIES_TOTAL = REGISTRY.register(Counter(
+    'gitlab_request_retries_total', "GitLab API requests retried, by the status (or error) that caused it.",
+    ('method', 'endpoint', 'reason')))
+PAGES_FETCHED = REGISTRY.register(Counter(
+    'gitlab_pages_fetched_total', "Pages of GitLab list endpoints fetched.",
+    ('endpoint',)))
+GRANTS_TOTAL = REGISTRY.register(Counter(
+    'gitlab_grants_total', "Member role grants, by entity type and result (success, failure or error).",
+    ('entity_type', 'result')))
+CONDITIONAL_TOTAL = REGISTRY.register(Counter(
+    'gitlab_conditional_requests_total', "Cached GitLab GETs: stored, revalidated as not_modified (304) or modified.",
+    ('result',)))
+CONDITIONAL_BYTES_SAVED = REGISTRY.register(Counter(
+    'gitlab_conditional_bytes_saved_total', "Response bytes replayed from the cache after a 304."))
+APP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'app_request_duration_seconds', "Time spent serving a web request, GitLab calls included.",
+    ('method', 'route', 'status')))
+
+_ID_SEGMENT = re.compile(r'^\d+$|%2F', re.IGNORECASE)
+
+# The segment after these is an id or a (URL-encoded) path, e.g. groups/mygroup or projects/group%2Fproject
+_ENTITY_COLLECTIONS = {'projects', 'groups'}
+
+
+def endpoint_template(url: str) -> str:
+    """
+    Turns a request URL into a low-cardinality endpoint name, e.g.
+    'https://gitlab.com/api/v4/projects/42/members/7?x=1' -> 'projects/:id/members/:id'
+    and 'https://gitlab.com/api/v4/groups/mygroup' -> 'groups/:id'.
+    """
+    path = urlsplit(url).path
+    if '/api/v4/' in path:
+        path = path.split('/api/v4/', 1)[1]
+    segments = path.strip('/').split('/')
+    return '/'.join(':id' if _ID_SEGMENT.search(segment) or (index and segments[index - 1] in _ENTITY_COLLECTIONS)
+                    else segment for index, segment in enumerate(segments))
+
+
+def observe_request(method: str, url: str, status, seconds: float, size: int = 0):
+    """
+    Records one GitLab API attempt: its status ('error' for connection errors), latency and body size.
+    """
+    method = method.upper()
+    endpoint = endpoint_template(url)
+    REQUESTS_TOTAL.inc(method=method, endpoint=endpoint, status=status)
+    REQUEST_DURATION.observe(seconds, method=method, endpoint=endpoint)
+    if size:
+        RESPONSE_BYTES.inc(size, method=method, endpoint=endpoint)
+
+
+def observe_app_request(method: str, route: str, status, seconds: float):
+    """
+    Records the time spent serving one web request of the Flask app.
+    """
+    APP_REQUEST_DURATION.observe(seconds, method=method.upper(), route=route, status=status)
+
+
+def record_retry(method: str, url: str, reason):
+    """
+    Counts one retried GitLab API request.
+    """
+    RETRIES_TOTAL.inc(method=method.upper(), endpoint=endpoint_template(url), reason=reason)
+
+
+def record_conditional(result: str, saved: int = 0):
+    """
+    Counts one cached GET ('stored', 'not_modified' or 'modified') and the bytes a 304 saved.
+    """
+    CONDITIONAL_TOTAL.inc(result=result)
+    if saved:
+        CONDITIONAL_BYTES_SAVED.inc(saved)
+
+
+def record_page(url: str):
+    """
+    Counts one fetched page of a list endpoint.
+    """
+    PAGES_FETCHED.inc(endpoint=endpoint_template(url))
+
+
+def record_grant(entity_type: str, result: str):
+    """
+    Counts one member grant ('success', 'failure' or 'error').
+    """
+    GRANTS_TOTAL.inc(entity_type=entity_type, result=result)
+
+
+def render_metrics() -> str:
+    """
+    Returns all metrics in the Prometheus text format.
+    """
+    return REGISTRY.render()
+
+
+def dump_metrics(path: str = None):
+    """
+    Writes all metrics in the Prometheus text format to a file, or to stdout if path is None or '-'.
+    """
+    text = render_metrics()
+    if not path or path == '-':
+        sys.stdout.write(text)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
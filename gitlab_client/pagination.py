@@ -0,0 +1,256 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .client import GitLabClient
+from .deadline import Deadline, DeadlineExceeded
+from .metrics import record_page
+from .projection import project_items
+
+DEFAULT_PER_PAGE = 100  # Max allowed per page by GitLab API
+DEFAULT_MAX_WORKERS = 8
+
+# Query parameters that switch a GitLab list endpoint to keyset pagination
+KEYSET_PARAMS = {'pagination': 'keyset', 'order_by': 'id', 'sort': 'asc'}
+
+# The list endpoints GitLab documents keyset pagination ordered by id for; issues, merge requests
+# and the rest only offer offset pagination, so they are never asked for keyset pages
+KEYSET_PATHS = frozenset({'projects', 'users'})
+
+# (api_url, path) pairs for which GitLab refused keyset pagination, so later calls go straight to offset paging
+_keyset_unsupported = set()
+_keyset_unsupported_lock = threading.Lock()
+
+
+def _try_keyset(api_url: str, path: str, keyset: bool) -> bool:
+    """
+    Tells whether the first page of an endpoint should be requested with keyset pagination.
+    """
+    return keyset and path.strip('/') in KEYSET_PATHS and (api_url, path) not in _keyset_unsupported
+
+
+def _keyset_rejected(api_url: str, path: str, status_code: int, text: str) -> bool:
+    """
+    Tells whether GitLab refused keyset pagination for an endpoint, and if so remembers the endpoint.
+
+    GitLab answers 405 when keyset pagination is not available for a request. A 400 only
+    counts when its message is about the pagination, so an ordinary bad filter still fails.
+    """
+    if status_code != 405 and not (status_code == 400 and 'pagination' in text.lower()):
+        return False
+    with _keyset_unsupported_lock:
+        _keyset_unsupported.add((api_url, path))
+    return True
+
+
+def _total_pages(response, per_page: int):
+    """
+    Reads the number of pages from the GitLab pagination headers.
+
+    X-Total-Pages is used when present, otherwise it is computed from X-Total.
+    GitLab omits both headers for very large result sets, in which case None is returned.
+    """
+    total_pages_header = response.headers.get('X-Total-Pages')
+    if total_pages_header:
+        return int(total_pages_header)
+    total_header = response.headers.get('X-Total')
+    if total_header:
+        return max(1, -(-int(total_header) // per_page))
+    return None
+
+
+def fetch_pages_concurrently(client: GitLabClient, path: str, params: dict = None,
+                             per_page: int = DEFAULT_PER_PAGE, max_workers: int = DEFAULT_MAX_WORKERS,
+                             fields: tuple = None, progress=None, deadline: Deadline = None):
+    """
+    Fetches every page of a GitLab list endpoint, requesting pages 2..N in parallel.
+
+    Page 1 is requested first to read X-Total-Pages (or X-Total). The remaining pages
+    are then fetched through a bounded thread pool and joined back together in page
+    order. If GitLab does not send the total headers the pages are fetched one after
+    another until an empty or short page is returned.
+
+    Args:
+        client (GitLabClient): The client used to send the requests.
+        path (str): The API path, e.g. 'issues' or 'merge_requests'.
+        params (dict, optional): Extra query parameters (filters) sent with every page.
+        per_page (int, optional): Page size. Defaults to 100.
+        max_workers (int, optional): Maximum number of pages in flight. Defaults to 8.
+        fields (tuple, optional): If given, every page is projected to ItemRecords holding
+            only these fields as soon as it is parsed, and the full dicts are dropped.
+        progress (callable, optional): Called as progress(pages_done, total_pages) after every
+            page; total_pages is None when GitLab does not send the total headers.
+        deadline (Deadline, optional): The time budget of the whole fetch. Defaults to None.
+
+    Returns:
+        list: All items (dicts, or ItemRecords when fields is given), in page order.
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out; its partial attribute holds the items of
+            the pages received so far, in page order without gaps.
+        requests.exceptions.RequestException: If any page request fails.
+    """
+    params = dict(params or {})
+
+    def fetch_page(page):
+        response = client.get(path, params={**params, 'per_page': per_page, 'page': page}, deadline=deadline)
+        response.raise_for_status()
+        record_page(response.url)
+        return response
+
+    def page_items(response):
+        items = response.json()
+        return project_items(items, fields) if fields else items
+
+    items = []
+    try:
+        first_response = fetch_page(1)
+        items.extend(page_items(first_response))
+        total_pages = _total_pages(first_response, per_page)
+        if progress:
+            progress(1, total_pages)
+
+        if total_pages is None:
+            # No total headers: fall back to fetching the pages sequentially
+            page = 1
+            current_items = items
+            while len(current_items) == per_page:
+                page += 1
+                current_items = page_items(fetch_page(page))
+                items.extend(current_items)
+                if progress:
+                    progress(page, None)
+            return items
+
+        if total_pages > 1:
+            executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+            try:
+                # Each worker parses (and projects) its own page so only the kept items outlive the response
+                futures = [executor.submit(lambda page: page_items(fetch_page(page)), page)
+                           for page in range(2, total_pages + 1)]
+                pending = set(futures)
+                next_index = 0
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        # The first failed page is raised at once, the pages not started yet are cancelled below
+                        future.result()
+                    # Join the pages in page order: only the ones after a missing page wait in their futures
+                    while next_index < len(futures) and futures[next_index].done():
+                        items.extend(futures[next_index].result())
+                        next_index += 1
+                        if progress:
+                            progress(next_index + 1, total_pages)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+    except DeadlineExceeded as e:
+        e.partial = items
+        raise
+    return items
+
+
+def _next_page_url(response):
+    """
+    Returns the URL of the next page from the 'Link: <...>; rel="next"' header, or None.
+    """
+    return response.links.get('next', {}).get('url')
+
+
+def _is_empty_page(response) -> bool:
+    """
+    Tells whether a list page holds no items ('[]'), without parsing it.
+    """
+    return response.content.strip() in (b'', b'[]')
+
+
+def iter_page_responses(client: GitLabClient, path: str, params: dict = None,
+                        per_page: int = DEFAULT_PER_PAGE, keyset: bool = True, deadline: Deadline = None):
+    """
+    Yields the responses of the non-empty pages of a GitLab list endpoint, without parsing them.
+
+    Pagination is driven by the response headers only (see iter_pages). The body of a
+    page is only parsed when GitLab sends no pagination headers at all, to tell whether
+    the page was full.
+
+    Args:
+        client (GitLabClient): The client used to send the requests.
+        path (str): The API path, e.g. 'issues' or 'merge_requests'.
+        params (dict, optional): Extra query parameters (filters) for the first request.
+        per_page (int, optional): Page size. Defaults to 100.
+        keyset (bool, optional): Try keyset pagination first where supported. Defaults to True.
+        deadline (Deadline, optional): The time budget of the whole iteration. Defaults to None.
+
+    Yields:
+        requests.Response: One response per page, in order.
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out; the pages already yielded are complete.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    params = {**(params or {}), 'per_page': per_page}
+
+    response = None
+    if _try_keyset(client.api_url, path, keyset):
+        response = client.get(path, params={**params, **KEYSET_PARAMS}, deadline=deadline)
+        if _keyset_rejected(client.api_url, path, response.status_code, response.text):
+            response = None
+        else:
+            response.raise_for_status()
+
+    page = 1
+    offset_mode = response is None
+    if offset_mode:
+        response = client.get(path, params={**params, 'page': page}, deadline=deadline)
+        response.raise_for_status()
+
+    while True:
+        if _is_empty_page(response):
+            break
+        record_page(response.url)
+        yield response
+
+        next_url = _next_page_url(response)
+        if next_url:
+            response = client.get(next_url, deadline=deadline)
+        elif not offset_mode:
+            break  # The last keyset page has no rel="next" link
+        else:
+            next_page_header = response.headers.get('X-Next-Page')
+            if next_page_header:
+                page = int(next_page_header)
+            elif 'X-Page' not in response.headers and len(response.json()) == per_page:
+                # No pagination headers at all: keep asking for the next offset page
+                page += 1
+            else:
+                break
+            response = client.get(path, params={**params, 'page': page}, deadline=deadline)
+        response.raise_for_status()
+
+
+def iter_pages(client: GitLabClient, path: str, params: dict = None,
+               per_page: int = DEFAULT_PER_PAGE, keyset: bool = True, deadline: Deadline = None):
+    """
+    Yields the pages of a GitLab list endpoint one at a time, each page as a list of items.
+
+    On the endpoints that support it (KEYSET_PATHS) keyset pagination ('pagination=keyset')
+    is tried first and the 'Link: rel="next"' header is followed, so deep pages cost the
+    same as the first one. Other endpoints, and endpoints for which GitLab rejects keyset
+    pagination (405, or a 400 about the pagination), use offset pagination instead, following
+    the Link header, then X-Next-Page, then page+1 while full pages keep coming back.
+
+    Args:
+        client (GitLabClient): The client used to send the requests.
+        path (str): The API path, e.g. 'issues' or 'merge_requests'.
+        params (dict, optional): Extra query parameters (filters) for the first request.
+        per_page (int, optional): Page size. Defaults to 100.
+        keyset (bool, optional): Try keyset pagination first where supported. Defaults to True.
+        deadline (Deadline, optional): The time budget of the whole iteration. Defaults to None.
+
+    Yields:
+        list: The items of each page, in order.
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out; the pages already yielded are complete.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    for response in iter_page_responses(client, path, params, per_page=per_page, keyset=keyset, deadline=deadline):
+        yield response.json()
@@ -0,0 +1,67 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# The fields shown by the result pages (result.html / result_stream.html)
+RESULT_FIELDS = ('id', 'title', 'created_at', 'web_url')
+
+
+def _field_name(field: str) -> str:
+    """
+    Returns the record attribute name of a field: 'author.username' becomes 'author_username'.
+    """
+    return field.replace('.', '_')
+
+
+def _field_getter(field: str):
+    """
+    Returns a function reading a (possibly dotted) field from an item dict, None when missing.
+    """
+    if '.' not in field:
+        return lambda item: item.get(field)
+    keys = field.split('.')
+
+    def get(item):
+        for key in keys:
+            if not isinstance(item, dict):
+                return None
+            item = item.get(key)
+        return item
+    return get
+
+
+@lru_cache(maxsize=32)
+def record_type(fields: tuple = RESULT_FIELDS):
+    """
+    Returns the namedtuple class holding the given item fields.
+
+    Records have no per-instance __dict__, so each one costs a small fixed-size tuple
+    instead of the full GitLab JSON object. The class is cached per field tuple.
+
+    Args:
+        fields (tuple, optional): Item fields to keep. Nested values can be selected with
+            dotted paths, e.g. 'author.username'. Defaults to RESULT_FIELDS.
+
+    Returns:
+        type: A namedtuple class named ItemRecord.
+
+    Raises:
+        ValueError: If a field name is not a valid attribute name.
+    """
+    return namedtuple('ItemRecord', [_field_name(field) for field in fields])
+
+
+def project_items(items, fields: tuple = RESULT_FIELDS) -> list:
+    """
+    Converts item dicts into compact records holding only the given fields.
+
+    Args:
+        items (iterable): Item dicts, e.g. one page as returned by GitLab.
+        fields (tuple, optional): Item fields to keep. Defaults to RESULT_FIELDS.
+
+    Returns:
+        list: One ItemRecord per item, in the same order.
+    """
+    fields = tuple(fields)
+    make = record_type(fields)._make
+    getters = [_field_getter(field) for field in fields]
+    return [make([get(item) for get in getters]) for item in items]
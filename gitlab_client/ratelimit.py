@@ -0,0 +1,168 @@
+import email.utils
+import random
+import threading
+import time
+
+# Responses that are worth retrying. 5xx is only retried for idempotent methods,
+# a POST that failed with 502 may already have been applied by GitLab.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+
+
+class RateLimiter:
+    """
+    A token bucket that paces GitLab requests and follows the server's rate-limit headers.
+
+    Every request reserves one token. When the bucket is empty the caller is told how
+    long to wait instead of firing the request and getting a 429. The refill rate is
+    the configured rate, lowered when the RateLimit-Remaining/RateLimit-Reset headers
+    show that the remaining quota must be spread over the rest of the window. When the
+    quota is exhausted or GitLab sends Retry-After, all requests wait until it resets.
+
+    The limiter is thread-safe and only computes delays, so the same instance can be
+    used by the sync client (time.sleep) and the async client (asyncio.sleep).
+
+    Args:
+        rate (float, optional): Maximum requests per second, None for no fixed limit. Defaults to None.
+        burst (int, optional): Requests allowed back to back before pacing starts. Defaults to 10.
+        timer (callable, optional): Monotonic clock. Defaults to time.monotonic.
+    """
+
+    def __init__(self, rate: float = None, burst: int = 10, timer=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.timer = timer
+        self.server_rate = None
+        self.blocked_until = 0.0
+        self._tokens = float(burst)
+        self._last_refill = timer()
+        self._lock = threading.Lock()
+
+    def _effective_rate(self):
+        rates = [r for r in (self.rate, self.server_rate) if r is not None]
+        return min(rates) if rates else None
+
+    def reserve(self) -> float:
+        """
+        Takes one token and returns how many seconds the caller must wait before sending.
+        """
+        with self._lock:
+            now = self.timer()
+            wait = max(0.0, self.blocked_until - now)
+
+            rate = self._effective_rate()
+            if rate is None or rate <= 0:
+                return wait
+
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                # The bucket is in debt: this request gets the slot after the ones already waiting
+                wait = max(wait, -self._tokens / rate)
+            return wait
+
+    def acquire(self):
+        """
+        Blocks the current thread until a request may be sent.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def block_for(self, seconds: float):
+        """
+        Holds back every request for the given number of seconds (e.g. after a 429).
+        """
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, self.timer() + seconds)
+
+    def update_from_headers(self, headers):
+        """
+        Adjusts the pace from GitLab's RateLimit-Remaining and RateLimit-Reset headers.
+        """
+        remaining = headers.get('RateLimit-Remaining')
+        reset = headers.get('RateLimit-Reset')
+        if remaining is None or not reset:
+            return
+        try:
+            remaining = int(remaining)
+            window = float(reset) - time.time()  # RateLimit-Reset is a Unix timestamp
+        except ValueError:
+            return
+        if window <= 0:
+            self.server_rate = None
+        elif remaining <= 0:
+            self.block_for(window)
+        else:
+            # Spread what is left of the quota evenly over the rest of the window
+            self.server_rate = remaining / window
+
+
+def retry_after_seconds(headers):
+    """
+    Returns the delay requested by a Retry-After header (seconds or HTTP date), or None.
+    """
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP) -> float:
+    """
+    Exponential backoff with full jitter: a random delay between 0 and base * 2**attempt (capped).
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def should_retry(method: str, status_code: int) -> bool:
+    """
+    Tells whether a response status is worth retrying for the given HTTP method.
+    """
+    if status_code == 429:
+        return True
+    return status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS
+
+
+def retry_delay(response_headers, status_code: int, attempt: int, rate_limiter: RateLimiter = None) -> float:
+    """
+    Returns how long to wait before retrying, honouring Retry-After and pausing the limiter on a 429.
+    """
+    delay = retry_after_seconds(response_headers)
+    if delay is None:
+        delay = backoff_delay(attempt)
+    if status_code == 429 and rate_limiter is not None:
+        rate_limiter.block_for(delay)
+    return delay
+
+
+_shared_limiters = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def shared_rate_limiter(base_url: str, token: str, rate: float = None) -> RateLimiter:
+    """
+    Returns the RateLimiter shared by every client of the same GitLab instance and token.
+
+    GitLab counts the quota per user, so the sync and async clients, the Flask routes
+    and the CLI must all draw from the same bucket.
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get((base_url, token))
+        if limiter is None:
+            limiter = RateLimiter(rate=rate)
+            _shared_limiters[(base_url, token)] = limiter
+        elif rate is not None:
+            limiter.rate = rate
+        return limiter
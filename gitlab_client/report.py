@@ -0,0 +1,98 @@
+import csv
+
+from .client import GitLabClient, get_default_client
+from .deadline import Deadline, DeadlineExceeded
+from .items import items_path
+from .pagination import DEFAULT_MAX_WORKERS, DEFAULT_PER_PAGE
+from .store import normalize_timestamp
+from .timeslice import fetch_windows, merge_pages, time_windows
+
+SUMMARY_FIELDS = ['item_type', 'year', 'month', 'count']
+
+
+def _summarize(item_types: list, years: list, items: dict) -> list:
+    """
+    Counts the fetched items per (item_type, year, month), every month of every year included.
+    """
+    counts = {(item_type, year, month): 0 for item_type in item_types for year in years for month in range(1, 13)}
+    seen = set()
+    for (item_type, year), job_items in items.items():
+        for item in job_items:
+            # An item pushed onto the next offset page while a window was read comes back twice:
+            # count it once, in the month it was created in
+            if (item_type, item.id) in seen:
+                continue
+            seen.add((item_type, item.id))
+            created_at = normalize_timestamp(item.created_at)
+            key = (item_type, int(created_at[:4]), int(created_at[5:7]))
+            if key in counts:
+                counts[key] += 1
+    return [{'item_type': item_type, 'year': year, 'month': month, 'count': count}
+            for (item_type, year, month), count in sorted(counts.items())]
+
+
+def batch_report(item_types: list, years: list, client: GitLabClient = None, time_slice: str = 'month',
+                 per_page: int = DEFAULT_PER_PAGE, max_workers: int = DEFAULT_MAX_WORKERS, progress=None,
+                 deadline: Deadline = None) -> list:
+    """
+    Counts the issues and/or merge requests created per month over several years, in one run.
+
+    Every (item_type, year) crawl is split into time windows (see time_windows) and all
+    their pages are fetched by one thread pool through the same client (connection
+    pool), so at most max_workers requests are in flight for the whole report. Only
+    the id and creation time of the items are kept.
+
+    Args:
+        item_types (list): 'mr' and/or 'issues'.
+        years (list): The years to report on, e.g. range(2020, 2025).
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        time_slice (str, optional): 'month', 'week' or 'adaptive'. Defaults to 'month'.
+        per_page (int, optional): Page size. Defaults to 100.
+        max_workers (int, optional): Maximum number of pages in flight. Defaults to 8.
+        progress (callable, optional): Called as progress(pages_done, None) after every page.
+        deadline (Deadline, optional): The time budget of the whole report. Defaults to None.
+
+    Returns:
+        list: One dict per (item_type, year, month) with the keys of SUMMARY_FIELDS, sorted.
+
+    Raises:
+        ValueError: If an item type or the time slice is invalid.
+        DeadlineExceeded: If the deadline runs out; its partial attribute holds the counts of
+            the pages received so far.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    item_types = list(dict.fromkeys(item_types))
+    years = sorted(set(years))
+    client = client or get_default_client()
+    jobs = {(item_type, year): (items_path(item_type), time_windows(year, time_slice))
+            for item_type in item_types for year in years}
+
+    pages = {}
+    try:
+        fetch_windows(client, jobs, pages, adaptive=time_slice == 'adaptive', per_page=per_page,
+                      max_workers=max_workers, fields=('id', 'created_at'), progress=progress, deadline=deadline)
+    except DeadlineExceeded as e:
+        e.partial = _summarize(item_types, years, {key: merge_pages(job_pages) for key, job_pages in pages.items()})
+        raise
+    return _summarize(item_types, years, {key: merge_pages(job_pages) for key, job_pages in pages.items()})
+
+
+def summary_totals(rows: list) -> dict:
+    """
+    Returns the total count per (item_type, year) of batch_report rows.
+    """
+    totals = {}
+    for row in rows:
+        key = (row['item_type'], row['year'])
+        totals[key] = totals.get(key, 0) + row['count']
+    return totals
+
+
+def write_summary(rows: list, path: str):
+    """
+    Writes the rows of batch_report to a CSV file.
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
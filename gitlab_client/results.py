@@ -0,0 +1,114 @@
+import os
+import threading
+import uuid
+
+from .cache import TTLCache
+
+DEFAULT_RESULTS_PER_PAGE = 100
+MAX_RESULTS_PER_PAGE = 500
+
+# Result sets kept for the paginated results view (GITLAB_RESULT_CACHE_SIZE / GITLAB_RESULT_CACHE_TTL in .env)
+RESULT_CACHE_SIZE = int(os.getenv("GITLAB_RESULT_CACHE_SIZE", 32))
+RESULT_CACHE_TTL = float(os.getenv("GITLAB_RESULT_CACHE_TTL", 1800))
+
+_default_result_cache = None
+_default_result_cache_lock = threading.Lock()
+
+
+def paginate(items: list, page: int = 1, per_page: int = DEFAULT_RESULTS_PER_PAGE) -> dict:
+    """
+    Returns one page of a list together with the numbers needed to render page links.
+
+    Out-of-range pages are clamped to the first/last page.
+
+    Args:
+        items (list): The whole result set.
+        page (int, optional): The 1-based page number. Defaults to 1.
+        per_page (int, optional): Items per page, capped at 500. Defaults to 100.
+
+    Returns:
+        dict: With the keys 'items' (the slice), 'page', 'per_page', 'pages' and 'total'.
+    """
+    per_page = max(1, min(per_page, MAX_RESULTS_PER_PAGE))
+    total = len(items)
+    pages = max(1, -(-total // per_page))
+    page = max(1, min(page, pages))
+    start = (page - 1) * per_page
+    return {
+        'items': items[start:start + per_page],
+        'page': page,
+        'per_page': per_page,
+        'pages': pages,
+        'total': total,
+    }
+
+
+class ResultSetCache:
+    """
+    Keeps fetched result sets in memory under a random id so they can be shown page by page.
+
+    Entries are evicted least-recently-used first and expire after a time-to-live. The
+    cache lives in the process, so with several web server workers a result id is only
+    known to the worker that created it.
+
+    Args:
+        maxsize (int, optional): Maximum number of result sets. Defaults to 32.
+        ttl (float, optional): Seconds a result set is kept. Defaults to 1800.
+    """
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def add(self, items: list, result_id: str = None, **info) -> str:
+        """
+        Stores a result set and returns its id.
+
+        Args:
+            items (list): The items of the result set.
+            result_id (str, optional): The id to store it under (e.g. a job id). Defaults to a random id.
+            **info: Anything the results view needs besides the items (item_type, year, counts...).
+
+        Returns:
+            str: The result set id.
+        """
+        result_id = result_id or uuid.uuid4().hex
+        self._cache.set(result_id, dict(info, items=items))
+        return result_id
+
+    def get(self, result_id: str):
+        """
+        Returns the stored result set (a dict with 'items' and the extra info), or None if it expired.
+        """
+        return self._cache.get(result_id)
+
+    def page(self, result_id: str, page: int = 1, per_page: int = DEFAULT_RESULTS_PER_PAGE):
+        """
+        Returns one page of a stored result set, or None if it expired.
+
+        Returns:
+            dict: The extra info of the result set plus the keys returned by paginate().
+        """
+        result = self.get(result_id)
+        if result is None:
+            return None
+        return dict(result, **paginate(result['items'], page, per_page))
+
+    def __contains__(self, result_id):
+        return result_id in self._cache
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters as a dictionary.
+        """
+        return self._cache.stats()
+
+
+def get_default_result_cache() -> ResultSetCache:
+    """
+    Returns the result set cache shared by the whole process.
+    """
+    global _default_result_cache
+    with _default_result_cache_lock:
+        if _default_result_cache is None:
+            _default_result_cache = ResultSetCache()
+        return _default_result_cache
@@ -0,0 +1,174 @@
+import os
+import threading
+
+from .cache import TTLCache
+from .client import GitLabClient, _cache_scope, get_default_client
+from .deadline import Deadline, DeadlineExceeded
+from .items import items_path, iter_item_pages_by_year, year_params
+from .pagination import DEFAULT_MAX_WORKERS, DEFAULT_PER_PAGE, fetch_pages_concurrently
+from .timeslice import fetch_items_time_sliced
+
+# Seconds a finished year fetch is reused by later identical calls (GITLAB_ITEMS_CACHE_TTL, 0 disables it)
+ITEMS_CACHE_TTL = float(os.getenv("GITLAB_ITEMS_CACHE_TTL", 0))
+ITEMS_CACHE_SIZE = int(os.getenv("GITLAB_ITEMS_CACHE_SIZE", 16))
+
+_MISSING = object()
+
+
+class _Call:
+    """
+    One in-flight call: the callers that arrive while it runs wait on its event.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: only the first caller for a key runs the function,
+    the callers arriving while it runs wait for it and get the same result (or exception).
+
+    With a ttl, finished results are also kept for that many seconds, so identical calls
+    made shortly afterwards are answered without running the function again.
+
+    Args:
+        ttl (float, optional): Seconds a finished result is reused. Defaults to 0 (not kept).
+        maxsize (int, optional): Maximum number of kept results. Defaults to 16.
+    """
+
+    def __init__(self, ttl: float = 0, maxsize: int = 16):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl) if ttl > 0 else None
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Returns func(*args, **kwargs), sharing one execution between identical concurrent calls.
+
+        Args:
+            key: A hashable key identifying identical calls.
+            func (callable): The function to run.
+
+        Returns:
+            The function's result. The same object is returned to every caller sharing the
+            call, so it must not be modified.
+
+        Raises:
+            Exception: Whatever func raised, re-raised in every caller that shared the call.
+        """
+        if self._results is not None:
+            cached = self._results.get(key, _MISSING)
+            if cached is not _MISSING:
+                return cached
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            if self._results is not None:
+                self._results.set(key, call.result)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def forget(self, key):
+        """
+        Drops the kept result of key, so the next call runs the function again.
+        """
+        if self._results is not None:
+            self._results.invalidate(key)
+
+    def stats(self) -> dict:
+        """
+        Returns how many calls were executed and how many joined an in-flight call.
+        """
+        with self._lock:
+            stats = {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+        if self._results is not None:
+            stats['cache'] = self._results.stats()
+        return stats
+
+
+# Shared by every year fetch of the process
+items_flight = SingleFlight(ttl=ITEMS_CACHE_TTL, maxsize=ITEMS_CACHE_SIZE)
+
+
+def fetch_items_by_year(item_type: str, year: int, client: GitLabClient = None, concurrent: bool = True,
+                        max_workers: int = DEFAULT_MAX_WORKERS, per_page: int = DEFAULT_PER_PAGE,
+                        fields: tuple = None, time_slice: str = None, deadline: Deadline = None) -> list:
+    """
+    Returns every issue or merge request created in a year, coalescing identical concurrent calls.
+
+    Calls with the same item type, year, options and token scope (GitLab instance and
+    token) that overlap in time share one pagination run. The returned list is shared
+    between those callers and must not be modified. The run uses the deadline of the
+    caller that started it.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        concurrent (bool, optional): Fetch pages 2..N in parallel. Defaults to True.
+        max_workers (int, optional): Maximum number of pages in flight. Defaults to 8.
+        per_page (int, optional): Page size. Defaults to 100.
+        fields (tuple, optional): Only keep these fields, as ItemRecords. Defaults to None (full dicts).
+        time_slice (str, optional): Split the year into 'month', 'week' or 'adaptive' windows fetched
+            in parallel (see fetch_items_time_sliced). Defaults to None (one query for the year).
+        deadline (Deadline, optional): The time budget of the whole fetch. Defaults to None.
+
+    Returns:
+        list: The items, in page order (by window then page order when time sliced).
+
+    Raises:
+        ValueError: If the item type or time slice is invalid.
+        DeadlineExceeded: If the deadline runs out; its partial attribute holds the items
+            received so far, in page order.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    path = items_path(item_type)
+    if client is None:
+        client = get_default_client()
+    fields = tuple(fields) if fields else None
+    key = (item_type, year, concurrent, per_page, fields, time_slice or None, _cache_scope(client))
+
+    def fetch():
+        if time_slice:
+            return fetch_items_time_sliced(client, path, year, time_slice, per_page=per_page,
+                                           max_workers=max_workers, fields=fields, deadline=deadline)
+        if concurrent:
+            return fetch_pages_concurrently(client, path, year_params(year), per_page=per_page,
+                                            max_workers=max_workers, fields=fields, deadline=deadline)
+        items = []
+        try:
+            for page_items in iter_item_pages_by_year(item_type, year, client, per_page=per_page, fields=fields,
+                                                      deadline=deadline):
+                items.extend(page_items)
+        except DeadlineExceeded as e:
+            e.partial = items
+            raise
+        return items
+
+    return items_flight.do(key, fetch)
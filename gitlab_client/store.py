@@ -0,0 +1,282 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from .client import GitLabClient, get_default_client
+from .database import connect
+from .deadline import Deadline
+from .items import items_path, year_params
+from .pagination import DEFAULT_PER_PAGE, iter_pages
+
+DEFAULT_STORE_PATH = "gitlab_items.db"
+# Seconds a sync watermark is set before the start of the sync, for the clock skew with GitLab
+WATERMARK_OVERLAP = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (item_type, id)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    item_type TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (item_type, year)
+);
+"""
+
+# Columns extracted from the item JSON so they can be filtered and indexed (added to older stores on open)
+_INDEXED_COLUMNS = {
+    'state': ("TEXT", "json_extract(data, '$.state')"),
+    'project_id': ("INTEGER", "json_extract(data, '$.project_id')"),
+    'author': ("TEXT", "json_extract(data, '$.author.username')"),
+}
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_items_created_at ON items (item_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_items_state ON items (item_type, state, created_at);
+CREATE INDEX IF NOT EXISTS idx_items_project_id ON items (item_type, project_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_items_author ON items (item_type, author, created_at);
+"""
+
+# Groupings supported by ItemStore.count_items, as SQL expressions
+GROUP_BY_COLUMNS = {
+    'month': "substr(created_at, 1, 7)",
+    'state': "state",
+    'project_id': "project_id",
+    'author': "author",
+}
+
+
+def normalize_timestamp(value: str) -> str:
+    """
+    Converts a GitLab timestamp to UTC with a fixed format ('2024-05-01T10:00:00.000000Z'),
+    so timestamps from any instance compare correctly as strings.
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def sync_watermark(newest: str, started: datetime) -> str:
+    """
+    Returns the watermark to save after a sync that started at `started` and received items
+    updated up to `newest` (a normalized timestamp).
+
+    The pages are read in id order, so an item updated while the sync runs, after its page
+    was read, can have an updated_at below newest. The watermark is therefore never later
+    than the start of the sync (minus WATERMARK_OVERLAP), and such items are fetched again
+    by the next sync.
+    """
+    return min(newest, normalize_timestamp((started - timedelta(seconds=WATERMARK_OVERLAP)).isoformat()))
+
+
+class ItemStore:
+    """
+    A local SQLite index of fetched issues/merge requests and their sync watermarks.
+
+    Each item is kept as its GitLab JSON, keyed by (item_type, id), so re-fetching an
+    item simply replaces it. created_at, state, project_id and the author's username
+    are also stored in indexed columns, so reports by month, state, project or author
+    are answered locally. A watermark per (item_type, year) remembers the newest
+    'updated_at' seen, so the next sync only asks GitLab for what changed after it.
+
+    Args:
+        path (str, optional): The SQLite database file. Defaults to "gitlab_items.db".
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        with connect(self.path) as connection:
+            connection.executescript(_SCHEMA)
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(items)")}
+            for column, (column_type, expression) in _INDEXED_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE items ADD COLUMN {column} {column_type}")
+                    connection.execute(f"UPDATE items SET {column} = {expression}")
+            connection.executescript(_INDEXES)
+
+    def upsert_items(self, item_type: str, items: list):
+        """
+        Inserts the items, replacing the stored copy of any item that is already there.
+        """
+        rows = [(item_type, item['id'], normalize_timestamp(item['created_at']),
+                 normalize_timestamp(item['updated_at']) if item.get('updated_at') else None,
+                 item.get('state'), item.get('project_id'), (item.get('author') or {}).get('username'),
+                 json.dumps(item))
+                for item in items]
+        with connect(self.path) as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO items (item_type, id, created_at, updated_at, state, project_id, author, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+
+    @staticmethod
+    def _where(item_type: str, year: int = None, month: int = None, state: str = None,
+               project_id: int = None, author: str = None):
+        """
+        Builds the WHERE clause and its parameters for the supported filters.
+        """
+        clauses = ["item_type = ?"]
+        values = [item_type]
+        if year is not None:
+            if month is not None:
+                start = f"{year}-{month:02d}-01T00:00:00Z"
+                end = f"{year + month // 12}-{month % 12 + 1:02d}-01T00:00:00Z"
+            else:
+                start, end = f"{year}-01-01T00:00:00Z", f"{year + 1}-01-01T00:00:00Z"
+            clauses.append("created_at >= ? AND created_at < ?")
+            values += [normalize_timestamp(start), normalize_timestamp(end)]
+        for column, value in (('state', state), ('project_id', project_id), ('author', author)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                values.append(value)
+        return " AND ".join(clauses), values
+
+    def query_items(self, item_type: str, year: int = None, month: int = None, state: str = None,
+                    project_id: int = None, author: str = None, limit: int = None):
+        """
+        Yields the stored items matching the filters, oldest first.
+
+        Args:
+            item_type (str): 'mr' or 'issues'.
+            year (int, optional): Only items created in this year.
+            month (int, optional): Only items created in this month (1-12) of the year.
+            state (str, optional): e.g. 'opened', 'closed', 'merged'.
+            project_id (int, optional): Only items of this project.
+            author (str, optional): Only items created by this username.
+            limit (int, optional): Maximum number of items.
+
+        Yields:
+            dict: One issue or merge request, as returned by GitLab.
+        """
+        where, values = self._where(item_type, year, month, state, project_id, author)
+        sql = f"SELECT data FROM items WHERE {where} ORDER BY created_at, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            values.append(limit)
+        with connect(self.path) as connection:
+            for (data,) in connection.execute(sql, values):
+                yield json.loads(data)
+
+    def iter_items(self, item_type: str, year: int):
+        """
+        Yields the stored items of one type created in the given year, oldest first.
+        """
+        return self.query_items(item_type, year)
+
+    def count_items(self, item_type: str, group_by: str = 'month', year: int = None, month: int = None,
+                    state: str = None, project_id: int = None, author: str = None):
+        """
+        Counts the stored items matching the filters, grouped by month, state, project_id or author.
+
+        Returns:
+            list: (group_value, count) tuples, sorted by group value.
+
+        Raises:
+            ValueError: If group_by is not supported.
+        """
+        if group_by not in GROUP_BY_COLUMNS:
+            raise ValueError(f"Invalid group_by. Must be one of: {', '.join(GROUP_BY_COLUMNS)}")
+        expression = GROUP_BY_COLUMNS[group_by]
+        where, values = self._where(item_type, year, month, state, project_id, author)
+        with connect(self.path) as connection:
+            return connection.execute(
+                f"SELECT {expression} AS grp, COUNT(*) FROM items WHERE {where} GROUP BY grp ORDER BY grp",
+                values).fetchall()
+
+    def get_watermark(self, item_type: str, year: int):
+        """
+        Returns the newest 'updated_at' synced for (item_type, year), or None if never synced.
+        """
+        with connect(self.path) as connection:
+            row = connection.execute("SELECT updated_at FROM watermarks WHERE item_type = ? AND year = ?",
+                                     (item_type, year)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, item_type: str, year: int, updated_at: str):
+        """
+        Stores the high-water mark of (item_type, year).
+        """
+        synced_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        with connect(self.path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO watermarks (item_type, year, updated_at, synced_at) VALUES (?, ?, ?, ?)",
+                (item_type, year, updated_at, synced_at))
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> ItemStore:
+    """
+    Returns the process-wide ItemStore, at GITLAB_STORE_PATH (defaults to gitlab_items.db).
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ItemStore(os.getenv("GITLAB_STORE_PATH", DEFAULT_STORE_PATH))
+        return _default_store
+
+
+def sync_items_by_year(item_type: str, year: int, client: GitLabClient = None, store: ItemStore = None,
+                       per_page: int = DEFAULT_PER_PAGE, deadline: Deadline = None) -> int:
+    """
+    Brings the local store up to date for the issues or merge requests created in a year.
+
+    Only items updated after the stored watermark are requested ('updated_after'), and
+    they are merged into the store page by page. The watermark moves forward only once
+    every page has been stored, so an interrupted sync is simply repeated next time, and
+    never past the start of the sync (see sync_watermark).
+
+    Args:
+        item_type (str): The type of items to sync ('mr' for merge requests, 'issues' for issues).
+        year (int): The year the items were created in.
+        client (GitLabClient, optional): The client to use. Defaults to the shared client.
+        store (ItemStore, optional): The store to update. Defaults to the shared store.
+        per_page (int, optional): Page size. Defaults to 100.
+        deadline (Deadline, optional): The time budget of the sync. The pages stored before it
+            runs out are kept, but the watermark is not moved. Defaults to None.
+
+    Returns:
+        int: The number of items fetched from GitLab by this sync.
+
+    Raises:
+        ValueError: If the item type is invalid.
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If a page request fails.
+    """
+    path = items_path(item_type)
+    client = client or get_default_client()
+    store = store or get_default_store()
+
+    started = datetime.now(timezone.utc)
+    watermark = store.get_watermark(item_type, year)
+    params = year_params(year)
+    if watermark:
+        params['updated_after'] = watermark
+
+    fetched = 0
+    newest = watermark
+    for page_items in iter_pages(client, path, params, per_page=per_page, deadline=deadline):
+        store.upsert_items(item_type, page_items)
+        fetched += len(page_items)
+        for item in page_items:
+            if item.get('updated_at'):
+                updated_at = normalize_timestamp(item['updated_at'])
+                if newest is None or updated_at > newest:
+                    newest = updated_at
+
+    if newest and newest != watermark:
+        newest = sync_watermark(newest, started)
+        if watermark is None or newest > watermark:
+            store.set_watermark(item_type, year, newest)
+    return fetched
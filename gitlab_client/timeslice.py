@@ -0,0 +1,208 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from .client import GitLabClient
+from .deadline import Deadline, DeadlineExceeded
+from .metrics import record_page
+from .pagination import DEFAULT_MAX_WORKERS, DEFAULT_PER_PAGE, _total_pages
+from .projection import project_items
+
+# How a year is split into windows: 'month', 'week' or 'adaptive' (GITLAB_TIME_SLICE, empty for one query per year)
+TIME_SLICES = ('month', 'week', 'adaptive')
+DEFAULT_TIME_SLICE = os.getenv("GITLAB_TIME_SLICE", "")
+
+# Adaptive mode bisects a window while it has more pages than this, down to MIN_WINDOW
+DEFAULT_MAX_WINDOW_PAGES = int(os.getenv("GITLAB_MAX_WINDOW_PAGES", 10))
+MIN_WINDOW = timedelta(hours=1)
+
+
+def time_windows(year: int, time_slice: str = 'month') -> list:
+    """
+    Splits a calendar year into consecutive [start, end) windows of UTC datetimes.
+
+    'month' gives 12 windows, 'week' gives 7-day windows (the last one is shorter).
+    'adaptive' starts from the months; fetch_windows bisects the crowded ones.
+
+    Raises:
+        ValueError: If the time slice is not one of TIME_SLICES.
+    """
+    if time_slice not in TIME_SLICES:
+        raise ValueError(f"Invalid time slice. Must be one of: {', '.join(TIME_SLICES)}.")
+    year_start = datetime(year, 1, 1, tzinfo=timezone.utc)
+    year_end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    if time_slice == 'week':
+        starts = []
+        start = year_start
+        while start < year_end:
+            starts.append(start)
+            start += timedelta(weeks=1)
+    else:
+        starts = [datetime(year, month, 1, tzinfo=timezone.utc) for month in range(1, 13)]
+    return list(zip(starts, starts[1:] + [year_end]))
+
+
+def window_params(start: datetime, end: datetime) -> dict:
+    """
+    Returns the created_after/created_before filters of the half-open window [start, end).
+
+    GitLab keeps both bounds (created_at >= created_after and <= created_before) and stores
+    timestamps to the microsecond, so created_before is the last microsecond before end:
+    consecutive windows never return the same item.
+    """
+    return {'created_after': start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'created_before': (end - timedelta(microseconds=1)).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}
+
+
+def _bisect(window: tuple):
+    """
+    Returns the two halves of a window, split on a whole second.
+    """
+    start, end = window
+    middle = start + timedelta(seconds=(end - start) // timedelta(seconds=1) // 2)
+    return (start, middle), (middle, end)
+
+
+def merge_pages(pages: dict) -> list:
+    """
+    Joins the pages of one fetch_windows job in window then page order, keeping the first copy of every id.
+
+    The windows do not overlap, but offset pages are read while items are being created,
+    so an item can be pushed from one page onto the next and be returned twice.
+    """
+    seen = set()
+    items = []
+    for key in sorted(pages):
+        ids, page_items = pages[key]
+        for item_id, item in zip(ids, page_items):
+            if item_id not in seen:
+                seen.add(item_id)
+                items.append(item)
+    return items
+
+
+def fetch_windows(client: GitLabClient, jobs: dict, pages: dict, adaptive: bool = False,
+                  per_page: int = DEFAULT_PER_PAGE, max_workers: int = DEFAULT_MAX_WORKERS, fields: tuple = None,
+                  max_window_pages: int = DEFAULT_MAX_WINDOW_PAGES, progress=None, deadline: Deadline = None):
+    """
+    Paginates the time windows of one or more fetches on a single bounded thread pool.
+
+    The first page of every window of every job is requested at once, and each first
+    page queues the other pages of its window, so all the jobs share the same
+    max_workers requests in flight. In adaptive mode a window with more than
+    max_window_pages pages (or no total headers) is split in two halves instead,
+    down to MIN_WINDOW.
+
+    Args:
+        client (GitLabClient): The client used to send the requests.
+        jobs (dict): Maps a job key to (path, windows), e.g. {('mr', 2024): ('merge_requests', [...])}.
+        pages (dict): Filled as the pages arrive: job key -> {(window, page): (ids, items)}.
+            It is passed in so the caller keeps the pages received before an error.
+        adaptive (bool, optional): Bisect the crowded windows. Defaults to False.
+        per_page (int, optional): Page size. Defaults to 100.
+        max_workers (int, optional): Maximum number of pages in flight. Defaults to 8.
+        fields (tuple, optional): If given, every page is projected to ItemRecords holding
+            only these fields as soon as it is parsed.
+        max_window_pages (int, optional): Pages above which adaptive mode splits a window.
+            Defaults to GITLAB_MAX_WINDOW_PAGES (10).
+        progress (callable, optional): Called as progress(pages_done, None) after every page.
+        deadline (Deadline, optional): The time budget of all the jobs. Defaults to None.
+
+    Raises:
+        DeadlineExceeded: If the deadline runs out.
+        requests.exceptions.RequestException: If any page request fails.
+    """
+    def fetch_page(path, window, page):
+        response = client.get(path, params={**window_params(*window), 'per_page': per_page, 'page': page},
+                              deadline=deadline)
+        response.raise_for_status()
+        record_page(response.url)
+        items = response.json()
+        # The ids are kept apart for the dedup, since the projected records may not hold them
+        ids = [item['id'] for item in items]
+        return _total_pages(response, per_page), ids, project_items(items, fields) if fields else items
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    pending = {}
+
+    def submit(key, window, page):
+        pending[executor.submit(fetch_page, jobs[key][0], window, page)] = (key, window, page)
+
+    done_pages = 0
+    try:
+        for key, (path, windows) in jobs.items():
+            pages.setdefault(key, {})
+            for window in windows:
+                submit(key, window, 1)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, window, page = pending.pop(future)
+                total_pages, ids, page_items = future.result()
+                if (adaptive and page == 1 and window[1] - window[0] >= 2 * MIN_WINDOW
+                        and (total_pages is None or total_pages > max_window_pages)):
+                    # Too deep: drop this page and paginate both halves instead
+                    for half in _bisect(window):
+                        submit(key, half, 1)
+                    continue
+                pages[key][(window, page)] = (ids, page_items)
+                if page == 1 and total_pages:
+                    next_pages = range(2, total_pages + 1)
+                elif total_pages is None and len(ids) == per_page:
+                    # No total headers: ask for the next page while full pages keep coming back
+                    next_pages = [page + 1]
+                else:
+                    next_pages = []
+                for next_page in next_pages:
+                    submit(key, window, next_page)
+                done_pages += 1
+                if progress:
+                    progress(done_pages, None)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def fetch_items_time_sliced(client: GitLabClient, path: str, year: int, time_slice: str = 'month',
+                            per_page: int = DEFAULT_PER_PAGE, max_workers: int = DEFAULT_MAX_WORKERS,
+                            fields: tuple = None, max_window_pages: int = DEFAULT_MAX_WINDOW_PAGES,
+                            progress=None, deadline: Deadline = None) -> list:
+    """
+    Fetches every item of a list endpoint created in a year, one time window at a time, in parallel.
+
+    Instead of one deep query over the whole year, the year is split into windows
+    (see time_windows) that are paginated independently by one bounded thread pool
+    (see fetch_windows). Shallow offset pages are cheaper for GitLab to serve than
+    deep ones.
+
+    Args:
+        client (GitLabClient): The client used to send the requests.
+        path (str): The API path, e.g. 'issues' or 'merge_requests'.
+        year (int): The year to fetch.
+        time_slice (str, optional): 'month', 'week' or 'adaptive'. Defaults to 'month'.
+        per_page (int, optional): Page size. Defaults to 100.
+        max_workers (int, optional): Maximum number of pages in flight. Defaults to 8.
+        fields (tuple, optional): If given, every page is projected to ItemRecords holding
+            only these fields as soon as it is parsed.
+        max_window_pages (int, optional): Pages above which adaptive mode splits a window.
+            Defaults to GITLAB_MAX_WINDOW_PAGES (10).
+        progress (callable, optional): Called as progress(pages_done, None) after every page.
+        deadline (Deadline, optional): The time budget of the whole fetch. Defaults to None.
+
+    Returns:
+        list: All items, by window then page order, each id once.
+
+    Raises:
+        ValueError: If the time slice is invalid.
+        DeadlineExceeded: If the deadline runs out; its partial attribute holds the items of
+            the pages received so far (some windows may be incomplete).
+        requests.exceptions.RequestException: If any page request fails.
+    """
+    pages = {}
+    try:
+        fetch_windows(client, {year: (path, time_windows(year, time_slice))}, pages,
+                      adaptive=time_slice == 'adaptive', per_page=per_page, max_workers=max_workers, fields=fields,
+                      max_window_pages=max_window_pages, progress=progress, deadline=deadline)
+    except DeadlineExceeded as e:
+        e.partial = merge_pages(pages.get(year, {}))
+        raise
+    return merge_pages(pages[year])
@@ -0,0 +1,308 @@
+import os
+
+import requests
+
+try:
+    import flask
+except ImportError:  # Flask is only needed by the web apps
+    flask = None
+
+from .client import get_default_client
+from .counts import count_items_by_year
+from .deadline import DeadlineExceeded, operation_deadline
+from .jobs import get_default_job_queue
+from .pagination import DEFAULT_MAX_WORKERS
+from .projection import RESULT_FIELDS, project_items
+from .results import DEFAULT_RESULTS_PER_PAGE, get_default_result_cache
+from .singleflight import fetch_items_by_year
+from .store import GROUP_BY_COLUMNS, get_default_store, sync_items_by_year
+from .timeslice import DEFAULT_TIME_SLICE, TIME_SLICES
+
+# Years accepted by the web forms and the JSON API
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+TOKEN_MISSING_MESSAGE = "Error: GitLab private token not found. Please set GITLAB_PRIVATE_TOKEN in your .env file."
+
+
+def is_valid_year(year) -> bool:
+    """
+    Tells whether a year is an integer between MIN_YEAR and MAX_YEAR.
+    """
+    return isinstance(year, int) and MIN_YEAR <= year <= MAX_YEAR
+
+
+def _request_error_message(action: str, item_type: str, e: requests.exceptions.RequestException) -> str:
+    error_message = f"An API request error occurred while {action} {item_type}: {e}"
+    if e.response is not None:
+        error_message += f"\nResponse status code: {e.response.status_code}\nResponse text: {e.response.text}"
+    return error_message
+
+
+def get_items_by_year(item_type: str, year: int, concurrent: bool = False, max_workers: int = DEFAULT_MAX_WORKERS,
+                      incremental: bool = False, fields: tuple = None, time_slice: str = DEFAULT_TIME_SLICE):
+    """
+    Fetches GitLab issues or merge requests created in a given year.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        concurrent (bool, optional): Fetch pages 2..N in parallel once page 1 has reported
+            X-Total-Pages. Defaults to False.
+        max_workers (int, optional): Maximum number of pages fetched at the same time in
+            concurrent mode. Defaults to 8.
+        incremental (bool, optional): Only fetch the items updated since the last sync, merge
+            them into the local store and return the whole year from the store. Defaults to False.
+        fields (tuple, optional): Only keep these fields of every item, as compact ItemRecords
+            (e.g. RESULT_FIELDS for the results page). Defaults to None (full dicts).
+        time_slice (str, optional): In concurrent mode, split the year into 'month', 'week' or
+            'adaptive' windows paginated in parallel. Defaults to GITLAB_TIME_SLICE (one query).
+
+    All the pages share one deadline (GITLAB_OPERATION_TIMEOUT). When it runs out the
+    items fetched so far are returned, and the message says the list is partial.
+
+    Returns:
+        tuple: A tuple containing (list_of_items_or_None, message_string). The items are None
+        when the fetch failed (a partial list after a deadline is not a failure).
+    """
+    gitlab_private_token = os.getenv("GITLAB_PRIVATE_TOKEN")
+    if not gitlab_private_token:
+        return None, TOKEN_MISSING_MESSAGE
+
+    if item_type not in ['mr', 'issues']:
+        return None, "Error: Invalid item_type. Must be 'mr' or 'issues'."
+
+    if not is_valid_year(year):
+        return None, "Error: Invalid year. Please provide a valid integer year."
+
+    if time_slice and time_slice not in TIME_SLICES:
+        return None, f"Error: Invalid time slice. Must be one of: {', '.join(TIME_SLICES)}."
+
+    client = get_default_client(gitlab_private_token)
+    deadline = operation_deadline()
+    per_page = 100  # Max allowed per page by GitLab API
+
+    if incremental:
+        try:
+            try:
+                fetched = sync_items_by_year(item_type, year, client, per_page=per_page, deadline=deadline)
+                partial = None
+            except DeadlineExceeded as e:
+                # The pages stored before the deadline are kept, the next sync finishes the job
+                fetched, partial = None, e
+            items = get_default_store().iter_items(item_type, year)
+            items = project_items(items, fields) if fields else list(items)
+        except requests.exceptions.RequestException as e:
+            return None, _request_error_message('syncing', item_type, e)
+        except Exception as e:
+            return None, f"An unexpected error occurred: {e}"
+        if partial is not None:
+            return items, (f"Found {len(items)} {item_type} created in {year} in the local index "
+                           f"(partial results: the sync stopped, {partial}).")
+        return items, f"Found {len(items)} {item_type} created in {year} ({fetched} updated since the last sync)."
+
+    # Identical calls (same type, year and token) share a single pagination run, one page after
+    # another or, in concurrent mode, pages 2..N in parallel
+    try:
+        items = fetch_items_by_year(item_type, year, client, concurrent=concurrent, max_workers=max_workers,
+                                    per_page=per_page, fields=fields,
+                                    time_slice=(time_slice or None) if concurrent else None, deadline=deadline)
+    except DeadlineExceeded as e:
+        return e.partial, f"Found {len(e.partial)} {item_type} created in {year} (partial results: {e})."
+    except requests.exceptions.RequestException as e:
+        return None, _request_error_message('fetching', item_type, e)
+    except Exception as e:
+        return None, f"An unexpected error occurred: {e}"
+
+    return items, f"Found {len(items)} {item_type} created in {year}."
+
+
+def count_items_for_year(item_type: str, year: int, time_slice: str = 'month'):
+    """
+    Counts the GitLab issues or merge requests created in a given year without downloading them.
+
+    One request of a single item is sent and its X-Total header is read; when GitLab leaves
+    it out (very large years), the year is counted window by window in parallel instead.
+
+    Args:
+        item_type (str): The type of items to count ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+        time_slice (str, optional): The windows of the fallback count. Defaults to 'month'.
+
+    Returns:
+        tuple: A tuple containing (count_or_None, message_string).
+    """
+    gitlab_private_token = os.getenv("GITLAB_PRIVATE_TOKEN")
+    if not gitlab_private_token:
+        return None, TOKEN_MISSING_MESSAGE
+
+    if item_type not in ['mr', 'issues']:
+        return None, "Error: Invalid item_type. Must be 'mr' or 'issues'."
+
+    if not is_valid_year(year):
+        return None, "Error: Invalid year. Please provide a valid integer year."
+
+    if time_slice not in TIME_SLICES:
+        return None, f"Error: Invalid time slice. Must be one of: {', '.join(TIME_SLICES)}."
+
+    client = get_default_client(gitlab_private_token)
+    try:
+        count = count_items_by_year(item_type, year, client, time_slice=time_slice, deadline=operation_deadline())
+    except DeadlineExceeded as e:
+        return None, f"Error: Could not count the {item_type} created in {year} in time ({e})."
+    except requests.exceptions.RequestException as e:
+        return None, f"An API request error occurred while counting {item_type}: {e}"
+    except Exception as e:
+        return None, f"An unexpected error occurred: {e}"
+
+    return count, f"Found {count} {item_type} created in {year}."
+
+
+def start_items_job(item_type: str, year: int):
+    """
+    Queues a background job fetching GitLab issues or merge requests created in a given year.
+
+    The job runs on the job queue (GITLAB_JOB_BACKEND), not in the request thread, and
+    reports its progress as pages done out of X-Total-Pages.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+
+    Returns:
+        tuple: A tuple containing (job_id_or_None, message_string).
+    """
+    if not os.getenv("GITLAB_PRIVATE_TOKEN"):
+        return None, TOKEN_MISSING_MESSAGE
+
+    if item_type not in ['mr', 'issues']:
+        return None, "Error: Invalid item_type. Must be 'mr' or 'issues'."
+
+    if not is_valid_year(year):
+        return None, "Error: Invalid year. Please provide a valid integer year."
+
+    try:
+        job_id = get_default_job_queue().submit('items_by_year', item_type=item_type, year=year,
+                                                fields=list(RESULT_FIELDS))
+    except Exception as e:
+        return None, f"An unexpected error occurred: {e}"
+    return job_id, f"Fetching {item_type} created in {year} in the background."
+
+
+def collect_job_result(job_id: str):
+    """
+    Moves the result of a finished items job into the result set cache, under the job id.
+
+    Returns:
+        tuple: A tuple containing (job_status_dict_or_None, message_string). The status is None
+        if the job is unknown; when it is 'done' the results are at /results/<job_id>.
+    """
+    job = get_default_job_queue().status(job_id)
+    if job is None:
+        return None, "Error: Unknown or expired job."
+    if job['status'] == 'failed':
+        return job, f"An error occurred while fetching {job['params']['item_type']}: {job['error']}"
+    if job['status'] != 'done':
+        return job, f"{job['pages_done']} of {job['total_pages'] or '?'} pages fetched."
+
+    item_type, year = job['params']['item_type'], job['params']['year']
+    result = get_default_result_cache().get(job_id)
+    if result is None:
+        items = get_default_job_queue().result(job_id) or []
+        get_default_result_cache().add(items, result_id=job_id, item_type=item_type, year=year)
+    else:
+        items = result['items']
+    return job, f"Found {len(items)} {item_type} created in {year}."
+
+
+def query_items_by_year(item_type: str, year: int, month: int = None, state: str = None, project_id: int = None,
+                        author: str = None, group_by: str = None, sync: bool = False):
+    """
+    Answers an issues/merge requests report from the local SQLite index instead of GitLab.
+
+    Args:
+        item_type (str): The type of items to report ('mr' for merge requests, 'issues' for issues).
+        year (int): The year the items were created in.
+        month (int, optional): Only items created in this month (1-12).
+        state (str, optional): Only items in this state (e.g. 'opened', 'merged').
+        project_id (int, optional): Only items of this project.
+        author (str, optional): Only items created by this username.
+        group_by (str, optional): Also count the items per 'month', 'state', 'project_id' or 'author'.
+        sync (bool, optional): First fetch the changes since the last sync into the index. Defaults to False.
+
+    Returns:
+        tuple: A tuple containing (list_of_items, list_of_group_counts_or_None, message_string).
+    """
+    if item_type not in ['mr', 'issues']:
+        return [], None, "Error: Invalid item_type. Must be 'mr' or 'issues'."
+
+    if not is_valid_year(year):
+        return [], None, "Error: Invalid year. Please provide a valid integer year."
+
+    if month is not None and not (1 <= month <= 12):
+        return [], None, "Error: Invalid month. Must be between 1 and 12."
+
+    if group_by and group_by not in GROUP_BY_COLUMNS:
+        return [], None, f"Error: Invalid group_by. Must be one of: {', '.join(GROUP_BY_COLUMNS)}"
+
+    store = get_default_store()
+    if sync:
+        gitlab_private_token = os.getenv("GITLAB_PRIVATE_TOKEN")
+        if not gitlab_private_token:
+            return [], None, TOKEN_MISSING_MESSAGE
+        try:
+            sync_items_by_year(item_type, year, get_default_client(gitlab_private_token), store)
+        except requests.exceptions.RequestException as e:
+            return [], None, f"An API request error occurred while syncing {item_type}: {e}"
+
+    filters = {'year': year, 'month': month, 'state': state, 'project_id': project_id, 'author': author}
+    try:
+        items = list(store.query_items(item_type, **filters))
+        counts = store.count_items(item_type, group_by, **filters) if group_by else None
+    except Exception as e:
+        return [], None, f"An unexpected error occurred: {e}"
+
+    return items, counts, f"Found {len(items)} {item_type} created in {year} in the local index."
+
+
+def register_result_routes(app, form_endpoint: str = 'get_items'):
+    """
+    Adds the /results/<result_id> and /jobs/<job_id> pages to a Flask app.
+
+    The app provides the result.html and job.html templates; the pages send the browser
+    back to form_endpoint when the results expired or the job failed.
+
+    Raises:
+        RuntimeError: If Flask is not installed.
+    """
+    if flask is None:
+        raise RuntimeError("The result pages require Flask. Install it with 'pip install flask'.")
+
+    def results(result_id):
+        """
+        Renders one page of a cached result set (?page=N&per_page=M).
+        """
+        page = flask.request.args.get('page', 1, type=int)
+        per_page = flask.request.args.get('per_page', DEFAULT_RESULTS_PER_PAGE, type=int)
+
+        result = get_default_result_cache().page(result_id, page, per_page)
+        if result is None:
+            flask.flash("These results have expired. Please run the query again.", 'error')
+            return flask.redirect(flask.url_for(form_endpoint))
+        return flask.render_template('result.html', result_id=result_id, **result)
+
+    def job_status(job_id):
+        """
+        Shows the progress of a background items job, then redirects to its results.
+        """
+        job, message = collect_job_result(job_id)
+        if job is None or job['status'] == 'failed':
+            flask.flash(message, 'error')
+            return flask.redirect(flask.url_for(form_endpoint))
+        if job['status'] == 'done':
+            flask.flash(message, 'success')
+            return flask.redirect(flask.url_for('results', result_id=job_id))
+        return flask.render_template('job.html', job=job, message=message)
+
+    app.add_url_rule('/results/<result_id>', 'results', results)
+    app.add_url_rule('/jobs/<job_id>', 'job_status', job_status)
@@ -1,8 +1,13 @@
+import asyncio
+import functools
 import os
+import sys
+import time
 import requests
 import json
 from dotenv import load_dotenv
-from flask import Flask, request, render_template, redirect, url_for, flash
+from flask import (Flask, Response, g, request, render_template, redirect, url_for, flash, get_template_attribute,
+                   jsonify, stream_with_context)
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key' # Replace with a strong secret key for flash messages
@@ -10,6 +15,16 @@ app.secret_key = 'your_secret_key' # Replace with a strong secret key for flash
 # Load environment variables from .env file
 load_dotenv()
 
+# Make the shared gitlab_client package in the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gitlab_client import (DEFAULT_TIME_SLICE, MAX_YEAR, MIN_YEAR, RESULT_FIELDS, TIME_SLICES, AsyncRequestError,
+                           DeadlineExceeded, aiter_items_by_year, batch_report, collect_job_result,
+                           count_items_for_year, get_default_async_client, get_default_client,
+                           get_default_result_cache, get_items_by_year, is_valid_year, iter_item_pages_by_year,
+                           iter_raw_pages_by_year, observe_app_request, operation_deadline, page_lines,
+                           query_items_by_year, register_result_routes, render_metrics, run_in_default_loop,
+                           set_member_role, set_member_role_async, start_items_job)
+
 def manage_member_role(username: str, entity_name: str, role: str, entity_type: str = "project"):
     """
     Manages a user's role in a GitLab project or group.
@@ -29,91 +44,13 @@ def manage_member_role(username: str, entity_name: str, role: str, entity_type:
     if not gitlab_private_token:
         return False, "Error: GitLab private token not found. Please set GITLAB_PRIVATE_TOKEN in your .env file."
 
-    gitlab_base_url = "https://gitlab.com"
-    headers = {'PRIVATE-TOKEN': gitlab_private_token}
-
-    role_mapping = {
-        'Guest': 10,
-        'Reporter': 20,
-        'Developer': 30,
-        'Maintainer': 40,
-        'Owner': 50
-    }
-
-    if role not in role_mapping:
-        return False, f"Error: Invalid role '{role}'. Valid roles are: {', '.join(role_mapping.keys())}"
-
-    role_id = role_mapping[role]
+    client = get_default_client(gitlab_private_token)
 
     try:
-        # First, try to get the user ID
-        user_search_url = f"{gitlab_base_url}/api/v4/users?username={username}"
-        user_response = requests.get(user_search_url, headers=headers)
-        user_response.raise_for_status() # Raise an exception for bad status codes
-        users = user_response.json()
-
-        if not users:
-            return False, f"Error: User '{username}' not found."
-
-        user_id = users[0]['id']
-
-        entity_id = None
-        member_url = None
-        add_member_url = None
-
-        if entity_type == "project":
-            # Get the project ID
-            project_search_url = f"{gitlab_base_url}/api/v4/projects?search={entity_name}"
-            project_response = requests.get(project_search_url, headers=headers)
-            project_response.raise_for_status()
-            projects = project_response.json()
-            
-            # Find the exact project by name or ID
-            project = next((p for p in projects if p['name'] == entity_name or str(p['id']) == entity_name), None)
-
-            if not project:
-                return False, f"Error: Project '{entity_name}' not found."
-            entity_id = project['id']
-            member_url = f"{gitlab_base_url}/api/v4/projects/{entity_id}/members/{user_id}"
-            add_member_url = f"{gitlab_base_url}/api/v4/projects/{entity_id}/members"
-
-        elif entity_type == "group":
-            # Get the group ID
-            group_search_url = f"{gitlab_base_url}/api/v4/groups?search={entity_name}"
-            group_response = requests.get(group_search_url, headers=headers)
-            group_response.raise_for_status()
-            groups = group_response.json()
-            
-            # Find the exact group by name or ID
-            group = next((g for g in groups if g['name'] == entity_name or str(g['id']) == entity_name), None)
-            if not group:
-                return False, f"Error: Group '{entity_name}' not found."
-            entity_id = group['id']
-            member_url = f"{gitlab_base_url}/api/v4/groups/{entity_id}/members/{user_id}"
-            add_member_url = f"{gitlab_base_url}/api/v4/groups/{entity_id}/members"
-
-        else:
-            return False, "Error: Invalid entity_type. Must be 'project' or 'group'."
-
-        # Check if the user is already a member
-        get_member_response = requests.get(member_url, headers=headers)
-
-        if get_member_response.status_code == 200:
-            # User is a member, update their role
-            put_payload = {'access_level': role_id}
-            put_response = requests.put(member_url, headers=headers, json=put_payload)
-            put_response.raise_for_status()
-            return True, f"Successfully updated role of user '{username}' in {entity_type} '{entity_name}' to '{role}'."
-        elif get_member_response.status_code == 404:
-            # User is not a member, add them
-            post_payload = {'user_id': user_id, 'access_level': role_id}
-            post_response = requests.post(add_member_url, headers=headers, json=post_payload)
-            post_response.raise_for_status()
-            return True, f"Successfully added user '{username}' to {entity_type} '{entity_name}' with role '{role}'."
-        else:
-            # Handle other unexpected status codes
-            return False, f"Error managing member: {get_member_response.status_code} - {get_member_response.text}"
-
+        # All the steps (lookups, membership check, PUT/POST) share one deadline (GITLAB_OPERATION_TIMEOUT)
+        return set_member_role(client, username, entity_name, role, entity_type, deadline=operation_deadline())
+    except DeadlineExceeded as e:
+        return False, f"Error: GitLab did not answer in time ({e}). The role may not have been changed."
     except requests.exceptions.RequestException as e:
         # Catch any request-related errors
         return False, f"An API request error occurred: {e}"
@@ -121,72 +58,232 @@ def manage_member_role(username: str, entity_name: str, role: str, entity_type:
         # Catch any other unexpected errors
         return False, f"An unexpected error occurred: {e}"
 
-def get_items_by_year(item_type: str, year: int):
+def stream_items_by_year(item_type: str, year: int, output_format: str = 'html'):
     """
-    Fetches GitLab issues or merge requests created in a given year.
+    Streams GitLab issues or merge requests created in a given year while they are downloaded.
+
+    The response body is generated page by page: every GitLab page is flushed to the
+    client as soon as it arrives, so the first rows are sent after one round-trip and
+    the worker never holds more than one page.
 
     Args:
         item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
         year (int): The year to filter items by.
+        output_format (str, optional): 'html' for the results page or 'ndjson' for one JSON
+            object per line. Defaults to 'html'.
 
     Returns:
-        tuple: A tuple containing (list_of_items, message_string).
+        tuple: A tuple containing (flask.Response or None, message_string).
     """
     gitlab_private_token = os.getenv("GITLAB_PRIVATE_TOKEN")
-    
+
     # Check if the GitLab private token is available
     if not gitlab_private_token:
-        return [], "Error: GitLab private token not found. Please set GITLAB_PRIVATE_TOKEN in your .env file."
+        return None, "Error: GitLab private token not found. Please set GITLAB_PRIVATE_TOKEN in your .env file."
 
-    gitlab_base_url = "https://gitlab.com"
-    headers = {'PRIVATE-TOKEN': gitlab_private_token}
+    if item_type not in ['mr', 'issues']:
+        return None, "Error: Invalid item_type. Must be 'mr' or 'issues'."
 
-    items = []
-    page = 1
-    per_page = 100  # Max allowed per page by GitLab API
+    if not is_valid_year(year):
+        return None, "Error: Invalid year. Please provide a valid integer year."
 
-    if item_type not in ['mr', 'issues']:
-        return [], "Error: Invalid item_type. Must be 'mr' or 'issues'."
-    
-    # Validate year input (already done in Flask route, but good for standalone function)
-    if not isinstance(year, int) or not (1900 <= year <= 2100): # Reasonable year range
-        return [], "Error: Invalid year. Please provide a valid integer year."
-
-    while True:
-        if item_type == 'issues':
-            url = f"{gitlab_base_url}/api/v4/issues?created_after={year}-01-01T00:00:00Z&created_before={year+1}-01-01T00:00:00Z&per_page={per_page}&page={page}"
-        elif item_type == 'mr':
-            url = f"{gitlab_base_url}/api/v4/merge_requests?created_after={year}-01-01T00:00:00Z&created_before={year+1}-01-01T00:00:00Z&per_page={per_page}&page={page}"
-        
+    if output_format not in ['html', 'ndjson']:
+        return None, "Error: Invalid output format. Must be 'html' or 'ndjson'."
+
+    client = get_default_client(gitlab_private_token)
+    deadline = operation_deadline()
+
+    def generate_ndjson():
+        # The items are sent as GitLab wrote them: each page is only split into lines, never parsed and re-encoded
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status() # Raise an exception for bad status codes
-            current_items = response.json()
-
-            if not current_items:
-                break  # No more items on this page
-
-            items.extend(current_items)
-            
-            # Check for pagination headers
-            total_pages_header = response.headers.get('X-Total-Pages')
-            if total_pages_header:
-                total_pages = int(total_pages_header)
-                if page >= total_pages:
-                    break # No more pages
-
-            page += 1
-        
+            for body in iter_raw_pages_by_year(item_type, year, client, deadline=deadline):
+                yield page_lines(body)[0]
+        except requests.exceptions.RequestException as e:
+            # The status line is already sent, so the error becomes the last record
+            error = f"An API request error occurred while fetching {item_type}: {e}"
+            yield (json.dumps({'error': error}) + '\n').encode()
+
+    def generate_html():
+        # The HTML rows only show a few fields, so those pages are projected to ItemRecords
+        # A stream that runs out of its deadline ends with the error footer, like any request error
+        pages = iter_item_pages_by_year(item_type, year, client, fields=RESULT_FIELDS, deadline=deadline)
+        head = get_template_attribute('result_stream.html', 'head')
+        rows = get_template_attribute('result_stream.html', 'rows')
+        foot = get_template_attribute('result_stream.html', 'foot')
+
+        yield head(item_type, year)
+        count = 0
+        error = None
+        try:
+            for page_items in pages:
+                count += len(page_items)
+                yield rows(page_items)
         except requests.exceptions.RequestException as e:
-            error_message = f"An API request error occurred while fetching {item_type} (page {page}): {e}"
-            if response is not None: 
-               error_message += f"\nResponse status code: {response.status_code}\nResponse text: {response.text}"
-            return [], error_message
-        except Exception as e:
-            return [], f"An unexpected error occurred: {e}"
+            error = f"An API request error occurred while fetching {item_type}: {e}"
+        yield foot(count, item_type, year, error)
+
+    if output_format == 'ndjson':
+        response = Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    else:
+        response = Response(stream_with_context(generate_html()), mimetype='text/html')
+    # Ask reverse proxies (nginx) not to buffer the streamed body
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response, f"Streaming {item_type} created in {year}."
+
+async def manage_member_role_async(username: str, entity_name: str, role: str, entity_type: str = "project"):
+    """
+    Async version of manage_member_role, for use from async views.
+
+    Args:
+        username (str): The username of the user whose role is to be managed.
+        entity_name (str): The name of the project or group.
+        role (str): The role to assign to the user (e.g., 'Guest', 'Developer').
+        entity_type (str, optional): The type of the entity. Defaults to "project".
+
+    Returns:
+        tuple: A tuple containing (success_boolean, message_string).
+    """
+    gitlab_private_token = os.getenv("GITLAB_PRIVATE_TOKEN")
+
+    # Check if the GitLab private token is available
+    if not gitlab_private_token:
+        return False, "Error: GitLab private token not found. Please set GITLAB_PRIVATE_TOKEN in your .env file."
+
+    client = get_default_async_client(gitlab_private_token)
+    try:
+        return await set_member_role_async(client, username, entity_name, role, entity_type,
+                                           deadline=operation_deadline())
+    except DeadlineExceeded as e:
+        return False, f"Error: GitLab did not answer in time ({e}). The role may not have been changed."
+    except AsyncRequestError as e:
+        return False, f"An API request error occurred: {e}"
+    except Exception as e:
+        return False, f"An unexpected error occurred: {e}"
+
+async def get_items_by_year_async(item_type: str, year: int):
+    """
+    Async version of get_items_by_year, for use from async views.
+
+    Args:
+        item_type (str): The type of items to fetch ('mr' for merge requests, 'issues' for issues).
+        year (int): The year to filter items by.
+
+    Returns:
+        tuple: A tuple containing (list_of_items_or_None, message_string). The items are None
+        when the fetch failed.
+    """
+    gitlab_private_token = os.getenv("GITLAB_PRIVATE_TOKEN")
+
+    # Check if the GitLab private token is available
+    if not gitlab_private_token:
+        return None, "Error: GitLab private token not found. Please set GITLAB_PRIVATE_TOKEN in your .env file."
+
+    if item_type not in ['mr', 'issues']:
+        return None, "Error: Invalid item_type. Must be 'mr' or 'issues'."
+
+    if not is_valid_year(year):
+        return None, "Error: Invalid year. Please provide a valid integer year."
+
+    client = get_default_async_client(gitlab_private_token)
+    items = []
+    try:
+        async for item in aiter_items_by_year(item_type, year, client, deadline=operation_deadline()):
+            items.append(item)
+    except DeadlineExceeded as e:
+        return items, f"Found {len(items)} {item_type} created in {year} (partial results: {e})."
+    except AsyncRequestError as e:
+        return None, f"An API request error occurred while fetching {item_type}: {e}"
+    except Exception as e:
+        return None, f"An unexpected error occurred: {e}"
 
     return items, f"Found {len(items)} {item_type} created in {year}."
 
+# Longest year range of one batch report
+MAX_REPORT_YEARS = 20
+
+def report_items_by_years(item_types: list, first_year: int, last_year: int, time_slice: str = 'month'):
+    """
+    Counts GitLab issues and/or merge requests created per month over a range of years, in one run.
+
+    All the (item_type, year) crawls share one worker pool and the shared client's
+    connection pool (see batch_report), and only the creation time of the items is kept.
+
+    Args:
+        item_types (list): 'mr' and/or 'issues'.
+        first_year (int): The first year of the report.
+        last_year (int): The last year of the report (included).
+        time_slice (str, optional): The windows each year is split into. Defaults to 'month'.
+
+    Returns:
+        tuple: A tuple containing (list_of_table_rows, message_string). Each row is a dict with
+        item_type, year, months (12 counts) and total.
+    """
+    gitlab_private_token = os.getenv("GITLAB_PRIVATE_TOKEN")
+    if not gitlab_private_token:
+        return [], "Error: GitLab private token not found. Please set GITLAB_PRIVATE_TOKEN in your .env file."
+
+    if not item_types or any(item_type not in ['mr', 'issues'] for item_type in item_types):
+        return [], "Error: Invalid item_type. Must be 'mr' or 'issues'."
+
+    if not (MIN_YEAR <= first_year <= last_year <= MAX_YEAR):
+        return [], "Error: Invalid years. The first year must not be after the last one."
+
+    if last_year - first_year + 1 > MAX_REPORT_YEARS:
+        return [], f"Error: A report covers at most {MAX_REPORT_YEARS} years."
+
+    if time_slice not in TIME_SLICES:
+        return [], f"Error: Invalid time slice. Must be one of: {', '.join(TIME_SLICES)}."
+
+    client = get_default_client(gitlab_private_token)
+    partial = None
+    try:
+        rows = batch_report(item_types, range(first_year, last_year + 1), client, time_slice=time_slice,
+                            deadline=operation_deadline())
+    except DeadlineExceeded as e:
+        rows, partial = e.partial, e
+    except requests.exceptions.RequestException as e:
+        return [], f"An API request error occurred while building the report: {e}"
+    except Exception as e:
+        return [], f"An unexpected error occurred: {e}"
+
+    table = []
+    for row in rows:
+        if row['month'] == 1:
+            table.append({'item_type': row['item_type'], 'year': row['year'], 'months': [], 'total': 0})
+        table[-1]['months'].append(row['count'])
+        table[-1]['total'] += row['count']
+    message = (f"Counted {sum(line['total'] for line in table)} {' and '.join(item_types)} "
+               f"created in {first_year}-{last_year}")
+    if partial is not None:
+        return table, message + f" (partial results: {partial})."
+    return table, message + "."
+
+def _run_async_view(func):
+    """
+    Runs an async view on the process-wide event loop (see run_in_default_loop) instead of
+    a new loop per request, so the loop's default async client keeps its connections open
+    between requests.
+    """
+    @functools.wraps(func)
+    def view(*args, **kwargs):
+        return run_in_default_loop(func(*args, **kwargs))
+    return view
+
+app.async_to_sync = _run_async_view
+
+# Time every web request; the route template (e.g. /results/<result_id>) keeps the label values few
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_duration(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_app_request(request.method, route, response.status_code, time.perf_counter() - started)
+    return response
+
 # Flask Routes
 @app.route('/')
 def index():
@@ -234,21 +331,181 @@ def get_items():
             return redirect(url_for('get_items'))
         
         year = int(year_str)
+
+        # Streamed output: rows are sent while the pages are being downloaded
+        output = request.form.get('output', 'page')
+        if output in ['stream', 'ndjson']:
+            response, message = stream_items_by_year(item_type, year, 'ndjson' if output == 'ndjson' else 'html')
+            if response is None:
+                flash(message, 'error')
+                return redirect(url_for('get_items'))
+            return response
+
+        # Count only: one request reading X-Total, nothing is downloaded
+        if output == 'count':
+            count, message = count_items_for_year(item_type, year, request.form.get('time_slice') or 'month')
+            flash(message, 'error' if count is None else 'success')
+            return redirect(url_for('get_items'))
+
+        # Background job: the pages are fetched by the job queue, the browser follows the progress page
+        if output == 'job':
+            job_id, message = start_items_job(item_type, year)
+            if job_id is None:
+                flash(message, 'error')
+                return redirect(url_for('get_items'))
+            return redirect(url_for('job_status', job_id=job_id))
         
-        items, message = get_items_by_year(item_type, year)
+        # Local index: filtered reports answered from SQLite (optionally syncing the changes first)
+        source = request.form.get('source', 'live')
+        if source in ['sync', 'local']:
+            month_str = request.form.get('month', '').strip()
+            project_id_str = request.form.get('project_id', '').strip()
+            if (month_str and not month_str.isdigit()) or (project_id_str and not project_id_str.isdigit()):
+                flash("Month and project ID must be numbers.", 'error')
+                return redirect(url_for('get_items'))
+
+            group_by = request.form.get('group_by') or None
+            items, counts, message = query_items_by_year(
+                item_type, year,
+                month=int(month_str) if month_str else None,
+                state=request.form.get('state') or None,
+                project_id=int(project_id_str) if project_id_str else None,
+                author=request.form.get('author', '').strip() or None,
+                group_by=group_by,
+                sync=source == 'sync')
+            if "Error" in message or "error occurred" in message:
+                flash(message, 'error')
+                return redirect(url_for('get_items'))
+            flash(message, 'success')
+            result_id = get_default_result_cache().add(items, item_type=item_type, year=year,
+                                                       counts=counts, group_by=group_by)
+            return redirect(url_for('results', result_id=result_id))
+
+        time_slice = request.form.get('time_slice') or DEFAULT_TIME_SLICE
+        items, message = get_items_by_year(item_type, year, concurrent=True, fields=RESULT_FIELDS,
+                                           time_slice=time_slice)
         
-        # Check if the message indicates an error
-        if "Error" in message:
+        # No items (None, not an empty list) means the fetch failed
+        if items is None:
             flash(message, 'error')
             # If there's an error, redirect back to the form
             return redirect(url_for('get_items'))
         else:
-            # If successful, flash a success message and render the results page
+            # If successful, keep the result set server-side and show its first page
             flash(message, 'success')
-            return render_template('result.html', items=items, item_type=item_type, year=year)
+            result_id = get_default_result_cache().add(items, item_type=item_type, year=year)
+            return redirect(url_for('results', result_id=result_id))
 
     return render_template('get_items.html')
 
+@app.route('/report', methods=['GET', 'POST'])
+def report():
+    """
+    Handles the 'Batch Report' form: counts per type, year and month over a range of years.
+    """
+    if request.method == 'POST':
+        item_type = request.form.get('item_type', 'both')
+        first_year_str = request.form.get('first_year', '')
+        last_year_str = request.form.get('last_year', '') or first_year_str
+
+        if not all(value.isdigit() and len(value) == 4 for value in (first_year_str, last_year_str)):
+            flash("Invalid year. Please enter 4-digit numbers.", 'error')
+            return redirect(url_for('report'))
+
+        item_types = ['issues', 'mr'] if item_type == 'both' else [item_type]
+        table, message = report_items_by_years(item_types, int(first_year_str), int(last_year_str),
+                                               request.form.get('time_slice') or 'month')
+        if "Error" in message or "error occurred" in message:
+            flash(message, 'error')
+            return redirect(url_for('report'))
+        flash(message, 'success')
+        return render_template('report.html', table=table)
+
+    return render_template('report.html', table=None)
+
+# Result set pages and background job progress pages (shared with the test app)
+register_result_routes(app)
+
+# Async JSON API (needs the 'httpx' package for the async client)
+@app.route('/api/grant_access', methods=['POST'])
+async def api_grant_access():
+    """
+    Grants a role from a JSON (or form) body with username, entity_name, role and entity_type.
+    """
+    data = request.get_json(silent=True) or request.form
+    username = data.get('username')
+    entity_name = data.get('entity_name')
+    role = data.get('role')
+    entity_type = data.get('entity_type', 'project')
+
+    if not all([username, entity_name, role, entity_type]):
+        return jsonify(success=False, message="All fields are required."), 400
+
+    success, message = await manage_member_role_async(username, entity_name, role, entity_type)
+    return jsonify(success=success, message=message), 200 if success else 400
+
+@app.route('/api/items', methods=['GET'])
+async def api_get_items():
+    """
+    Returns the issues or merge requests of a year as JSON (?item_type=mr&year=2024),
+    or only their number with count=1.
+    """
+    item_type = request.args.get('item_type')
+    year_str = request.args.get('year', '')
+
+    if not year_str.isdigit() or len(year_str) != 4:
+        return jsonify(items=[], message="Invalid year. Please enter a 4-digit number."), 400
+
+    if request.args.get('count') in ['1', 'true']:
+        # The count uses the shared (blocking) client, so it runs outside the event loop
+        count, message = await asyncio.to_thread(count_items_for_year, item_type, int(year_str))
+        return jsonify(count=count, message=message), 400 if count is None else 200
+
+    items, message = await get_items_by_year_async(item_type, int(year_str))
+    if items is None:
+        return jsonify(items=[], message=message), 400
+    return jsonify(items=items, message=message)
+
+# Background job JSON API: POST queues the job, GET polls its progress and returns the items once done
+@app.route('/api/jobs', methods=['POST'])
+def api_start_job():
+    """
+    Queues a background items job from a JSON (or form) body with item_type and year.
+    """
+    data = request.get_json(silent=True) or request.form
+    item_type = data.get('item_type')
+    year_str = str(data.get('year', ''))
+
+    if not year_str.isdigit() or len(year_str) != 4:
+        return jsonify(job_id=None, message="Invalid year. Please enter a 4-digit number."), 400
+
+    job_id, message = start_items_job(item_type, int(year_str))
+    if job_id is None:
+        return jsonify(job_id=None, message=message), 400
+    return jsonify(job_id=job_id, message=message, status_url=url_for('api_job_status', job_id=job_id)), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """
+    Returns the state of a background items job, with its items once it is done.
+    """
+    job, message = collect_job_result(job_id)
+    if job is None:
+        return jsonify(message=message), 404
+
+    body = dict(job, message=message)
+    result = get_default_result_cache().get(job_id) if job['status'] == 'done' else None
+    if result is not None:
+        body['items'] = [item._asdict() if hasattr(item, '_asdict') else item for item in result['items']]
+    return jsonify(body)
+
+@app.route('/metrics')
+def metrics():
+    """
+    Returns the GitLab call and web request metrics in the Prometheus text format.
+    """
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == "__main__":
     # Ensure this is set to False in a production environment
     app.run(debug=True)
@@ -0,0 +1,19 @@
+# Worker process for the background jobs of the Flask app when GITLAB_JOB_BACKEND=sqlite.
+# The web app only writes the job into the GITLAB_JOB_DB table (default gitlab_jobs.db),
+# this script picks the queued jobs one by one, fetches the pages and saves the progress and the items.
+# More than one worker can run at the same time, a job is only picked by one of them.
+# If a worker is killed, its job is picked again by a worker once it had no progress for GITLAB_JOB_LEASE seconds.
+#
+#   python job_worker.py
+import os
+
+from dotenv import load_dotenv
+
+# the .env file must be loaded before gitlab_client is imported (it reads the settings on import)
+load_dotenv()
+
+from gitlab_client import SQLiteJobQueue
+from gitlab_client.jobs import DEFAULT_JOB_DB_PATH
+
+if __name__ == "__main__":
+    SQLiteJobQueue(os.getenv("GITLAB_JOB_DB", DEFAULT_JOB_DB_PATH)).run_worker()
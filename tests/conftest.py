@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from gitlab_client import GitLabClient  # noqa: E402
+from mock_gitlab import MockGitLabConfig, start_mock_server  # noqa: E402
+
+
+@pytest.fixture
+def mock_gitlab():
+    """
+    Starts a mock GitLab server with 250 issues and merge requests created in 2024.
+
+    Yields:
+        tuple: The server's MockGitLabConfig and a GitLabClient pointed at it.
+    """
+    config = MockGitLabConfig(items=250)
+    server, base_url = start_mock_server(config=config)
+    try:
+        yield config, GitLabClient(token='test', base_url=base_url, max_retries=0)
+    finally:
+        server.shutdown()
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from gitlab_client import ndjson_lines, page_lines, parse_json_array, split_json_array
+
+
+@pytest.mark.parametrize('body', [
+    b'[{"id": 1, "title": "a"}, {"id": 2, "title": "b"}]',
+    # Escaped quotes and backslashes do not end a string
+    b'[{"title": "say \\"hi\\""}, {"title": "\\\\"}, {"title": "\\\\\\""}]',
+    # Brackets, braces and commas inside strings are not structure
+    b'[{"title": "[{]}, ["}, {"title": "}}]]"}]',
+    b'[{"labels": [], "author": {"username": "u", "ids": [1, [2]]}}]',
+    # Pages with scalar items go through the token scanner
+    b'[1, "a,b", [2, 3], null, "]"]',
+    b' \n[ {"id": 1}\r\n, {"id": 2} ]\n',
+])
+def test_split_json_array_matches_json(body):
+    items = split_json_array(body)
+    assert [json.loads(item) for item in items] == json.loads(body)
+    assert [raw for raw, _ in parse_json_array(body)] == [item.decode() for item in items]
+
+
+@pytest.mark.parametrize('body', [b'[]', b' [ ] ', b'\n[\n]\n'])
+def test_split_json_array_empty(body):
+    assert split_json_array(body) == []
+    assert parse_json_array(body) == []
+    assert page_lines(body) == (b'', 0)
+
+
+@pytest.mark.parametrize('body', [
+    b'{"id": 1}',
+    b'[{"id": 1},]',
+    b'[{"id": 1}',
+    b'[{"id": 1}] trailing',
+    b'[1,,2]',
+    b'["unterminated]',
+])
+def test_split_json_array_rejects_invalid_arrays(body):
+    with pytest.raises(ValueError):
+        split_json_array(body)
+
+
+def test_page_lines_keeps_one_item_per_line():
+    body = b'[{"id": 1,\n "title": "a\\nb"},\r\n{"id": 2}]'
+    lines, count = page_lines(body)
+    assert count == 2
+    assert [json.loads(line) for line in lines.splitlines()] == json.loads(body)
+
+
+def test_ndjson_lines_joins_str_items():
+    assert ndjson_lines(['{"id": 1}', '{\n"id": 2}']) == '{"id": 1}\n{ "id": 2}\n'
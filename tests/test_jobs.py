@@ -0,0 +1,73 @@
+import time
+
+from gitlab_client import JOB_HANDLERS, SQLiteJobQueue, ThreadJobQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    return SQLiteJobQueue(str(tmp_path / 'jobs.db'), **kwargs)
+
+
+def test_claim_takes_the_oldest_queued_job_once(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.submit('items_by_year', item_type='issues', year=2023)
+    second = queue.submit('items_by_year', item_type='mr', year=2024)
+    assert queue.claim() == (first, 'items_by_year', {'item_type': 'issues', 'year': 2023}, 1)
+    assert queue.claim()[0] == second
+    assert queue.claim() is None
+    assert queue.status(first)['status'] == 'running'
+
+
+def test_expired_lease_requeues_the_job(tmp_path):
+    queue = make_queue(tmp_path, lease=0.05)
+    job_id = queue.submit('items_by_year', item_type='issues', year=2024)
+    assert queue.claim()[3] == 1
+    # The worker reports progress, renewing its lease
+    queue._update(job_id, 1, {'pages_done': 3, 'total_pages': 5})
+    assert queue.claim() is None
+
+    time.sleep(0.1)
+    assert queue.claim() == (job_id, 'items_by_year', {'item_type': 'issues', 'year': 2024}, 2)
+    status = queue.status(job_id)
+    assert (status['status'], status['pages_done'], status['total_pages']) == ('running', 0, None)
+
+
+def test_worker_that_lost_its_lease_no_longer_writes(tmp_path):
+    queue = make_queue(tmp_path, lease=0.05)
+    job_id = queue.submit('items_by_year', item_type='issues', year=2024)
+    queue.claim()
+    time.sleep(0.1)
+    queue.claim()
+    queue._update(job_id, 1, {'status': 'done', 'result': [{'id': 1}]})
+    assert queue.status(job_id)['status'] == 'running'
+    assert queue.result(job_id) is None
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, lease=0.05, max_attempts=2)
+    job_id = queue.submit('items_by_year', item_type='issues', year=2024)
+    for attempt in (1, 2):
+        assert queue.claim()[3] == attempt
+        time.sleep(0.1)
+    assert queue.claim() is None
+    status = queue.status(job_id)
+    assert status['status'] == 'failed'
+    assert 'started 2 times' in status['error']
+
+
+def test_thread_queue_keeps_results_within_the_byte_limit(monkeypatch):
+    monkeypatch.setitem(JOB_HANDLERS, 'items', lambda progress, count: [{'id': i} for i in range(count)])
+    queue = ThreadJobQueue(max_workers=1, keep_bytes=200)
+
+    def run(count):
+        job_id = queue.submit('items', count=count)
+        while queue.status(job_id)['status'] not in ('done', 'failed'):
+            time.sleep(0.01)
+        return job_id
+
+    first, second = run(10), run(10)
+    assert queue.status(first) is None
+    assert queue.result(second) == [{'id': i} for i in range(10)]
+
+    too_large = run(50)
+    assert queue.status(too_large)['status'] == 'failed'
+    assert queue.result(too_large) is None
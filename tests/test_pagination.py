@@ -0,0 +1,51 @@
+import pytest
+
+from gitlab_client import iter_page_responses, iter_pages
+from gitlab_client import pagination
+
+
+@pytest.fixture(autouse=True)
+def forget_keyset_endpoints():
+    pagination._keyset_unsupported.clear()
+    yield
+    pagination._keyset_unsupported.clear()
+
+
+def test_keyset_is_used_where_supported(mock_gitlab):
+    config, client = mock_gitlab
+    responses = list(iter_page_responses(client, 'projects', per_page=20))
+    assert all('pagination=keyset' in response.url for response in responses)
+    assert sum(len(response.json()) for response in responses) == len(config.projects)
+
+
+def test_offset_only_endpoints_never_try_keyset(mock_gitlab):
+    config, client = mock_gitlab
+    pages = list(iter_pages(client, 'issues', per_page=100))
+    assert sum(len(page) for page in pages) == len(config.items['issues'])
+    assert config.stats()['requests'] == len(pages)
+    assert not pagination._keyset_unsupported
+
+
+def test_refused_keyset_falls_back_to_offset_once(mock_gitlab, monkeypatch):
+    config, client = mock_gitlab
+    # Pretend GitLab documented keyset for issues: the mock refuses it with 405, like GitLab does
+    monkeypatch.setattr(pagination, 'KEYSET_PATHS', pagination.KEYSET_PATHS | {'issues'})
+    pages = list(iter_pages(client, 'issues', per_page=100))
+    assert sum(len(page) for page in pages) == len(config.items['issues'])
+    assert config.stats()['requests'] == len(pages) + 1
+    assert (client.api_url, 'issues') in pagination._keyset_unsupported
+
+    # The refusal is remembered: the next iteration goes straight to offset pages
+    list(iter_pages(client, 'issues', per_page=100))
+    assert config.stats()['requests'] == 2 * len(pages) + 1
+
+
+@pytest.mark.parametrize('status_code, text, rejected', [
+    (405, '{"error": "Keyset pagination is not yet available for this type of request"}', True),
+    (400, '{"error": "This pagination method is not supported for this order_by"}', True),
+    (400, '{"error": "created_after is invalid"}', False),
+    (500, '', False),
+])
+def test_only_pagination_errors_disable_keyset(status_code, text, rejected):
+    assert pagination._keyset_rejected('https://gitlab.example.com/api/v4', 'projects', status_code, text) is rejected
+    assert (('https://gitlab.example.com/api/v4', 'projects') in pagination._keyset_unsupported) is rejected
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from gitlab_client import fetch_items_time_sliced, time_windows, year_params
+from gitlab_client.timeslice import _bisect, window_params
+
+
+def test_bisect_splits_on_a_whole_second():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end = start + timedelta(seconds=3, microseconds=500)
+    (first_start, middle), (second_start, second_end) = _bisect((start, end))
+    assert (first_start, second_end) == (start, end)
+    assert middle == second_start == start + timedelta(seconds=1)
+
+
+def test_windows_are_half_open_and_contiguous():
+    windows = time_windows(2024, 'month')
+    assert windows[0][0] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert windows[-1][1] == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert end == start
+    params = [window_params(*window) for window in windows]
+    for previous, following in zip(params, params[1:]):
+        assert previous['created_before'].endswith('23:59:59.999999Z')
+        assert previous['created_before'] < following['created_after']
+
+
+def test_year_params_match_the_year_window():
+    assert year_params(2024) == window_params(datetime(2024, 1, 1, tzinfo=timezone.utc),
+                                              datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+
+def test_adaptive_slicing_bisects_crowded_windows(mock_gitlab):
+    config, client = mock_gitlab
+    items = fetch_items_time_sliced(client, 'issues', 2024, 'adaptive', per_page=5, max_window_pages=1)
+    assert sorted(item['id'] for item in items) == [item['id'] for item in config.items['issues']]
+    # Twelve month windows would take 12 first pages; the crowded ones were split instead
+    assert config.stats()['requests'] > 12 + len(items) // 5
+
+
+def test_adaptive_slicing_stops_at_the_minimum_window(mock_gitlab):
+    config, client = mock_gitlab
+    # Every item in the same hour: the window is not split below MIN_WINDOW but paginated
+    for item in config.items['issues']:
+        item['created_at'] = item['updated_at'] = '2024-03-10T10:30:00.000Z'
+    items = fetch_items_time_sliced(client, 'issues', 2024, 'adaptive', per_page=100, max_window_pages=1)
+    assert sorted(item['id'] for item in items) == [item['id'] for item in config.items['issues']]